@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер скорости разбора дат: прежний цикл strptime против core.date_parser
+
+Запуск из корня проекта:
+    python benchmarks/bench_date_parser.py [количество ячеек]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.date_parser import parse_date, cache_info, clear_cache
+
+
+LEGACY_FORMATS = ['%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%y', '%d/%m/%y']
+
+
+def legacy_parse_date(value):
+    """Прежний разбор: перебор форматов strptime для каждой ячейки"""
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        if not value:
+            return None
+        for fmt in LEGACY_FORMATS:
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def make_cells(count: int, seed: int = 2025) -> list:
+    """Синтетические ячейки: строки разных форматов, date, datetime и пустые"""
+    rng = random.Random(seed)
+    first_day = date(2025, 1, 1)
+    days = [first_day + timedelta(days=offset) for offset in range(365)]
+    cells = []
+    for _ in range(count):
+        day = rng.choice(days)
+        kind = rng.random()
+        if kind < 0.55:
+            cells.append(day.strftime('%d.%m.%Y'))
+        elif kind < 0.65:
+            cells.append(day.strftime('%d/%m/%Y'))
+        elif kind < 0.75:
+            cells.append(day.strftime('%Y-%m-%d'))
+        elif kind < 0.80:
+            cells.append(day.strftime('%d.%m.%y'))
+        elif kind < 0.90:
+            cells.append(datetime(day.year, day.month, day.day))
+        elif kind < 0.97:
+            cells.append(day)
+        else:
+            cells.append(None)
+    return cells
+
+
+def measure(name: str, parser, cells: list) -> float:
+    """Прогоняет парсер по всем ячейкам и печатает время"""
+    start = time.perf_counter()
+    for cell in cells:
+        parser(cell)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:8.3f} с  ({len(cells) / elapsed:,.0f} ячеек/с)")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    cells = make_cells(count)
+    print(f"Ячеек: {count:,}")
+
+    # Результаты обоих парсеров должны совпадать (datetime сравнивается как date)
+    for cell in cells[:10000]:
+        expected = legacy_parse_date(cell)
+        if isinstance(expected, datetime):
+            expected = expected.date()
+        if parse_date(cell) != expected:
+            raise AssertionError(f"Расхождение на значении {cell!r}")
+
+    clear_cache()
+    legacy = measure("strptime (прежний)", legacy_parse_date, cells)
+    current = measure("date_parser (кэш)", parse_date, cells)
+    print(f"Ускорение: x{legacy / current:.1f}")
+    print(f"Кэш: {cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер отзывчивости окна при потоке сообщений: построчный вывод против LogView
+
+Рабочий поток публикует сообщения с заданной частотой. Прежний вывод -
+вставка каждой строки в Text через after(0) с тегом, прокруткой и
+update_idletasks, как делали add_info окон. Новый - LogView.append из
+рабочего потока и пакетный вывод по таймеру. Отзывчивость - задержка
+"пульса" интерфейса (after каждые 10 мс): средняя и максимальная.
+Без дисплея замер пропускается.
+
+Запуск из корня проекта:
+    python benchmarks/bench_log_view.py [сообщений в секунду] [длительность, с]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config
+from gui.log_view import LogView
+
+HEARTBEAT_MS = 10
+
+
+def legacy_add_info(root, text, message, level):
+    """Прежний add_info: строка, тег на строку, прокрутка и update_idletasks"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    text.insert(tk.END, f"[{timestamp}] {message}\n")
+    if level != "info":
+        tag_name = f"color_{level}_{timestamp}"
+        text.tag_add(tag_name, tk.END + "-2l linestart", tk.END + "-1l lineend")
+        text.tag_config(tag_name, foreground="green", font=("TkDefaultFont", 9, "bold"))
+    text.see(tk.END)
+    root.update_idletasks()
+
+
+def run(root, publish, rate, duration):
+    """Задержки пульса интерфейса (мс) за время публикации сообщений"""
+    delays = []
+    done = threading.Event()
+
+    def worker():
+        interval = 1.0 / rate
+        start = time.perf_counter()
+        for index in range(int(rate * duration)):
+            level = "success" if index % 10 == 0 else "info"
+            publish(f"Файл создан: Блок {index % 20}/Сотрудник {index}.xlsx", level)
+            sleep = start + (index + 1) * interval - time.perf_counter()
+            if sleep > 0:
+                time.sleep(sleep)
+        done.set()
+
+    def heartbeat(expected):
+        now = time.perf_counter()
+        delays.append((now - expected) * 1000)
+        if done.is_set():
+            root.quit()
+            return
+        root.after(HEARTBEAT_MS, heartbeat, now + HEARTBEAT_MS / 1000)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(HEARTBEAT_MS, heartbeat, time.perf_counter() + HEARTBEAT_MS / 1000)
+    root.mainloop()
+    return delays
+
+
+def main():
+    rate = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Окно не создано (нет дисплея?): {e}")
+        return
+
+    results = []
+    text = tk.Text(root, height=12)
+    text.pack()
+    results.append(("построчно через after(0)", run(
+        root, lambda message, level: root.after(0, legacy_add_info, root, text, message, level), rate, duration
+    ), int(text.index("end-1c").split(".")[0])))
+    text.destroy()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config()
+        config.set("operation_log_directory", tmp)
+        log_view = LogView(root, config, "bench")
+        log_view.pack()
+        results.append(("LogView", run(root, log_view.append, rate, duration),
+                        int(log_view.text.index("end-1c").split(".")[0])))
+        log_view.destroy()
+    root.destroy()
+
+    print(f"Сообщений в секунду: {rate}, длительность: {duration} с")
+    print(f"{'вывод':<26} {'пульс ср., мс':>14} {'пульс макс., мс':>16} {'строк в Text':>13}")
+    for title, delays, lines in results:
+        print(f"{title:<26} {sum(delays) / len(delays):14.1f} {max(delays):16.1f} {lines:13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер накладных расходов логирования на 1000 файлов: синхронный вывод против очереди
+
+Прежняя настройка писала в консоль из рабочего потока (StreamHandler),
+сообщения по каждому файлу шли на уровне INFO и собирались f-строками.
+Новая настройка (core.logging_setup) кладет записи в очередь, вывод
+выполняет поток QueueListener, сообщения по файлам - ленивые, на DEBUG.
+
+Вывод лога идет во временный файл со сбросом на каждую строку, время -
+рабочего потока и до вывода последней записи. Медленную консоль Windows
+(блокирующая запись строки) имитирует задержка записи строки в микросекундах.
+
+Запуск из корня проекта:
+    python benchmarks/bench_logging.py [количество файлов] [задержка записи строки, мкс]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core import logging_setup
+
+
+class SlowStream:
+    """Поток вывода с задержкой записи строки (как у консоли)"""
+
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def legacy_file_logging(logger, index):
+    """Прежние сообщения на один файл: INFO через f-строки и DEBUG транзакции"""
+    file_path = f"Блок {index % 20}/Сотрудник {index}.xlsx"
+    logger.debug(f"Создана резервная копия: backup_{index}_{file_path}")
+    logger.info(f"Файл создан: {file_path}")
+    if index % 50 == 0:
+        logger.info(f"Создана папка отдела: Блок {index % 20}")
+
+
+def lazy_file_logging(logger, index):
+    """Новые сообщения на один файл: ленивое форматирование, уровень DEBUG"""
+    file_path = f"Блок {index % 20}/Сотрудник {index}.xlsx"
+    logger.debug("Создана резервная копия: backup_%s_%s", index, file_path)
+    logger.debug("Файл создан: %s", file_path)
+    if index % 50 == 0:
+        logger.debug("Создана папка отдела: Блок %s", index % 20)
+
+
+def legacy_setup():
+    """Прежняя настройка main.setup_logging"""
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(logging_setup.LOG_FORMAT))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def measure(files, log_file):
+    """Время рабочего потока на файлы (с) и время до вывода всех записей (с)"""
+    logger = logging.getLogger("core.employee_file_creator")
+    start = time.perf_counter()
+    for index in range(files):
+        log_file(logger, index)
+    worker_time = time.perf_counter() - start
+    logging_setup.stop_logging()
+    return worker_time, time.perf_counter() - start
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    delay_us = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    stdout = sys.stdout
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_stream = open(os.path.join(tmp, "console.log"), "w", encoding="utf-8")
+        output = SlowStream(log_stream, delay_us / 1e6) if delay_us else log_stream
+        cases = [
+            ("синхронно, INFO, f-строки", legacy_setup, legacy_file_logging),
+            ("очередь, INFO, f-строки", lambda: logging_setup.setup_logging("normal"), legacy_file_logging),
+            ("очередь, профиль normal", lambda: logging_setup.setup_logging("normal"), lazy_file_logging),
+            ("очередь, профиль verbose", lambda: logging_setup.setup_logging("verbose"), lazy_file_logging),
+        ]
+        try:
+            for title, setup, log_file in cases:
+                sys.stdout = output
+                setup()
+                worker_time, total_time = measure(files, log_file)
+                sys.stdout = stdout
+                results.append((title, worker_time, total_time))
+        finally:
+            sys.stdout = stdout
+            logging.getLogger().handlers.clear()
+            log_stream.close()
+
+    print(f"Файлов: {files}, задержка записи строки: {delay_us} мкс")
+    print(f"{'настройка':<28} {'поток, мс/1000':>15} {'до вывода, мс/1000':>19}")
+    for title, worker_time, total_time in results:
+        print(f"{title:<28} {worker_time * 1000 * 1000 / files:15.2f} {total_time * 1000 * 1000 / files:19.2f}")
+    print(f"Ускорение рабочего потока (normal): {results[0][1] / results[2][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
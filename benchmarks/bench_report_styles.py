@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер оформления таблиц: объекты стилей на каждую ячейку против StyleRegistry
+
+Заполняет таблицу Report шаблона отчета по блоку, оформляет ее прежним
+способом и через реестр стилей, сохраняет и сравнивает время и размер файла.
+
+Запуск из корня проекта:
+    python benchmarks/bench_report_styles.py [количество строк]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from copy import copy
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import openpyxl
+from openpyxl.styles import Border, Side
+
+from config import Config
+from core.style_registry import StyleRegistry
+
+
+DATA_START_ROW = 9
+TABLE_COLUMNS = 11
+
+
+def legacy_style(workbook, worksheet, rows: int) -> None:
+    """Прежний способ: новая рамка и копии шрифта/заливки/выравнивания для каждой ячейки"""
+    template_styles = []
+    for col in range(1, TABLE_COLUMNS + 1):
+        cell = worksheet.cell(row=DATA_START_ROW, column=col)
+        template_styles.append({
+            'font': copy(cell.font),
+            'fill': copy(cell.fill),
+            'alignment': copy(cell.alignment),
+            'number_format': cell.number_format,
+        })
+
+    for row in range(DATA_START_ROW, DATA_START_ROW + rows):
+        for col in range(1, TABLE_COLUMNS + 1):
+            cell = worksheet.cell(row=row, column=col)
+            style = template_styles[col - 1]
+            cell.font = copy(style['font'])
+            cell.fill = copy(style['fill'])
+            cell.alignment = copy(style['alignment'])
+            cell.number_format = style['number_format']
+            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                                 top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+def registry_style(workbook, worksheet, rows: int) -> None:
+    """Реестр стилей: снимок строки шаблона и общая рамка на весь диапазон"""
+    registry = StyleRegistry(workbook)
+    template_styles = registry.row_styles(worksheet, DATA_START_ROW, TABLE_COLUMNS)
+    for row in range(DATA_START_ROW, DATA_START_ROW + rows):
+        registry.apply_row_styles(worksheet, row, template_styles)
+    registry.stamp_border(worksheet, DATA_START_ROW, DATA_START_ROW + rows - 1, 1, TABLE_COLUMNS)
+
+
+def run(name: str, style_func, template_path: str, rows: int) -> None:
+    """Заполняет таблицу, оформляет, сохраняет и печатает замеры"""
+    workbook = openpyxl.load_workbook(template_path)
+    worksheet = workbook['Report']
+    for row in range(DATA_START_ROW, DATA_START_ROW + rows):
+        index = row - DATA_START_ROW
+        worksheet.cell(row=row, column=1, value=index + 1)
+        worksheet.cell(row=row, column=2, value=f"Сотрудник {index}")
+        worksheet.cell(row=row, column=3, value=100000 + index)
+
+    start = time.perf_counter()
+    style_func(workbook, worksheet, rows)
+    style_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = os.path.join(temp_dir, "report.xlsx")
+        start = time.perf_counter()
+        workbook.save(output_path)
+        save_time = time.perf_counter() - start
+        size = os.path.getsize(output_path)
+
+        start = time.perf_counter()
+        openpyxl.load_workbook(output_path).close()
+        open_time = time.perf_counter() - start
+
+    print(f"{name:<22} оформление {style_time:6.2f} с  сохранение {save_time:6.2f} с  "
+          f"открытие {open_time:6.2f} с  размер {size / 1024:8.1f} КБ")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    template_path = Config().block_report_template
+    print(f"Строк: {rows}, столбцов: {TABLE_COLUMNS}")
+    run("объекты на ячейку", legacy_style, template_path, rows)
+    run("StyleRegistry", registry_style, template_path, rows)
+
+
+if __name__ == "__main__":
+    main()
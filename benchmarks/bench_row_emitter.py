@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер построения строк Report: словарь полей на строку против скомпилированного построителя
+
+Прежний способ строил на каждую строку словарь с именами полей через f-строки
+и затем сопоставлял его со столбцами шаблона. Скомпилированный построитель
+DataMapper возвращает кортеж значений сразу в порядке столбцов.
+
+Запуск из корня проекта:
+    python benchmarks/bench_row_emitter.py [количество строк]
+"""
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config
+from core.data_mapper import DataMapper
+from core.excel_handler import ExcelHandler
+from models import VacationInfo, VacationPeriod, VacationStatus
+
+
+def make_vacation_infos(count: int):
+    """Синтетические сотрудники с 0-5 периодами"""
+    rng = random.Random(1)
+    infos = []
+    for i in range(count):
+        employee = {
+            'ФИО работника': f'Сотрудник {i}', 'Табельный номер': f'{100000 + i}',
+            'Должность': f'Должность {i % 150}', 'Подразделение 1': 'Блок',
+            'Подразделение 2': f'Отдел {i // 20}', 'Подразделение 3': '', 'Подразделение 4': ''
+        }
+        status = rng.choice(list(VacationStatus))
+        periods = []
+        if status == VacationStatus.FILLED_CORRECT:
+            start = date(2026, 1, 1)
+            for _ in range(rng.randint(1, 5)):
+                start += timedelta(days=rng.randint(5, 60))
+                end = start + timedelta(days=rng.randint(1, 14))
+                periods.append(VacationPeriod(start, end, (end - start).days + 1))
+                start = end
+        infos.append(VacationInfo(employee=employee, periods=periods, status=status))
+    return infos
+
+
+def legacy_row(vacation_info, index, prefix='report_'):
+    """Прежнее построение словаря строки Report"""
+    employee = vacation_info.employee
+    if vacation_info.status == VacationStatus.FILLED_CORRECT:
+        total_days = sum(p.days for p in vacation_info.periods) if vacation_info.periods else 0
+        periods_count = len(vacation_info.periods) if vacation_info.periods else 0
+    else:
+        total_days = 0
+        periods_count = 0
+    return {
+        f'{prefix}employee_name': employee.get('ФИО работника', ''),
+        f'{prefix}tab_number': employee.get('Табельный номер', ''),
+        f'{prefix}position': employee.get('Должность', ''),
+        f'{prefix}department1': employee.get('Подразделение 1', ''),
+        f'{prefix}department2': employee.get('Подразделение 2', ''),
+        f'{prefix}department3': employee.get('Подразделение 3', ''),
+        f'{prefix}department4': employee.get('Подразделение 4', ''),
+        f'{prefix}status': vacation_info.get_status_text(),
+        f'{prefix}total_days': total_days,
+        f'{prefix}periods_count': periods_count,
+        f'{prefix}row_number': index + 1
+    }
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    handler = ExcelHandler(Config())
+    rules = handler._load_filling_rules(handler.config.block_report_template)
+    column_mapping = handler._get_table_columns(rules, 'report_')
+    convert = handler._convert_value_type
+    infos = make_vacation_infos(rows)
+    print(f"Строк: {rows}, столбцов таблицы: {len(column_mapping)}")
+
+    start = time.perf_counter()
+    legacy = []
+    for index, vacation_info in enumerate(infos):
+        row_data = legacy_row(vacation_info, index)
+        legacy.append([
+            (column_mapping[key][0], convert(value))
+            for key, value in row_data.items() if key in column_mapping
+        ])
+    legacy_time = time.perf_counter() - start
+    print(f"{'словарь на строку':<28} {legacy_time:6.3f} с  {rows / legacy_time:12,.0f} строк/с")
+
+    start = time.perf_counter()
+    columns, emit = DataMapper().compile_report_emitter(column_mapping, 'report_', convert)
+    emitted = [emit(vacation_info, index) for index, vacation_info in enumerate(infos)]
+    emitter_time = time.perf_counter() - start
+    print(f"{'скомпилированный построитель':<28} {emitter_time:6.3f} с  {rows / emitter_time:12,.0f} строк/с")
+
+    # Результаты обоих способов должны совпадать
+    for old, new in zip(legacy, emitted):
+        if sorted(old) != sorted(pair for pair in zip(columns, new)):
+            raise AssertionError(f"Строки различаются: {old} != {list(zip(columns, new))}")
+    print(f"Ускорение: {legacy_time / emitter_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
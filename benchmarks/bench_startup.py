@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Замер запуска приложения: импорты до первого окна (python -X importtime)
+
+Печатает суммарное время импортов модулей, нужных для построения главного
+окна, самые долгие из них и проверяет, что openpyxl и модули обработки в
+них не входят. Затем в отдельном процессе строит главное окно и меряет
+время от начала импортов до первой отрисовки и длительность фонового
+прогрева (импорт модулей дочерних окон и разбор rules шаблонов). Без
+дисплея второй замер пропускается.
+
+Запуск из корня проекта:
+    python benchmarks/bench_startup.py [количество самых долгих импортов]
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Импорты main.py до создания главного окна
+STARTUP_IMPORTS = (
+    "import tkinter, tkinter.messagebox; "
+    "from config import Config; from models import ProcessingStatus; "
+    "from core.logging_setup import setup_logging; from gui.main_window import MainWindow"
+)
+
+# Модули, загрузка которых должна идти после появления окна
+DEFERRED_MODULES = ("openpyxl", "core.processor", "core.excel_handler", "gui.create_files_window")
+
+FIRST_WINDOW = f"""
+import time
+start = time.perf_counter()
+{STARTUP_IMPORTS.replace('; ', chr(10))}
+config = Config()
+config.load_or_create_default()
+root = tkinter.Tk()
+window = MainWindow(root, config)
+root.update()
+print(f"{{time.perf_counter() - start:.3f}}")
+window.warm_up_thread.join()
+print(f"{{time.perf_counter() - start:.3f}}")
+root.destroy()
+"""
+
+
+def import_times(code):
+    """Время импорта модулей (мкс): модуль -> (собственное, накопленное)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    times = import_times(STARTUP_IMPORTS)
+    total = sum(self_us for self_us, _ in times.values())
+    print(f"Импорты до первого окна: {len(times)} модулей, {total / 1000:.1f} мс")
+    print(f"{'модуль':<40} {'собств., мс':>12} {'накопл., мс':>12}")
+    for name, (self_us, cumulative_us) in sorted(times.items(), key=lambda item: -item[1][1])[:top]:
+        print(f"{name:<40} {self_us / 1000:12.1f} {cumulative_us / 1000:12.1f}")
+
+    loaded = [module for module in DEFERRED_MODULES if module in times]
+    if loaded:
+        raise AssertionError(f"До первого окна загружаются: {', '.join(loaded)}")
+    deferred = import_times("import gui.create_files_window, gui.reports_window")
+    deferred_total = sum(self_us for name, (self_us, _) in deferred.items() if name not in times)
+    print(f"Отложено до фонового прогрева: {deferred_total / 1000:.1f} мс импортов")
+
+    result = subprocess.run([sys.executable, "-c", FIRST_WINDOW], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Окно не построено (нет дисплея?): {result.stderr.strip().splitlines()[-1]}")
+        return
+    first_window, warmed_up = result.stdout.split()[-2:]
+    print(f"До первой отрисовки окна: {float(first_window):.3f} с")
+    print(f"Фоновый прогрев завершен через: {float(warmed_up):.3f} с")
+
+
+if __name__ == "__main__":
+    main()
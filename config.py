@@ -4,6 +4,7 @@
 Модуль конфигурации приложения
 """
 
+import calendar
 import json
 import logging
 from pathlib import Path
@@ -43,17 +44,49 @@ class Config:
         # Высота окна приложения по умолчанию
         "window_height": 700,
         # Параметры календарного года
-        # Год, для которого строится календарь
+        # Год, для которого строится календарь (високосность и дни в месяцах вычисляются автоматически)
         "target_year": 2026,
-        # Признак високосного года
-        "is_leap_year": False,
-        # Количество дней в каждом месяце (январь-декабрь)
-        "days_in_months": [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31],
+        # Количество лет в календаре отчета начиная с target_year
+        "calendar_years": 1,
         # Названия месяцев для отображения
         "month_names": [
             "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
             "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
         ],
+        # Название листа с пересечениями отпусков в отчете по блоку
+        "conflicts_sheet_name": "Пересечения",
+        # Не пересоздавать отчет по блоку, если файлы сотрудников и шаблон не изменились
+        "skip_unchanged_block_reports": True,
+        # Количество процессов для построения отчетов по блокам (0 - по числу ядер процессора)
+        "report_workers": 0,
+        # Количество процессов для обновления шапки файлов сотрудников (0 - по числу ядер процессора)
+        "header_update_workers": 0,
+        # Количество процессов для переноса файлов сотрудников на новую версию шаблона (0 - по числу ядер процессора)
+        "migration_workers": 0,
+        # Рассчитывать статус формы сотрудника по логике шаблона (True) или брать сохраненное Excel значение B12 (False)
+        "recalculate_form_status": True,
+        # Записывать рассчитанные значения формул в файлы сотрудников (Excel не пересчитывает книгу при открытии)
+        "cache_employee_formulas": True,
+        # Файл снимка штатного расписания в целевой папке (для сравнения со следующей выгрузкой)
+        "staff_snapshot_file": "staff_snapshot.json",
+        # Интервал доставки событий в интерфейс (мс): события прогресса объединяются до последнего значения
+        "event_dispatch_interval_ms": 50,
+        # Максимум недоставленных событий, после которого отправитель ждет интерфейс
+        "event_queue_size": 10000,
+        # Интервал публикации прогресса операций (мс)
+        "progress_publish_interval_ms": 200,
+        # Записей лога операции в памяти для окна (полный лог - в файле)
+        "operation_log_max_entries": 1000,
+        # Папка файлов полного лога операций (JSON Lines)
+        "operation_log_directory": "logs",
+        # Строк в информационной области окна (полный текст - в файле в папке логов операций)
+        "info_log_max_lines": 2000,
+        # Интервал вывода накопленных сообщений в информационную область окна (мс)
+        "info_log_flush_interval_ms": 100,
+        # Интервал фоновой проверки шаблонов (мс), кроме проверки при активации окна
+        "template_check_interval_ms": 300000,
+        # Профиль подробности консольного лога: quiet, normal, verbose (по каждому файлу)
+        "log_profile": "normal",
         # Статусы валидации (для проверки заполнения форм)
         "validation_statuses": {
             "not_filled": "Форма не заполнена",
@@ -175,10 +208,14 @@ class Config:
         value = self.get("target_year")
         return int(value) if value is not None else 2026
     
+    @property
+    def calendar_years(self) -> int:
+        value = self.get("calendar_years")
+        return int(value) if value is not None else 1
+    
     @property
     def is_leap_year(self) -> bool:
-        value = self.get("is_leap_year")
-        return bool(value) if value is not None else False
+        return calendar.isleap(self.target_year)
     
     @property
     def month_names(self) -> list:
@@ -189,11 +226,93 @@ class Config:
     
     @property
     def days_in_months(self) -> list:
-        value = self.get("days_in_months")
-        if value is not None:
-            return list(value)
-        return [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+        return [calendar.monthrange(self.target_year, month)[1] for month in range(1, 13)]
+    
+    @property
+    def conflicts_sheet_name(self) -> str:
+        value = self.get("conflicts_sheet_name")
+        return str(value) if value is not None else "Пересечения"
+    
+    @property
+    def skip_unchanged_block_reports(self) -> bool:
+        value = self.get("skip_unchanged_block_reports")
+        return bool(value) if value is not None else True
+    
+    @property
+    def report_workers(self) -> int:
+        value = self.get("report_workers")
+        return int(value) if value is not None else 0
+    
+    @property
+    def header_update_workers(self) -> int:
+        value = self.get("header_update_workers")
+        return int(value) if value is not None else 0
+    
+    @property
+    def migration_workers(self) -> int:
+        value = self.get("migration_workers")
+        return int(value) if value is not None else 0
     
+    @property
+    def recalculate_form_status(self) -> bool:
+        value = self.get("recalculate_form_status")
+        return bool(value) if value is not None else True
+    
+    @property
+    def cache_employee_formulas(self) -> bool:
+        value = self.get("cache_employee_formulas")
+        return bool(value) if value is not None else True
+
+    @property
+    def staff_snapshot_file(self) -> str:
+        value = self.get("staff_snapshot_file")
+        return str(value) if value is not None else "staff_snapshot.json"
+
+    @property
+    def event_dispatch_interval_ms(self) -> int:
+        value = self.get("event_dispatch_interval_ms")
+        return int(value) if value is not None else 50
+
+    @property
+    def event_queue_size(self) -> int:
+        value = self.get("event_queue_size")
+        return int(value) if value is not None else 10000
+
+    @property
+    def progress_publish_interval_ms(self) -> int:
+        value = self.get("progress_publish_interval_ms")
+        return int(value) if value is not None else 200
+
+    @property
+    def operation_log_max_entries(self) -> int:
+        value = self.get("operation_log_max_entries")
+        return int(value) if value is not None else 1000
+
+    @property
+    def operation_log_directory(self) -> str:
+        value = self.get("operation_log_directory")
+        return str(value) if value is not None else "logs"
+
+    @property
+    def info_log_max_lines(self) -> int:
+        value = self.get("info_log_max_lines")
+        return int(value) if value is not None else 2000
+
+    @property
+    def info_log_flush_interval_ms(self) -> int:
+        value = self.get("info_log_flush_interval_ms")
+        return int(value) if value is not None else 100
+
+    @property
+    def template_check_interval_ms(self) -> int:
+        value = self.get("template_check_interval_ms")
+        return int(value) if value is not None else 300000
+
+    @property
+    def log_profile(self) -> str:
+        value = self.get("log_profile")
+        return str(value) if value is not None else "normal"
+
     @property
     def report_structure(self) -> dict:
         value = self.get("report_structure")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль построения отчета по блоку в отдельном процессе
+"""
+
+import time
+import traceback
+from typing import Dict, Any, Optional
+
+from config import Config
+from core.cancellation import OperationCancelled, worker_token
+
+
+# ExcelHandler создается один раз на процесс и переиспользуется между задачами
+_excel_handler = None
+_excel_handler_config: Optional[Dict[str, Any]] = None
+
+
+def _get_excel_handler(config_data: Dict[str, Any]):
+    """Возвращает ExcelHandler процесса для переданной конфигурации"""
+    global _excel_handler, _excel_handler_config
+
+    if _excel_handler is None or _excel_handler_config != config_data:
+        # Импорт внутри функции: модуль загружается в дочерних процессах пула
+        from core.excel_handler import ExcelHandler
+
+        config = Config()
+        config.data = dict(config_data)
+        _excel_handler = ExcelHandler(config)
+        _excel_handler_config = config_data
+    return _excel_handler
+
+
+def build_block_report(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Читает файлы сотрудников подразделения и создает отчет по блоку
+
+    Функция выполняется в процессе пула, поэтому принимает и возвращает
+    только простые данные (словари, строки, числа).
+
+    Отмена операции (токен процесса пула) проверяется перед каждым файлом:
+    отмененная задача не создает отчет и возвращает cancelled = True.
+
+    Args:
+        task: {'dept_name', 'report_path', 'employee_files', 'input_digest', 'config_data'}
+
+    Returns:
+        Dict: {'dept_name', 'report_path', 'success', 'cancelled', 'files_processed',
+               'employees_count', 'file_errors', 'duration', 'error'}
+    """
+    start = time.perf_counter()
+    result = {
+        'dept_name': task['dept_name'],
+        'report_path': task['report_path'],
+        'success': False,
+        'cancelled': False,
+        'files_processed': 0,
+        'employees_count': 0,
+        # Непрочитанные файлы сотрудников: [путь, причина] (в отчет не входят)
+        'file_errors': [],
+        'duration': 0.0,
+        'error': None
+    }
+
+    try:
+        excel_handler = _get_excel_handler(task['config_data'])
+
+        # Файлы читаются все сразу: статусы форм рассчитываются одним проходом
+        vacation_infos = []
+        file_errors = []
+        for vacation_info in excel_handler.read_vacation_infos(task['employee_files'], worker_token(), file_errors):
+            if vacation_info and vacation_info.employee.get('ФИО работника'):
+                vacation_infos.append(vacation_info)
+            result['files_processed'] += 1
+
+        result['employees_count'] = len(vacation_infos)
+        result['file_errors'] = [list(error) for error in file_errors]
+        result['success'] = excel_handler.create_block_report(
+            task['dept_name'], vacation_infos, task['report_path'], input_digest=task['input_digest']
+        )
+    except OperationCancelled:
+        result['cancelled'] = True
+    except Exception as e:
+        result['error'] = f"{e}\n{traceback.format_exc()}"
+
+    result['duration'] = time.perf_counter() - start
+    return result
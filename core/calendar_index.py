@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль календарных таблиц для построения матрицы отпусков
+"""
+
+import calendar
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+
+class CalendarIndex:
+    """
+    Предрассчитанный календарь на один или несколько подряд идущих лет
+
+    Столбцы всех дней идут непрерывно, начиная с start_col (1 января первого года).
+    Високосность определяется автоматически, поэтому год не требует ручной
+    настройки количества дней в месяцах.
+    """
+
+    def __init__(self, first_year: int, years: int = 1, start_col: int = 1):
+        if years < 1:
+            raise ValueError(f"Количество лет календаря должно быть положительным: {years}")
+
+        self.first_year = first_year
+        self.last_year = first_year + years - 1
+        self.start_col = start_col
+
+        # Таблицы на каждый год: дни в месяцах, смещение начала месяца внутри года
+        # и смещение 1 января относительно начала календаря
+        self._days_in_months: Dict[int, List[int]] = {}
+        self._month_offsets: Dict[int, List[int]] = {}
+        self._year_offsets: Dict[int, int] = {}
+
+        year_offset = 0
+        for year in range(self.first_year, self.last_year + 1):
+            days_in_months = [calendar.monthrange(year, month)[1] for month in range(1, 13)]
+            month_offsets = [0]
+            for days in days_in_months:
+                month_offsets.append(month_offsets[-1] + days)
+
+            self._days_in_months[year] = days_in_months
+            self._month_offsets[year] = month_offsets
+            self._year_offsets[year] = year_offset
+            year_offset += month_offsets[-1]
+
+        self.total_days = year_offset
+        self.first_date = date(self.first_year, 1, 1)
+        self.last_date = date(self.last_year, 12, 31)
+
+    def contains(self, target_date: date) -> bool:
+        """Попадает ли дата в календарь"""
+        return self.first_year <= target_date.year <= self.last_year
+
+    def is_leap_year(self, year: int) -> bool:
+        """Признак високосного года"""
+        return calendar.isleap(year)
+
+    def days_in_months(self, year: int) -> List[int]:
+        """Количество дней в каждом месяце года"""
+        if year in self._days_in_months:
+            return list(self._days_in_months[year])
+        return [calendar.monthrange(year, month)[1] for month in range(1, 13)]
+
+    def day_of_year(self, target_date: date) -> int:
+        """Порядковый номер дня в году (1 января = 1)"""
+        month_offsets = self._month_offsets.get(target_date.year)
+        if month_offsets is None:
+            return target_date.timetuple().tm_yday
+        return month_offsets[target_date.month - 1] + target_date.day
+
+    def column(self, target_date: date) -> Optional[int]:
+        """Столбец даты в календаре или None, если дата вне календаря"""
+        year_offset = self._year_offsets.get(target_date.year)
+        if year_offset is None:
+            return None
+        return (self.start_col + year_offset
+                + self._month_offsets[target_date.year][target_date.month - 1]
+                + target_date.day - 1)
+
+    def clip(self, start_date: date, end_date: date) -> Optional[Tuple[date, date]]:
+        """Обрезает период по границам календаря (периоды через Новый год)"""
+        start = max(start_date, self.first_date)
+        end = min(end_date, self.last_date)
+        if start > end:
+            return None
+        return start, end
+
+    def column_range(self, start_date: date, end_date: date) -> Optional[Tuple[int, int]]:
+        """
+        Диапазон столбцов периода (включительно)
+
+        Периоды, выходящие за границы календаря, обрезаются; если период
+        целиком вне календаря - возвращается None.
+        """
+        clipped = self.clip(start_date, end_date)
+        if clipped is None:
+            return None
+        return self.column(clipped[0]), self.column(clipped[1])
+
+    def month_columns(self) -> List[Tuple[int, int, int]]:
+        """
+        Столбцы начала месяцев
+
+        Returns:
+            List[Tuple[int, int, int]]: (месяц 1-12, столбец 1 числа, дней в месяце)
+        """
+        result = []
+        for year in range(self.first_year, self.last_year + 1):
+            for month_idx, days in enumerate(self._days_in_months[year]):
+                column = self.start_col + self._year_offsets[year] + self._month_offsets[year][month_idx]
+                result.append((month_idx + 1, column, days))
+        return result
+
+
+@lru_cache(maxsize=32)
+def get_calendar_index(first_year: int, years: int = 1, start_col: int = 1) -> CalendarIndex:
+    """Возвращает общий (кэшированный) календарь для указанных лет"""
+    return CalendarIndex(first_year, years, start_col)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль кооперативной отмены длительных операций
+"""
+
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+class OperationCancelled(Exception):
+    """Операция остановлена пользователем"""
+
+    def __init__(self, message: str = "Операция остановлена пользователем"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """
+    Признак отмены операции, общий для потока интерфейса, рабочего потока
+    и процессов пула
+
+    Флаг хранится в multiprocessing.Event: процессы пула получают его при
+    запуске через init_worker и видят отмену без обмена сообщениями.
+    Операции проверяют флаг между файлами, поэтому отмена срабатывает
+    не позже чем через время обработки одного файла.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else multiprocessing.Event()
+
+    @property
+    def event(self):
+        """Событие для передачи в процессы пула (initargs)"""
+        return self._event
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            OperationCancelled: операция отменена
+        """
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+def is_cancelled(token: Optional[CancellationToken]) -> bool:
+    """Отменена ли операция (None - операция без токена отмены)"""
+    return token is not None and token.is_cancelled
+
+
+# Токен текущей задачи пула: задается init_worker в процессе пула или
+# worker_cancellation для задач, выполняемых в вызывающем потоке
+_worker_state = threading.local()
+
+
+def init_worker(event) -> None:
+    """Инициализатор процесса пула: токен отмены операции, запустившей пул"""
+    _worker_state.token = CancellationToken(event)
+
+
+def worker_token() -> Optional[CancellationToken]:
+    """Токен отмены для функций задач пула (None - операция не отменяемая)"""
+    return getattr(_worker_state, 'token', None)
+
+
+@contextmanager
+def worker_cancellation(token: Optional[CancellationToken]) -> Iterator[None]:
+    """Задает токен задач, выполняемых в текущем потоке без пула"""
+    previous = worker_token()
+    _worker_state.token = token
+    try:
+        yield
+    finally:
+        _worker_state.token = previous
@@ -6,82 +6,197 @@
 
 import logging
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Tuple
 from models import VacationInfo, VacationPeriod, VacationStatus
 
 
+class PeriodRow(NamedTuple):
+    """Строка листа Print: сотрудник и один его период отпуска"""
+    employee: Dict[str, str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    days: int
+
+
+# Построитель строки: (столбцы по возрастанию, функция (элемент, индекс) -> кортеж значений)
+RowEmitter = Tuple[Tuple[int, ...], Callable[[Any, int], Tuple[Any, ...]]]
+
+# Описание поля: (получение значения или None для всегда пустого поля,
+#                 нужно ли преобразовывать значение к типу Excel)
+FieldSpec = Tuple[Optional[Callable[[Any, int], Any]], bool]
+
+
+def _employee_field(key: str) -> Callable[[Any, int], Any]:
+    """Значение поля сотрудника VacationInfo по ключу rules"""
+    def getter(vacation_info: VacationInfo, index: int) -> Any:
+        return vacation_info.employee.get(key, '')
+    return getter
+
+
+def _period_employee_field(key: str) -> Callable[[Any, int], Any]:
+    """Значение поля сотрудника строки периода по ключу rules"""
+    def getter(row: PeriodRow, index: int) -> Any:
+        return row.employee.get(key, '')
+    return getter
+
+
+def _converted(getter: Callable[[Any, int], Any], converter: Callable[[Any], Any]) -> Callable[[Any, int], Any]:
+    """Получение значения с преобразованием к типу Excel"""
+    def converted_getter(item: Any, index: int) -> Any:
+        return converter(getter(item, index))
+    return converted_getter
+
+
+def _report_total_days(vacation_info: VacationInfo, index: int) -> int:
+    """Дни отпуска считаются только для корректно заполненных форм"""
+    if vacation_info.status != VacationStatus.FILLED_CORRECT:
+        return 0
+    return sum(p.days for p in vacation_info.periods)
+
+
+def _report_periods_count(vacation_info: VacationInfo, index: int) -> int:
+    """Периоды считаются только для корректно заполненных форм"""
+    if vacation_info.status != VacationStatus.FILLED_CORRECT:
+        return 0
+    return len(vacation_info.periods)
+
+
+def _row_number(item: Any, index: int) -> int:
+    """Номер строки таблицы (с 1)"""
+    return index + 1
+
+
+def _period_start_date(row: PeriodRow, index: int) -> str:
+    """Начало периода DD.MM.YYYY"""
+    return row.start_date.strftime('%d.%m.%Y') if row.start_date else ''
+
+
+def _period_end_date(row: PeriodRow, index: int) -> str:
+    """Окончание периода DD.MM.YYYY"""
+    return row.end_date.strftime('%d.%m.%Y') if row.end_date else ''
+
+
+def _period_duration(row: PeriodRow, index: int) -> Any:
+    """Длительность периода в днях (пусто для строки без периодов)"""
+    return row.days if row.days else ''
+
+
+# Поля таблицы Report (без префикса): текстовые поля сотрудника проходят
+# через преобразование типа (например, табельный номер -> число)
+REPORT_FIELDS: Dict[str, FieldSpec] = {
+    'employee_name': (_employee_field('ФИО работника'), True),
+    'tab_number': (_employee_field('Табельный номер'), True),
+    'position': (_employee_field('Должность'), True),
+    'department1': (_employee_field('Подразделение 1'), True),
+    'department2': (_employee_field('Подразделение 2'), True),
+    'department3': (_employee_field('Подразделение 3'), True),
+    'department4': (_employee_field('Подразделение 4'), True),
+    'status': (lambda vacation_info, index: vacation_info.get_status_text(), False),
+    'total_days': (_report_total_days, False),
+    'periods_count': (_report_periods_count, False),
+    'row_number': (_row_number, False),
+}
+
+# Поля таблицы Print (без префикса)
+PRINT_FIELDS: Dict[str, FieldSpec] = {
+    'employee_name': (_period_employee_field('ФИО работника'), True),
+    'tab_number': (_period_employee_field('Табельный номер'), True),
+    'position': (_period_employee_field('Должность'), True),
+    'start_date': (_period_start_date, False),
+    'end_date': (_period_end_date, False),
+    'duration': (_period_duration, False),
+    'signature': (None, False),
+    'acknowledgment_date': (None, False),
+    'notes': (None, False),
+    'row_number': (_row_number, False),
+}
+
+
 class DataMapper:
     """Класс для динамического маппинга данных между различными форматами"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Скомпилированные построители строк по шаблонам столбцов
+        self._emitters: Dict[tuple, RowEmitter] = {}
     
-    def map_vacation_info_to_rules(self, vacation_info: VacationInfo, index: int, prefix: str = '') -> Dict[str, Any]:
+    def compile_report_emitter(self, column_mapping: Dict[str, Tuple[int, int]], prefix: str,
+                               converter: Callable[[Any], Any]) -> RowEmitter:
         """
-        Маппит данные сотрудника для Report листа
+        Компилирует построитель строк Report (данные сотрудника) под столбцы шаблона
         
         Args:
-            vacation_info: Информация об отпуске сотрудника
-            index: Индекс строки
-            prefix: Префикс для полей
+            column_mapping: {имя поля: (номер столбца, строка заголовка)} из header-правил
+            prefix: Префикс полей таблицы
+            converter: Преобразование текстовых значений к типу Excel
             
         Returns:
-            Словарь с данными для заполнения
+            (столбцы, построитель): построитель принимает (VacationInfo, индекс строки)
+            и возвращает кортеж значений в порядке столбцов
         """
-        employee = vacation_info.employee
-        
-        # ОБНОВЛЕННАЯ ЛОГИКА: Сохраняем разные статусы, но дни/периоды считаем только для "корректно"
-        if vacation_info.status == VacationStatus.FILLED_CORRECT:
-            total_days = sum(p.days for p in vacation_info.periods) if vacation_info.periods else 0
-            periods_count = len(vacation_info.periods) if vacation_info.periods else 0
-        else:
-            # Для всех остальных статусов (некорректно, не заполнена) устанавливаем 0
-            total_days = 0
-            periods_count = 0
-        
-        return {
-            f'{prefix}employee_name': employee.get('ФИО работника', ''),
-            f'{prefix}tab_number': employee.get('Табельный номер', ''),
-            f'{prefix}position': employee.get('Должность', ''),
-            f'{prefix}department1': employee.get('Подразделение 1', ''),
-            f'{prefix}department2': employee.get('Подразделение 2', ''),
-            f'{prefix}department3': employee.get('Подразделение 3', ''),
-            f'{prefix}department4': employee.get('Подразделение 4', ''),
-            f'{prefix}status': vacation_info.get_status_text(),
-            f'{prefix}total_days': total_days,
-            f'{prefix}periods_count': periods_count,
-            f'{prefix}row_number': index + 1
-        }
+        return self._compile_emitter(REPORT_FIELDS, column_mapping, prefix, converter)
     
-    def map_period_data_to_rules(self, period_data: Dict[str, Any], index: int, prefix: str = '') -> Dict[str, Any]:
+    def compile_print_emitter(self, column_mapping: Dict[str, Tuple[int, int]], prefix: str,
+                              converter: Callable[[Any], Any]) -> RowEmitter:
         """
-        Маппит данные периода для Print листа
+        Компилирует построитель строк Print (один период отпуска) под столбцы шаблона
         
         Args:
-            period_data: Данные периода отпуска
-            index: Индекс строки
-            prefix: Префикс для полей
+            column_mapping: {имя поля: (номер столбца, строка заголовка)} из header-правил
+            prefix: Префикс полей таблицы
+            converter: Преобразование текстовых значений к типу Excel
             
         Returns:
-            Словарь с данными для заполнения
+            (столбцы, построитель): построитель принимает (PeriodRow, индекс строки)
+            и возвращает кортеж значений в порядке столбцов
+        """
+        return self._compile_emitter(PRINT_FIELDS, column_mapping, prefix, converter)
+    
+    def iter_period_rows(self, vacation_info: VacationInfo) -> Iterator[PeriodRow]:
+        """Периоды сотрудника для Print - каждый период отдельная строка (без периодов - одна пустая)"""
+        employee = vacation_info.employee
+        if not vacation_info.periods:
+            yield PeriodRow(employee, None, None, 0)
+            return
+        for period in vacation_info.periods:
+            yield PeriodRow(employee, period.start_date, period.end_date, period.days)
+    
+    def _compile_emitter(self, fields: Dict[str, FieldSpec], column_mapping: Dict[str, Tuple[int, int]],
+                         prefix: str, converter: Callable[[Any], Any]) -> RowEmitter:
         """
-        employee = period_data.get('employee', {})
-        start_date = period_data.get('start_date')
-        end_date = period_data.get('end_date')
-        days = period_data.get('days', 0)
+        Собирает построитель строки один раз на шаблон
         
-        return {
-            f'{prefix}employee_name': employee.get('ФИО работника', ''),
-            f'{prefix}tab_number': employee.get('Табельный номер', ''),
-            f'{prefix}position': employee.get('Должность', ''),
-            f'{prefix}start_date': self._format_date(start_date) if start_date else '',
-            f'{prefix}end_date': self._format_date(end_date) if end_date else '',
-            f'{prefix}duration': str(days) if days else '',
-            f'{prefix}signature': '',
-            f'{prefix}acknowledgment_date': '',
-            f'{prefix}notes': '',
-            f'{prefix}row_number': index + 1
-        }
+        Поля упорядочиваются по столбцам, пустые по определению поля отбрасываются,
+        а преобразователь типа привязывается только к текстовым полям сотрудника.
+        Построитель обходит готовый список функций и строит кортеж без
+        промежуточного словаря и без форматирования имен полей.
+        """
+        cache_key = (id(fields), prefix, converter, tuple(sorted(
+            (field_name, col) for field_name, (col, _) in column_mapping.items()
+        )))
+        emitter = self._emitters.get(cache_key)
+        if emitter is not None:
+            return emitter
+        
+        bound = []
+        for field_name, (col, _) in column_mapping.items():
+            spec = fields.get(field_name[len(prefix):]) if field_name.startswith(prefix) else None
+            if spec is None:
+                continue
+            getter, convert = spec
+            if getter is None:
+                # Поле шаблона всегда пустое (подпись, дата ознакомления и т.п.)
+                continue
+            if convert:
+                getter = _converted(getter, converter)
+            bound.append((col, getter))
+        bound.sort(key=lambda item: item[0])
+        
+        getters = tuple(getter for _, getter in bound)
+        emitter = (tuple(col for col, _ in bound), lambda item, index: tuple(get(item, index) for get in getters))
+        self._emitters[cache_key] = emitter
+        self.logger.debug(f"Скомпилирован построитель строк {prefix}: {len(bound)} столбцов")
+        return emitter
     
     def map_block_data_to_rules(self, block_data: Dict[str, Any], index: int, prefix: str = '') -> Dict[str, Any]:
         """
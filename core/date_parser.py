@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль разбора дат из ячеек файлов сотрудников
+"""
+
+from datetime import datetime, date
+from functools import lru_cache
+from typing import Optional, Any
+
+
+# Поддерживаемые форматы строковых дат (в порядке проверки)
+DATE_FORMATS = [
+    '%d.%m.%Y',
+    '%d/%m/%Y',
+    '%Y-%m-%d',
+    '%d.%m.%y',
+    '%d/%m/%y',
+    # str(datetime): так значения дат из файла штата записываются в формы сотрудников
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f'
+]
+
+# Размер кэша разобранных строк: в организации повторяются несколько сотен дат
+DATE_CACHE_SIZE = 4096
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """
+    Парсит дату из значения ячейки
+
+    date/datetime возвращаются как date без разбора, строки разбираются
+    быстрым парсером с кэшем, остальные типы дают None.
+    """
+    if value is None:
+        return None
+
+    # datetime - подкласс date, поэтому проверяется первым
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    if isinstance(value, str):
+        return _parse_date_string(value)
+
+    return None
+
+
+def cache_info():
+    """Статистика кэша разобранных строк"""
+    return _parse_date_string.cache_info()
+
+
+def clear_cache() -> None:
+    """Очищает кэш разобранных строк"""
+    _parse_date_string.cache_clear()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_string(value: str) -> Optional[date]:
+    """Разбирает строку с датой: сначала быстрый разбор, затем strptime"""
+    value = value.strip()
+    if not value:
+        return None
+
+    parsed = _parse_fast(value)
+    if parsed is not None:
+        return parsed
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def _parse_fast(value: str) -> Optional[date]:
+    """
+    Ручной разбор форм дд.мм.гггг, дд/мм/гг, гггг-мм-дд
+
+    Возвращает None, если строка не похожа на эти формы, чтобы разбор
+    продолжился через strptime с теми же правилами, что и раньше.
+    """
+    if '.' in value:
+        separator = '.'
+    elif '/' in value:
+        separator = '/'
+    elif '-' in value:
+        separator = '-'
+    else:
+        return None
+
+    parts = value.split(separator)
+    if len(parts) != 3:
+        return None
+
+    first, second, third = parts
+    # isdigit принимает и другие цифры Юникода ('²'), которые int не разбирает
+    if not all(part.isascii() and part.isdigit() for part in parts):
+        return None
+
+    if separator == '-':
+        # Только ISO-форма гггг-мм-дд
+        if len(first) != 4 or not 1 <= len(second) <= 2 or not 1 <= len(third) <= 2:
+            return None
+        year, month, day = int(first), int(second), int(third)
+    else:
+        if not 1 <= len(first) <= 2 or not 1 <= len(second) <= 2:
+            return None
+        day, month = int(first), int(second)
+        if len(third) == 4:
+            year = int(third)
+        elif len(third) == 2:
+            # Правило strptime для %y: 69-99 -> 1969-1999, 00-68 -> 2000-2068
+            short_year = int(third)
+            year = 1900 + short_year if short_year >= 69 else 2000 + short_year
+        else:
+            return None
+
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
@@ -7,10 +7,11 @@
 import logging
 import re
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from config import Config
 from core.events import event_bus, EventType
+from core.directory_snapshot import directory_scanner, DirectorySnapshot, DepartmentSnapshot
 
 
 class DirectoryManager:
@@ -50,7 +51,7 @@ class DirectoryManager:
                 # Создаем папку только если ее нет
                 if not dept_path.exists():
                     dept_path.mkdir(parents=True, exist_ok=True)
-                    self.logger.info(f"Создана папка отдела: {clean_dept_name}")
+                    self.logger.debug("Создана папка отдела: %s", clean_dept_name)
                     
                     # Отправляем событие о создании папки
                     event_bus.emit_simple(
@@ -59,7 +60,7 @@ class DirectoryManager:
                         "DirectoryManager"
                     )
                 else:
-                    self.logger.info(f"Используется существующая папка: {clean_dept_name}")
+                    self.logger.debug("Используется существующая папка: %s", clean_dept_name)
                 
                 departments[dept] = str(dept_path)
             
@@ -70,30 +71,23 @@ class DirectoryManager:
             self.logger.error(f"Ошибка создания структуры папок: {e}")
             raise
     
-    def scan_existing_departments(self, target_directory: str) -> Dict[str, str]:
+    def scan_existing_departments(self, target_directory: str, reuse: bool = False) -> Dict[str, str]:
         """
         Сканирует существующие папки подразделений
         
         Args:
             target_directory: путь к целевой папке
+            reuse: повторно использовать неизменившиеся папки из предыдущего снимка
             
         Returns:
             Dict[str, str]: словарь {название_подразделения: путь_к_папке}
         """
         try:
-            target_path = Path(target_directory)
-            if not target_path.exists():
-                self.logger.warning(f"Целевая папка не существует: {target_directory}")
+            snapshot = self.snapshot(target_directory, reuse=reuse)
+            if snapshot is None:
                 return {}
             
-            departments = {}
-            
-            # Сканируем все папки в целевой директории
-            for item in target_path.iterdir():
-                if item.is_dir():
-                    # Исключаем системные папки
-                    if not item.name.startswith('.') and not item.name.startswith('__'):
-                        departments[item.name] = str(item)
+            departments = {name: dept.path for name, dept in snapshot.departments.items()}
             
             self.logger.info(f"Найдено подразделений: {len(departments)}")
             return departments
@@ -102,6 +96,38 @@ class DirectoryManager:
             self.logger.error(f"Ошибка сканирования папки {target_directory}: {e}")
             return {}
     
+    def list_departments(self, target_directory: str) -> Dict[str, str]:
+        """
+        Папки подразделений одним чтением целевой папки (файлы не читаются)
+        
+        Returns:
+            Dict[str, str]: {название_подразделения: путь_к_папке}, пустой - папки нет
+        """
+        if not Path(target_directory).is_dir():
+            self.logger.warning(f"Целевая папка не существует: {target_directory}")
+            return {}
+        return directory_scanner.list_departments(target_directory)
+    
+    def count_employee_files(self, dept_path: str) -> int:
+        """Количество файлов сотрудников в папке подразделения (из снимка сканера)"""
+        return len(directory_scanner.scan_department(dept_path, reuse=True).employee_files)
+    
+    def snapshot(self, target_directory: str, reuse: bool = False) -> Optional[DirectorySnapshot]:
+        """
+        Снимок целевой папки (подразделения, файлы и их типы) одним проходом
+        
+        Args:
+            target_directory: путь к целевой папке
+            reuse: повторно использовать папки с неизменным временем модификации
+            
+        Returns:
+            DirectorySnapshot: снимок или None, если папка не существует
+        """
+        if not Path(target_directory).is_dir():
+            self.logger.warning(f"Целевая папка не существует: {target_directory}")
+            return None
+        return directory_scanner.scan(target_directory, reuse=reuse)
+    
     def _clean_directory_name(self, name: str) -> str:
         """
         Очищает имя папки от недопустимых символов
@@ -126,34 +152,37 @@ class DirectoryManager:
         
         return clean_name or "unnamed"
     
-    def _scan_department_files(self, dept_path: Path) -> List[str]:
+    def _scan_department_files(self, dept_path: Path, reuse: bool = False) -> List[str]:
         """
-        Сканирует файлы в папке подразделения
+        Сканирует файлы сотрудников в папке подразделения
         
         Args:
             dept_path: путь к папке подразделения
+            reuse: повторно использовать снимок, если папка не изменилась
             
         Returns:
             List[str]: список путей к файлам
         """
-        files = []
         try:
-            for file_path in dept_path.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() == '.xlsx':
-                    # Исключаем временные файлы Excel и отчеты
-                    filename = file_path.name
-                    if (not filename.startswith('~$') and  # Временные файлы Excel
-                        not filename.startswith('!') and   # Системные файлы
-                        not filename.startswith('Отчет') and  # Отчеты по блоку
-                        not filename.startswith('отчет') and  # Отчеты по блоку (с маленькой буквы)
-                        not 'отчет' in filename.lower() and  # Любые отчеты
-                        not filename.startswith('ОБЩИЙ_ОТЧЕТ') and  # Общие отчеты
-                        not filename.startswith('общий_отчет')):  # Общие отчеты (с маленькой буквы)
-                        files.append(str(file_path))
+            dept_snapshot = self.scan_department(dept_path, reuse=reuse)
+            # Временные файлы Excel, отчеты и системные файлы отсеяны классификацией снимка
+            return [entry.path for entry in dept_snapshot.employee_files]
         except Exception as e:
             self.logger.error(f"Ошибка сканирования папки {dept_path}: {e}")
+            return []
+    
+    def scan_department(self, dept_path: Path, reuse: bool = False) -> DepartmentSnapshot:
+        """
+        Снимок папки подразделения с типами файлов
         
-        return files
+        Args:
+            dept_path: путь к папке подразделения
+            reuse: повторно использовать снимок, если папка не изменилась
+            
+        Returns:
+            DepartmentSnapshot: файлы сотрудников, отчеты и временные файлы
+        """
+        return directory_scanner.scan_department(str(dept_path), reuse=reuse)
     
     def ensure_directory_exists(self, directory_path: Path) -> None:
         """
@@ -165,7 +194,7 @@ class DirectoryManager:
         try:
             if not directory_path.exists():
                 directory_path.mkdir(parents=True, exist_ok=True)
-                self.logger.debug(f"Создана папка: {directory_path}")
+                self.logger.debug("Создана папка: %s", directory_path)
                 
                 # Отправляем событие о создании папки
                 event_bus.emit_simple(
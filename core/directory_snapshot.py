@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль снимка дерева папок подразделений
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional
+
+
+class FileKind(Enum):
+    """Тип файла в папке подразделения"""
+    EMPLOYEE = "employee"
+    BLOCK_REPORT = "block_report"
+    GENERAL_REPORT = "general_report"
+    TEMP = "temp"
+    OTHER = "other"
+
+
+def classify_file_name(filename: str) -> FileKind:
+    """
+    Определяет тип файла по имени
+
+    Правила совпадают с прежними фильтрами: временные файлы Excel (~$),
+    общие отчеты (ОБЩИЙ_ОТЧЕТ*), любые файлы со словом "отчет" - отчеты
+    по блоку, системные файлы (!*) и не-xlsx - прочие.
+    """
+    if not filename.lower().endswith('.xlsx'):
+        return FileKind.OTHER
+    if filename.startswith('~$'):
+        return FileKind.TEMP
+    if filename.startswith('!'):
+        return FileKind.OTHER
+
+    filename_lower = filename.lower()
+    if filename_lower.startswith('общий_отчет'):
+        return FileKind.GENERAL_REPORT
+    if 'отчет' in filename_lower:
+        return FileKind.BLOCK_REPORT
+    return FileKind.EMPLOYEE
+
+
+@dataclass
+class FileEntry:
+    """Файл из снимка со статистикой, полученной при сканировании"""
+    name: str
+    path: str
+    size: int
+    mtime: float
+    kind: FileKind
+
+
+@dataclass
+class DepartmentSnapshot:
+    """Содержимое папки подразделения"""
+    name: str
+    path: str
+    mtime_ns: int
+    files: List[FileEntry] = field(default_factory=list)
+
+    def files_of_kind(self, kind: FileKind) -> List[FileEntry]:
+        """Файлы указанного типа"""
+        return [entry for entry in self.files if entry.kind == kind]
+
+    @property
+    def employee_files(self) -> List[FileEntry]:
+        """Файлы сотрудников"""
+        return self.files_of_kind(FileKind.EMPLOYEE)
+
+    @property
+    def block_reports(self) -> List[FileEntry]:
+        """Отчеты по блоку"""
+        return self.files_of_kind(FileKind.BLOCK_REPORT)
+
+    @property
+    def latest_block_report(self) -> Optional[FileEntry]:
+        """Самый новый отчет по блоку"""
+        reports = self.block_reports
+        if not reports:
+            return None
+        return max(reports, key=lambda entry: entry.mtime)
+
+
+@dataclass
+class DirectorySnapshot:
+    """Снимок целевой папки: подразделения и их файлы"""
+    root: str
+    mtime_ns: int
+    departments: Dict[str, DepartmentSnapshot] = field(default_factory=dict)
+
+    @property
+    def total_employee_files(self) -> int:
+        """Общее количество файлов сотрудников"""
+        return sum(len(dept.employee_files) for dept in self.departments.values())
+
+
+class DirectoryScanner:
+    """
+    Сканер дерева подразделений на основе os.scandir
+
+    Каждая папка читается одним вызовом scandir; тип и размер файлов берутся
+    из DirEntry (на Windows - без дополнительных обращений к диску/сети).
+    При reuse=True папка, у которой не изменилось время модификации,
+    не перечитывается: добавление, удаление и переименование файлов меняют
+    mtime папки, а изменение содержимого файла - нет, поэтому повторное
+    использование подходит для списков файлов, но не для их размеров.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._departments: Dict[str, DepartmentSnapshot] = {}
+        self._roots: Dict[str, DirectorySnapshot] = {}
+
+    def scan(self, root: str, reuse: bool = False) -> DirectorySnapshot:
+        """
+        Снимок целевой папки со всеми подразделениями
+
+        Args:
+            root: целевая папка
+            reuse: повторно использовать папки с неизменным mtime
+
+        Returns:
+            DirectorySnapshot: снимок дерева
+        """
+        root = os.path.abspath(root)
+        root_mtime_ns = os.stat(root).st_mtime_ns
+
+        with self._lock:
+            cached_root = self._roots.get(root)
+        if reuse and cached_root is not None and cached_root.mtime_ns == root_mtime_ns:
+            departments = {
+                name: self.scan_department(dept.path, reuse=True)
+                for name, dept in cached_root.departments.items()
+            }
+            snapshot = DirectorySnapshot(root, root_mtime_ns, departments)
+        else:
+            snapshot = DirectorySnapshot(root, root_mtime_ns)
+            for name, dept_path in self.list_departments(root).items():
+                snapshot.departments[name] = self.scan_department(dept_path, reuse=reuse)
+
+        with self._lock:
+            self._roots[root] = snapshot
+
+        self.logger.debug(
+            f"Снимок {root}: {len(snapshot.departments)} подразделений, "
+            f"{snapshot.total_employee_files} файлов сотрудников"
+        )
+        return snapshot
+
+    def list_departments(self, root: str) -> Dict[str, str]:
+        """
+        Папки подразделений целевой папки без чтения их содержимого
+
+        Returns:
+            Dict[str, str]: {название_подразделения: путь_к_папке}
+        """
+        departments = {}
+        with os.scandir(os.path.abspath(root)) as entries:
+            for entry in entries:
+                # Исключаем системные папки
+                if entry.name.startswith('.') or entry.name.startswith('__'):
+                    continue
+                if entry.is_dir():
+                    departments[entry.name] = entry.path
+        return departments
+
+    def scan_department(self, dept_path: str, reuse: bool = False) -> DepartmentSnapshot:
+        """
+        Снимок одной папки подразделения
+
+        Args:
+            dept_path: путь к папке подразделения
+            reuse: повторно использовать снимок, если mtime папки не изменился
+
+        Returns:
+            DepartmentSnapshot: файлы папки с типами и статистикой
+        """
+        dept_path = os.path.abspath(dept_path)
+        mtime_ns = os.stat(dept_path).st_mtime_ns
+
+        if reuse:
+            with self._lock:
+                cached = self._departments.get(dept_path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+
+        snapshot = DepartmentSnapshot(os.path.basename(dept_path), dept_path, mtime_ns)
+        with os.scandir(dept_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                kind = classify_file_name(entry.name)
+                if kind == FileKind.OTHER:
+                    continue
+                stat = entry.stat()
+                snapshot.files.append(FileEntry(entry.name, entry.path, stat.st_size, stat.st_mtime, kind))
+
+        snapshot.files.sort(key=lambda entry: entry.name)
+
+        with self._lock:
+            self._departments[dept_path] = snapshot
+        return snapshot
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Сбрасывает кэш снимков (целиком или для одной папки)"""
+        with self._lock:
+            if path is None:
+                self._departments.clear()
+                self._roots.clear()
+                return
+            path = os.path.abspath(path)
+            self._departments.pop(path, None)
+            self._roots.pop(path, None)
+
+
+# Глобальный сканер, общий для всех операций приложения
+directory_scanner = DirectoryScanner()
@@ -5,18 +5,22 @@
 """
 
 import logging
-import time
+import os
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Callable, Optional, Tuple
 
-from models import ProcessingProgress, OperationLog, ProcessingStatus
+from models import ProcessingProgress, ProgressSnapshot, OperationLog, ProcessingStatus
 from config import Config
+from core.cancellation import CancellationToken, OperationCancelled
 from core.events import event_bus, EventType
 from core.validator import Validator
 from core.excel_handler import ExcelHandler
 from core.directory_manager import DirectoryManager
 from core.transaction_manager import TransactionManager
+from core.staff_diff import StaffDiffer, EmployeeMove
+from core.header_patcher import update_employee_headers
+from core.progress_aggregator import ProgressAggregator
 
 
 class EmployeeFileCreator:
@@ -29,6 +33,7 @@ class EmployeeFileCreator:
         self.excel_handler = ExcelHandler(config)
         self.directory_manager = DirectoryManager(config)
         self.transaction_manager = TransactionManager()
+        self.staff_differ = StaffDiffer(config, self.directory_manager, self.excel_handler)
     
     def create_employee_files(
         self, 
@@ -37,22 +42,29 @@ class EmployeeFileCreator:
         progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
         department_progress_callback: Optional[Callable[[int, int, str], None]] = None,
         file_progress_callback: Optional[Callable[[int, int, str], None]] = None,
-        employees_to_create: Optional[list] = None
+        employees_to_create: Optional[list] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> OperationLog:
         """
         Создает файлы сотрудников в существующей папке
+        
+        Отмена (cancel_token) проверяется перед каждым файлом; отмененная
+        операция откатывает транзакцию: созданные файлы удаляются,
+        перенесенные возвращаются на место.
+        
+        Прогресс собирается ProgressAggregator; все три callback получают
+        данные его снимков с интервалом progress_publish_interval_ms.
         """
-        operation_log = OperationLog("Создание файлов сотрудников")
+        operation_log = OperationLog.open("Создание файлов сотрудников", self.config)
         operation_log.add_entry("INFO", "Начало создания файлов сотрудников")
+        progress = ProgressAggregator(self.config, "Начало обработки")
+        progress.subscribe(self._progress_publisher(
+            progress_callback, department_progress_callback, file_progress_callback
+        ))
         
         try:
             start_time = datetime.now()
-            progress = ProcessingProgress(
-                current_operation="Начало обработки",
-                start_time=start_time
-            )
-            
-            self._emit_progress_update(progress, progress_callback)
+            progress.start()
             
             # Начинаем транзакцию
             backup_dir = str(Path(target_directory).parent / f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
@@ -64,9 +76,7 @@ class EmployeeFileCreator:
             operation_log.add_entry("INFO", f"Транзакция начата с резервным копированием в {backup_dir}")
             
             # 1. Валидация файла штатного расписания
-            progress.current_operation = "Валидация файла штатного расписания"
-            progress.current_file = Path(staff_file_path).name
-            self._emit_progress_update(progress, progress_callback)
+            progress.set_operation("Валидация файла штатного расписания", Path(staff_file_path).name)
             
             validation_result, employees = self.validator.validate_staff_file(staff_file_path)
             self.logger.info(f"Валидация завершена, найдено {len(employees)} сотрудников")
@@ -78,70 +88,59 @@ class EmployeeFileCreator:
             
             operation_log.add_entry("INFO", f"Валидация пройдена. Найдено сотрудников: {len(employees)}")
             
-            # 2. Используем только сотрудников для создания, если передан список
-            if employees_to_create is not None:
-                employees = employees_to_create
+            # 2. Сравнение с предыдущим состоянием: создаются файлы только новых сотрудников,
+            #    файлы переведенных и сменивших ФИО переносятся с правкой шапки
+            staff_employees = employees
+            staff_diff = self.staff_differ.diff(staff_employees, target_directory)
+            for line in staff_diff.summary_lines():
+                operation_log.add_entry("INFO", line)
+            relocations = staff_diff.relocations
+            relocated = {id(move.employee) for move in relocations}
+            # Изменения, не переносимые вместе с файлом, ждут обновления шапки
+            pending_changes = [change.employee for change in staff_diff.changed if id(change.employee) not in relocated]
+            if pending_changes:
+                operation_log.add_entry(
+                    "INFO", f"Данные изменены у {len(pending_changes)} сотрудников - используйте 'Обновить шапки'"
+                )
+            employees = staff_diff.employees_to_create if employees_to_create is None else employees_to_create
             
             # 3. Создание структуры папок через DirectoryManager
-            progress.current_operation = "Подготовка структуры папок"
-            self._emit_progress_update(progress, progress_callback)
+            progress.set_operation("Подготовка структуры папок")
             
             departments = self.directory_manager.create_department_structure(
-                target_directory, employees
+                target_directory, employees + [move.employee for move in relocations]
             )
             
             # 4. Подготовка прогресса
             employees_by_dept = self._group_employees_by_department(employees)
-            total_departments = len(employees_by_dept)
-            total_employees = len(employees)
-            
-            progress.total_blocks = total_departments
-            progress.total_files = total_employees
-            progress.processed_blocks = 0
-            progress.processed_files = 0
+            for dept_name, dept_employees in employees_by_dept.items():
+                progress.add_department(dept_name, len(dept_employees))
             
-            self.logger.debug(f"Подготовлено {total_departments} отделов, {total_employees} сотрудников")
-            self._emit_progress_update(progress, progress_callback)
+            self.logger.debug(f"Подготовлено {len(employees_by_dept)} отделов, {len(employees)} сотрудников")
             
             # 5. Начинаем отслеживание производительности
             self.excel_handler.performance_tracker.start_batch()
             
-            # 6. Создание файлов по отделам
+            # 6. Перенос файлов переведенных сотрудников (введенные периоды сохраняются)
+            if relocations:
+                progress.set_operation(f"Перенос файлов сотрудников: {len(relocations)}")
+                self._relocate_employee_files(relocations, departments, operation_log, cancel_token)
+            
+            # 7. Создание файлов по отделам
             self.logger.debug("Начинаем создание файлов")
-            total_success_count = 0
-            total_error_count = 0
-            
-            for dept_idx, (dept_name, dept_employees) in enumerate(employees_by_dept.items()):
-                # Проверка на остановку через события
-                if self._should_stop():
-                    operation_log.add_entry("INFO", "Операция остановлена пользователем")
-                    operation_log.finish(ProcessingStatus.CANCELLED)
-                    return operation_log
-                
-                progress.current_operation = f"Обработка отдела: {dept_name}"
-                progress.current_block = dept_name
-                progress.processed_blocks = dept_idx
-                
-                if department_progress_callback:
-                    department_progress_callback(dept_idx, total_departments, dept_name)
-                
-                self._emit_progress_update(progress, progress_callback)
+            
+            for dept_name, dept_employees in employees_by_dept.items():
+                progress.set_operation(f"Обработка отдела: {dept_name}")
                 
                 dept_path = departments.get(dept_name)
                 if not dept_path:
                     operation_log.add_entry("ERROR", f"Папка для отдела {dept_name} не найдена")
                     continue
                 
-                # Счетчики для текущего отдела
-                dept_success_count = 0
-                dept_error_count = 0
-                
                 # Обрабатываем сотрудников в текущем отделе
-                for emp_idx, employee in enumerate(dept_employees):
-                    if self._should_stop():
-                        operation_log.add_entry("INFO", "Операция остановлена пользователем")
-                        operation_log.finish(ProcessingStatus.CANCELLED)
-                        return operation_log
+                for employee in dept_employees:
+                    if cancel_token is not None:
+                        cancel_token.raise_if_cancelled()
                     
                     try:
                         # Генерируем имя файла
@@ -153,9 +152,8 @@ class EmployeeFileCreator:
                         
                         # Проверяем, существует ли файл уже
                         if output_path.exists():
-                            self.logger.info(f"Файл уже существует, пропускаем: {filename}")
-                            dept_success_count += 1
-                            total_success_count += 1
+                            self.logger.debug("Файл уже существует, пропускаем: %s", filename)
+                            operation_log.count('skipped', dept_name)
                             message = f"Пропущен (существует): {employee['ФИО работника']}"
                             
                             # Отправляем событие о пропуске файла
@@ -164,14 +162,8 @@ class EmployeeFileCreator:
                                 {"file_path": str(output_path), "employee": employee, "skipped": True},
                                 "EmployeeFileCreator"
                             )
-                            success = True
-                        else:
-                            # Создаем файл сотрудника
-                            success = self.excel_handler.create_employee_file(employee, str(output_path))
-                        
-                        if success:
-                            dept_success_count += 1
-                            total_success_count += 1
+                        elif self.excel_handler.create_employee_file(employee, str(output_path)):
+                            operation_log.count('created', dept_name)
                             message = f"Создан: {employee['ФИО работника']}"
                             
                             # Отправляем событие о создании файла
@@ -181,8 +173,7 @@ class EmployeeFileCreator:
                                 "EmployeeFileCreator"
                             )
                         else:
-                            dept_error_count += 1
-                            total_error_count += 1
+                            operation_log.count('errors', dept_name)
                             message = f"Ошибка создания: {employee['ФИО работника']}"
                             
                             # Отправляем событие об ошибке
@@ -192,20 +183,10 @@ class EmployeeFileCreator:
                                 "EmployeeFileCreator"
                             )
                         
-                        progress.processed_files += 1
-                        
-                        # Обновляем прогресс по файлам в отделе
-                        if file_progress_callback:
-                            file_progress_callback(emp_idx + 1, len(dept_employees), message)
-                        
-                        self._emit_progress_update(progress, progress_callback)
-                        
-                        # Минимальная задержка для обновления UI
-                        time.sleep(0.001)
+                        progress.advance(dept_name, current_file=message)
                         
                     except Exception as e:
-                        dept_error_count += 1
-                        total_error_count += 1
+                        operation_log.count('errors', dept_name)
                         self.logger.error(f"Ошибка создания файла для {employee['ФИО работника']}: {e}")
                         
                         # Отправляем событие об ошибке
@@ -215,40 +196,44 @@ class EmployeeFileCreator:
                             "EmployeeFileCreator"
                         )
                         
-                        progress.processed_files += 1
-                        if file_progress_callback:
-                            file_progress_callback(emp_idx + 1, len(dept_employees), f"Ошибка: {employee['ФИО работника']}")
-                        self._emit_progress_update(progress, progress_callback)
+                        progress.advance(dept_name, current_file=f"Ошибка: {employee['ФИО работника']}")
                 
                 # Логируем результаты по отделу
-                if dept_success_count > 0 or dept_error_count > 0:
-                    operation_log.add_entry("INFO", f"Отдел {dept_name}: создано {dept_success_count}")
+                dept_counts = operation_log.department_counters.get(dept_name, {})
+                if dept_counts:
+                    operation_log.add_entry(
+                        "INFO",
+                        f"Отдел {dept_name}: создано {dept_counts.get('created', 0)}, "
+                        f"пропущено {dept_counts.get('skipped', 0)}, ошибок {dept_counts.get('errors', 0)}"
+                    )
                 
                 # Завершаем обработку отдела
-                progress.processed_blocks = dept_idx + 1
-                
-                if department_progress_callback:
-                    department_progress_callback(dept_idx + 1, total_departments, dept_name)
+                progress.finish_department(dept_name)
             
-            # 7. Завершение
+            # 8. Завершение
             end_time = datetime.now()
             duration = end_time - start_time
             
-            progress.current_operation = "Файлы созданы"
-            progress.end_time = end_time
-            self._emit_progress_update(progress, progress_callback)
+            progress.set_operation("Файлы созданы")
             
             # Получаем отчет о производительности
             performance_report = self.excel_handler.performance_tracker.finish_batch()
             
             # Итоговая статистика
+            total_success_count = operation_log.counter('created') + operation_log.counter('skipped')
+            total_error_count = operation_log.counter('errors')
             operation_log.add_entry("INFO", f"Создание файлов завершено")
-            operation_log.add_entry("INFO", f"Успешно создано: {total_success_count} файлов")
+            operation_log.add_entry("INFO", f"Успешно создано: {operation_log.counter('created')} файлов")
+            if operation_log.counter('skipped') > 0:
+                operation_log.add_entry("INFO", f"Пропущено (файл уже есть): {operation_log.counter('skipped')}")
+            if operation_log.counter('moved') > 0:
+                operation_log.add_entry("INFO", f"Перенесено: {operation_log.counter('moved')}")
             
             if total_error_count > 0:
                 operation_log.add_entry("WARNING", f"Ошибок при создании: {total_error_count} файлов")
             
             # Добавляем статистику производительности
+            operation_log.metrics['average_file_seconds'] = performance_report.average_duration_per_file
             operation_log.add_entry("INFO", f"Время выполнения: {duration}")
             operation_log.add_entry("INFO", f"Среднее время на файл: {performance_report.average_duration_per_file:.2f}с")
             
@@ -258,9 +243,8 @@ class EmployeeFileCreator:
             # Очищаем кэш для освобождения памяти
             self.excel_handler.clear_cache()
             
-            # 8. РАСКИДЫВАНИЕ create_report.exe ПО ПАПКАМ
-            progress.current_operation = "Раскидывание скриптов по отделам"
-            self._emit_progress_update(progress, progress_callback)
+            # 9. РАСКИДЫВАНИЕ create_report.exe ПО ПАПКАМ
+            progress.set_operation("Раскидывание скриптов по отделам")
             
             # Ищем create_report.exe в папке приложения
             exe_source_path = None
@@ -294,6 +278,7 @@ class EmployeeFileCreator:
                             operation_log.add_entry("ERROR", f"Ошибка копирования скрипта в {dept_name}: {e}")
             
             operation_log.add_entry("INFO", f"Время выполнения: {duration.total_seconds():.1f} сек")
+            progress.finish("Файлы созданы")
             
             # Завершаем транзакцию
             if self.transaction_manager.is_active:
@@ -301,6 +286,7 @@ class EmployeeFileCreator:
                     # Если нет ошибок, подтверждаем транзакцию
                     if self.transaction_manager.commit_transaction():
                         operation_log.add_entry("INFO", "Транзакция подтверждена успешно")
+                        self.staff_differ.save_snapshot(target_directory, staff_employees, pending_changes)
                     else:
                         operation_log.add_entry("WARNING", "Ошибка подтверждения транзакции")
                 else:
@@ -327,6 +313,21 @@ class EmployeeFileCreator:
             
             return operation_log
             
+        except OperationCancelled as e:
+            operation_log.add_entry("INFO", str(e))
+            snapshot = progress.finish()
+            self.logger.info(f"Создание файлов остановлено: {snapshot.processed_files} из {snapshot.total_files}")
+            
+            # Частично выполненная операция откатывается целиком
+            if self.transaction_manager.is_active:
+                if self.transaction_manager.rollback_transaction():
+                    operation_log.add_entry("INFO", "Транзакция откачена после остановки")
+                else:
+                    operation_log.add_entry("WARNING", "Ошибка отката транзакции после остановки")
+            
+            operation_log.finish(ProcessingStatus.CANCELLED)
+            return operation_log
+            
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -352,6 +353,61 @@ class EmployeeFileCreator:
             )
             
             return operation_log
+        
+        finally:
+            # Ранние выходы (ошибка транзакции, валидации) тоже останавливают публикацию
+            progress.finish()
+    
+    def _relocate_employee_files(self, relocations: List[EmployeeMove], departments: Dict[str, str],
+                                 operation_log: OperationLog,
+                                 cancel_token: Optional[CancellationToken] = None) -> None:
+        """
+        Переносит существующие файлы сотрудников в папку нового подразделения
+        (или под новое имя) и правит шапку по штатному расписанию
+
+        Перенос выполняется одной операцией os.replace в пределах целевой папки,
+        каждый перенос записывается в журнал транзакции до выполнения.
+        Итоги попадают в счетчики лога 'moved' и 'errors' по подразделениям.
+        
+        Raises:
+            OperationCancelled: операция отменена (проверяется перед каждым файлом)
+        """
+        header_cells = self.excel_handler.get_header_cells()
+        for move in relocations:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            employee = move.employee
+            try:
+                target_path = Path(departments[employee['Подразделение 1']]) / \
+                    self.excel_handler.generate_output_filename(employee)
+                if target_path.exists():
+                    raise FileExistsError(f"Файл уже существует: {target_path}")
+                if not self.transaction_manager.add_file_move(move.existing.file_path, str(target_path), employee):
+                    raise OSError("Не удалось записать перенос в журнал транзакции")
+                os.replace(move.existing.file_path, target_path)
+
+                result = update_employee_headers(
+                    self.excel_handler.build_header_task(employee, str(target_path), header_cells)
+                )
+                if result['error']:
+                    raise ValueError(result['error'].splitlines()[0])
+
+                operation_log.count('moved', employee['Подразделение 1'])
+                operation_log.add_entry(
+                    "INFO",
+                    f"Перенесен: {employee['ФИО работника']} ({move.existing.department}/"
+                    f"{Path(move.existing.file_path).name} -> {target_path.parent.name}/{target_path.name}), "
+                    f"изменено полей шапки: {len(result['changes'])}"
+                )
+                event_bus.emit_simple(
+                    EventType.FILE_CREATED,
+                    {"file_path": str(target_path), "employee": employee, "moved_from": move.existing.file_path},
+                    "EmployeeFileCreator"
+                )
+            except Exception as e:
+                operation_log.count('errors', employee['Подразделение 1'])
+                operation_log.add_entry("ERROR", f"Ошибка переноса {employee['ФИО работника']}: {e}")
+                self.logger.error(f"Ошибка переноса файла {move.existing.file_path}: {e}")
     
     def _group_employees_by_department(self, employees: List[Dict]) -> Dict[str, List[Dict]]:
         """Группирует сотрудников по отделам"""
@@ -364,6 +420,22 @@ class EmployeeFileCreator:
                 departments[dept].append(employee)
         return departments
     
+    def _progress_publisher(
+        self,
+        progress_callback: Optional[Callable[[ProcessingProgress], None]],
+        department_progress_callback: Optional[Callable[[int, int, str], None]],
+        file_progress_callback: Optional[Callable[[int, int, str], None]]
+    ) -> Callable[[ProgressSnapshot], None]:
+        """Подписчик агрегатора: раздает снимок прогресса callback-ам и шине событий"""
+        def publish(progress: ProgressSnapshot) -> None:
+            self._emit_progress_update(progress, progress_callback)
+            if department_progress_callback and progress.total_blocks:
+                department_progress_callback(progress.processed_blocks, progress.total_blocks, progress.current_block)
+            if file_progress_callback and progress.current_block:
+                processed, total = progress.department_progress(progress.current_block)
+                file_progress_callback(processed, total, progress.current_file)
+        return publish
+    
     def _emit_progress_update(self, progress: ProcessingProgress, callback: Optional[Callable]):
         """Отправляет событие обновления прогресса"""
         if callback:
@@ -384,11 +456,6 @@ class EmployeeFileCreator:
             "EmployeeFileCreator"
         )
     
-    def _should_stop(self) -> bool:
-        """Проверяет, нужно ли остановить операцию"""
-        # Пока простая заглушка, можно расширить через события
-        return False
-    
     def _clean_filename_for_exe(self, filename: str) -> str:
         """Очищает имя файла для exe от недопустимых символов"""
         if not filename:
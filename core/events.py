@@ -4,10 +4,11 @@
 Система событий для замены прямых ссылок на GUI
 """
 
-from typing import Dict, List, Callable, Any
-from dataclasses import dataclass
+from typing import Dict, List, Callable, Any, Optional, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
+import threading
 
 
 class EventType(Enum):
@@ -19,6 +20,7 @@ class EventType(Enum):
     FILE_PROGRESS = "file_progress"
     OPERATION_COMPLETE = "operation_complete"
     ERROR_OCCURRED = "error_occurred"
+    TEMPLATE_CHANGED = "template_changed"
 
 
 @dataclass
@@ -27,6 +29,19 @@ class Event:
     event_type: EventType
     data: Dict[str, Any]
     source: str = "unknown"
+    # Данные накопленных событий (очередь объединяет однотипные события в одно)
+    batch: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """Данные всех событий, доставленных этим событием"""
+        return self.batch if self.batch else [self.data]
+
+
+# События, от которых важно только последнее значение (в очереди заменяют предыдущее)
+COALESCED_EVENTS = frozenset({EventType.PROGRESS_UPDATE, EventType.FILE_PROGRESS, EventType.DEPARTMENT_PROGRESS})
+# События, которые в очереди собираются в одно событие со списком данных
+BATCHED_EVENTS = frozenset({EventType.FILE_CREATED})
 
 
 class EventBus:
@@ -35,6 +50,93 @@ class EventBus:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self._listeners: Dict[EventType, List[Callable]] = {}
+        # Очередь событий: None - синхронная доставка в потоке отправителя
+        self._queue: Optional[List[Event]] = None
+        self._queue_index: Dict[Tuple[EventType, str], Event] = {}
+        self._queue_size = 0
+        self._queue_limit = 0
+        self._queue_condition = threading.Condition()
+        self._dispatch_thread: Optional[threading.Thread] = None
+    
+    def start_queue(self, max_size: int) -> None:
+        """
+        Включает доставку через очередь
+        
+        emit только ставит событие в очередь, обработчики вызываются из
+        dispatch_pending (в потоке, который ее вызывает, например по таймеру
+        GUI). Прогресс заменяет предыдущее значение, FILE_CREATED собирается
+        в одно событие со списком. При max_size недоставленных событий
+        отправитель ждет, пока очередь не разберут (кроме потока, который
+        вызвал start_queue и разбирает очередь сам).
+        """
+        with self._queue_condition:
+            self._dispatch_thread = threading.current_thread()
+            if self._queue is None:
+                self._queue = []
+                self._queue_index = {}
+                self._queue_size = 0
+            self._queue_limit = max_size
+        self.logger.debug(f"Очередь событий включена (размер {max_size})")
+    
+    def stop_queue(self) -> None:
+        """Доставляет накопленные события и возвращает синхронную доставку"""
+        self.dispatch_pending()
+        with self._queue_condition:
+            self._queue = None
+            self._queue_index = {}
+            self._queue_size = 0
+            self._dispatch_thread = None
+            self._queue_condition.notify_all()
+        self.logger.debug("Очередь событий выключена")
+    
+    def dispatch_pending(self) -> int:
+        """
+        Доставляет накопленные в очереди события
+        
+        Returns:
+            int: количество доставленных событий (после объединения)
+        """
+        with self._queue_condition:
+            if not self._queue:
+                return 0
+            events = self._queue
+            self._queue = []
+            self._queue_index = {}
+            self._queue_size = 0
+            self._queue_condition.notify_all()
+        
+        for event in events:
+            self._deliver(event)
+        return len(events)
+    
+    def _enqueue(self, event: Event) -> bool:
+        """Ставит событие в очередь; False - очередь выключена"""
+        with self._queue_condition:
+            while (self._queue is not None and self._queue_size >= self._queue_limit and
+                   threading.current_thread() is not self._dispatch_thread):
+                self._queue_condition.wait(0.1)
+            if self._queue is None:
+                return False
+            
+            key = (event.event_type, event.source)
+            pending = self._queue_index.get(key)
+            if event.event_type in COALESCED_EVENTS:
+                if pending is not None:
+                    pending.data = event.data
+                    return True
+            elif event.event_type in BATCHED_EVENTS:
+                if pending is not None:
+                    pending.batch.append(event.data)
+                    pending.data = event.data
+                    self._queue_size += 1
+                    return True
+                event.batch = [event.data]
+            
+            self._queue.append(event)
+            self._queue_size += 1
+            if event.event_type in COALESCED_EVENTS or event.event_type in BATCHED_EVENTS:
+                self._queue_index[key] = event
+            return True
     
     def subscribe(self, event_type: EventType, callback: Callable[[Event], None]):
         """Подписка на событие"""
@@ -53,9 +155,15 @@ class EventBus:
                 pass
     
     def emit(self, event: Event):
-        """Отправка события"""
+        """Отправка события (при включенной очереди - постановка в очередь)"""
+        if self._queue is not None and self._enqueue(event):
+            return
+        self._deliver(event)
+    
+    def _deliver(self, event: Event):
+        """Вызывает обработчики события"""
         if event.event_type in self._listeners:
-            for callback in self._listeners[event.event_type]:
+            for callback in list(self._listeners[event.event_type]):
                 try:
                     callback(event)
                 except Exception as e:
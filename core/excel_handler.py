@@ -4,20 +4,32 @@
 """
 
 import logging
+import os
 import shutil
 from pathlib import Path
 from datetime import datetime, date
-from typing import List, Optional, Dict, Tuple, Any
+from typing import List, Optional, Dict, Tuple, Any, Iterator, Callable
 import re
 
 import openpyxl
-from openpyxl.styles import Border, Side
+from openpyxl.utils import column_index_from_string
 
 from models import VacationInfo, VacationPeriod, VacationStatus
 from config import Config
 from core.performance_tracker import PerformanceTracker, FilePerformanceStats
 from core.directory_manager import DirectoryManager
-from core.data_mapper import DataMapper
+from core.data_mapper import DataMapper, PeriodRow
+from core.vacation_conflicts import VacationConflictDetector, SHEET_COLUMNS as CONFLICT_COLUMNS
+from core.cancellation import CancellationToken
+from core.calendar_index import CalendarIndex, get_calendar_index
+from core.date_parser import parse_date
+from core.form_status import FormStatus, FormStatusCalculator
+from core.formula_cache import EmployeeFormulaCache
+from core.header_patcher import HeaderCell
+from core.report_digest import ReportDigest
+from core.report_stream_writer import ReportStreamWriter, SheetRowStream, StreamRow
+from core.style_registry import StyleRegistry
+from core.template_cache import template_rules_cache
 
 
 class ExcelHandler:
@@ -26,19 +38,36 @@ class ExcelHandler:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self._cached_rules = {}
         self._cached_templates = {}
         self._cached_workbooks = {}
         self._cached_cell_addresses = {}  # Кэш для парсинга адресов ячеек
         self.performance_tracker = PerformanceTracker()
         self.directory_manager = DirectoryManager(config)
         self.data_mapper = DataMapper()
+        self.conflict_detector = VacationConflictDetector()
+        self.report_digest = ReportDigest(config)
+        self.report_stream_writer = ReportStreamWriter()
+        self.form_status_calculator = FormStatusCalculator(config)
+        self.formula_cache = EmployeeFormulaCache(config, self.form_status_calculator)
     
     def _get_cached_rules(self, template_path: str) -> Dict[str, Dict[str, str]]:
-        """Получает rules из кэша или загружает их"""
-        if template_path not in self._cached_rules:
-            self._cached_rules[template_path] = self._load_filling_rules(template_path)
-        return self._cached_rules[template_path]
+        """Получает rules шаблона из общего кэша процесса или загружает их"""
+        return template_rules_cache.get(template_path, self._load_filling_rules)
+    
+    def warm_up_templates(self) -> int:
+        """
+        Заранее разбирает rules имеющихся шаблонов в общий кэш
+        
+        Returns:
+            int: количество разобранных шаблонов
+        """
+        warmed = 0
+        for template_path in (self.config.employee_template, self.config.block_report_template,
+                              self.config.general_report_template):
+            if Path(template_path).exists():
+                self._get_cached_rules(str(template_path))
+                warmed += 1
+        return warmed
     
     def _get_cached_template_workbook(self, template_path: str) -> openpyxl.Workbook:
         """Получает шаблон из кэша или загружает его"""
@@ -95,9 +124,20 @@ class ExcelHandler:
             # Применяем правила заполнения
             self._apply_rules_to_template(workbook, rules, data_dict)
             
+            # Версия шаблона в свойствах книги (по ней миграция пропускает актуальные файлы)
+            workbook.properties.version = self.get_template_version()
+            
+            # Значения формул для исходных данных (Excel откроет файл без полного пересчета)
+            formula_values = None
+            if self.config.cache_employee_formulas:
+                formula_values = self.formula_cache.prepare(workbook)
+            
             workbook.save(output_path)
             workbook.close()
             
+            if formula_values is not None:
+                self.formula_cache.write(output_path, formula_values)
+            
             file_stats.finish(True)
             return True
             
@@ -307,19 +347,23 @@ class ExcelHandler:
                 pass
         
         self._cached_workbooks.clear()
-        self._cached_rules.clear()
         self._cached_templates.clear()
         self._cached_cell_addresses.clear()
 
     def _load_filling_rules(self, template_path: str) -> Dict[str, Dict[str, str]]:
         """Загружает правила заполнения из листа 'rules'"""
-        rules = {'value': {}, 'header': {}, 'read': {}}
-        
         workbook = openpyxl.load_workbook(template_path, data_only=False)
+        try:
+            return self.read_filling_rules(workbook, template_path)
+        finally:
+            workbook.close()
+    
+    def read_filling_rules(self, workbook, source: str) -> Dict[str, Dict[str, str]]:
+        """Читает правила заполнения из листа 'rules' открытой книги (шаблона или файла сотрудника)"""
+        rules = {'value': {}, 'header': {}, 'read': {}}
         
         if 'rules' not in workbook.sheetnames:
-            workbook.close()
-            raise ValueError(f"Лист 'rules' не найден в шаблоне {template_path}")
+            raise ValueError(f"Лист 'rules' не найден в шаблоне {source}")
         
         rules_sheet = workbook['rules']
         
@@ -340,25 +384,42 @@ class ExcelHandler:
                 if rule_type in ['value', 'header', 'read']:
                     rules[rule_type][target_address] = source_field
         
-        workbook.close()
-        
         if not any(rules.values()):
-            raise ValueError(f"Лист 'rules' пуст или не содержит корректных правил в {template_path}")
+            raise ValueError(f"Лист 'rules' пуст или не содержит корректных правил в {source}")
         
         return rules
 
-    def create_block_report(self, block_name: str, vacation_infos: List[VacationInfo], output_path: str) -> bool:
-        """Создает отчет по блоку с использованием rules"""
+    def create_block_report(self, block_name: str, vacation_infos: List[VacationInfo], output_path: str,
+                            input_digest: Optional[str] = None) -> bool:
+        """
+        Создает отчет по блоку с использованием rules
+        
+        Если передан input_digest, он записывается в свойства книги, чтобы при
+        повторном запуске отчет с неизменными входными данными не пересоздавался.
+        Отчет собирается во временном файле и переносится в output_path только
+        целиком, поэтому при ошибке не остается отчета с отпечатком и пустыми таблицами.
+        """
         template_path = Path(self.config.block_report_template)
         if not template_path.exists():
             raise FileNotFoundError(f"Шаблон отчета не найден: {template_path}")
         self.directory_manager.ensure_directory_exists(Path(output_path).parent)
-        shutil.copy2(template_path, output_path)
-        rules = self._load_filling_rules(str(template_path))
-        workbook = openpyxl.load_workbook(output_path)
-        self._fill_report_with_rules(workbook, block_name, vacation_infos, rules)
-        workbook.save(output_path)
-        workbook.close()
+        temp_path = f"{output_path}.report.tmp"
+        try:
+            rules = self._get_cached_rules(str(template_path))
+            workbook = openpyxl.load_workbook(template_path)
+            self._fill_report_with_rules(workbook, block_name, vacation_infos, rules)
+            if input_digest:
+                self.report_digest.stamp(workbook, input_digest)
+            table_streams = self._build_table_streams(workbook, vacation_infos, rules)
+            workbook.save(temp_path)
+            workbook.close()
+            
+            # Таблицы Report и Print дописываются потоково в уже сохраненный файл
+            self.report_stream_writer.write(temp_path, table_streams)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
         return True
 
     def _fill_report_with_rules(self, workbook, block_name: str, vacation_infos: List[VacationInfo], rules: Dict[str, Dict[str, str]]):
@@ -369,244 +430,153 @@ class ExcelHandler:
         # Применяем rules
         self._apply_rules_to_template(workbook, rules, report_data)
         
-        # Заполняем таблицы данных
-        self._fill_employee_tables(workbook, vacation_infos, rules)
+        # Оформление первой строки таблиц (строки данных пишутся потоково после сохранения)
+        self._prepare_employee_tables(workbook, vacation_infos, rules)
         
-        # Заполняем календарь
-        if 'Report' in workbook.sheetnames:
-            self._fill_calendar_matrix(workbook['Report'], vacation_infos)
-
-    def _fill_employee_tables(self, workbook, vacation_infos: List[VacationInfo], rules: Dict[str, Dict[str, str]]):
-        """Заполняет таблицы сотрудников на Report и Print листах"""
+        # Заполняем шапку календаря
         if 'Report' in workbook.sheetnames:
-            self._fill_table_by_prefix(workbook['Report'], vacation_infos, rules, 'report_', self._get_report_row_data_dynamic)
-            self._apply_borders_to_report_table(workbook['Report'], len(vacation_infos), rules)
+            self._fill_calendar_header(workbook['Report'])
         
-        if 'Print' in workbook.sheetnames:
-            # Сортируем vacation_infos: сначала FILLED_CORRECT, затем остальные
-            # Используем кастомную функцию сортировки, которая дает FILLED_CORRECT наивысший приоритет
-            sorted_vacation_infos = sorted(vacation_infos, key=lambda x: x.status != VacationStatus.FILLED_CORRECT)
-            
-            normalized_data = self._normalize_vacation_data(sorted_vacation_infos)
-            self._fill_table_by_prefix(workbook['Print'], normalized_data, rules, 'print_', self._get_print_row_data_dynamic)
-            self._apply_borders_to_table(workbook['Print'], len(normalized_data))
+        # Лист пересечений отпусков
+        self._prepare_conflicts_sheet(workbook)
 
-    def _fill_table_by_prefix(self, worksheet, data_list: List, rules: Dict[str, Dict[str, str]], prefix: str, row_data_func):
-        """Универсальная функция заполнения таблицы по префиксу"""
-        header_rules = rules.get('header', {})
+    def _prepare_conflicts_sheet(self, workbook):
+        """Создает пустой лист пересечений (строки пишутся потоково после сохранения)"""
+        sheet_name = self.config.conflicts_sheet_name
+        if sheet_name in workbook.sheetnames:
+            del workbook[sheet_name]
+        workbook.create_sheet(sheet_name)
+
+    def _iter_conflict_rows(self, vacation_infos: List[VacationInfo]) -> Iterator[StreamRow]:
+        """Строки листа пересечений отпусков по подразделениям и должностям"""
+        conflict_report = self.conflict_detector.detect(vacation_infos)
+        for row in self.conflict_detector.iter_sheet_rows(conflict_report):
+            yield row, ()
+
+    def _get_table_columns(self, rules: Dict[str, Dict[str, str]], prefix: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Столбцы таблицы по header-правилам с префиксом
         
-        # Собираем mapping: имя поля -> столбец
+        Returns:
+            Dict[str, Tuple[int, int]]: {имя поля: (номер столбца, строка заголовка)}
+        """
         column_mapping = {}
-        for cell_address, field_name in header_rules.items():
-            if field_name.startswith(prefix):
-                if cell_address.startswith('=') and '!' in cell_address:
-                    sheet_and_cell = cell_address[1:]
-                    if '!' in sheet_and_cell:
-                        sheet_part, cell_part = sheet_and_cell.split('!', 1)
-                        col_match = re.search(r'([A-Z]+)', cell_part)
-                        row_match = re.search(r'(\d+)', cell_part)
-                        if col_match and row_match:
-                            column_mapping[field_name] = (col_match.group(1), int(row_match.group(1)))
-                else:
-                    col_match = re.search(r'([A-Z]+)', cell_address)
-                    row_match = re.search(r'(\d+)', cell_address)
-                    if col_match and row_match:
-                        column_mapping[field_name] = (col_match.group(1), int(row_match.group(1)))
+        for cell_address, field_name in rules.get('header', {}).items():
+            if not field_name.startswith(prefix):
+                continue
+            cell_part = cell_address
+            if cell_address.startswith('=') and '!' in cell_address:
+                cell_part = cell_address[1:].split('!', 1)[1]
+            col_match = re.search(r'([A-Z]+)', cell_part)
+            row_match = re.search(r'(\d+)', cell_part)
+            if col_match and row_match:
+                column_mapping[field_name] = (column_index_from_string(col_match.group(1)), int(row_match.group(1)))
+        return column_mapping
+
+    def _get_table_start_row(self, column_mapping: Dict[str, Tuple[int, int]]) -> int:
+        """Первая строка данных таблицы (следующая за строкой заголовков)"""
+        return min(header_row for _, header_row in column_mapping.values()) + 1
+
+    def _prepare_employee_tables(self, workbook, vacation_infos: List[VacationInfo], rules: Dict[str, Dict[str, str]]):
+        """
+        Оформляет первую строку данных таблиц Report и Print
         
-        if not column_mapping:
+        Эта строка служит прототипом стилей для потоковой записи; если данных нет,
+        шаблон остается без изменений.
+        """
+        if not vacation_infos:
             return
         
-        # Заполняем данные
-        for i, data_item in enumerate(data_list):
-            row_data = row_data_func(data_item, i)
+        style_registry = StyleRegistry(workbook)
+        
+        for sheet_name, prefix in (('Report', 'report_'), ('Print', 'print_')):
+            if sheet_name not in workbook.sheetnames:
+                continue
+            column_mapping = self._get_table_columns(rules, prefix)
+            if not column_mapping:
+                continue
             
-            for key, value in row_data.items():
-                if key in column_mapping:
-                    col, header_row = column_mapping[key]
-                    data_row = header_row + 1 + i
-                    cell_address = f"{col}{data_row}"
-                    
-                    # Преобразуем значение к правильному типу
-                    converted_value = self._convert_value_type(value)
-                    worksheet[cell_address] = converted_value
+            worksheet = workbook[sheet_name]
+            start_row = self._get_table_start_row(column_mapping)
+            columns = [col for col, _ in column_mapping.values()]
+            style_registry.stamp_border(worksheet, start_row, start_row, min(columns), max(columns))
 
-    def _get_report_row_data_dynamic(self, vacation_info: VacationInfo, index: int) -> Dict[str, Any]:
-        """Динамически получает данные строки для Report листа используя DataMapper"""
-        return self.data_mapper.map_vacation_info_to_rules(vacation_info, index, 'report_')
-    
-    def _get_report_row_data(self, vacation_info: VacationInfo, index: int) -> Dict[str, Any]:
-        emp = vacation_info.employee
+    def _build_table_streams(self, workbook, vacation_infos: List[VacationInfo],
+                             rules: Dict[str, Dict[str, str]]) -> List[SheetRowStream]:
+        """Описывает потоки строк таблиц Report (с календарем), Print и листа пересечений"""
+        streams = []
         
-        return {
-            "report_row_number": index + 1,
-            "report_employee_name": emp.get("ФИО работника", ""),
-            "report_tab_number": emp.get("Табельный номер", ""),
-            "report_position": emp.get("Должность", ""),
-            "report_department1": emp.get("Подразделение 1", ""),
-            "report_department2": emp.get("Подразделение 2", ""),
-            "report_department3": emp.get("Подразделение 3", ""),
-            "report_department4": emp.get("Подразделение 4", ""),
-            "report_status": vacation_info.get_status_text(),
-            "report_total_days": sum(p.days for p in vacation_info.periods) if vacation_info.periods else "",
-            "report_periods_count": len(vacation_info.periods) if vacation_info.periods else "",
-        }
-
-    def _get_print_row_data_dynamic(self, data, index: int) -> Dict[str, Any]:
-        """Динамически получает данные строки для Print листа используя DataMapper"""
-        return self.data_mapper.map_period_data_to_rules(data, index, 'print_')
-    
-    def _get_print_row_data(self, data, index: int) -> Dict[str, Any]:
-        """Получает данные строки для Print листа из нормализованных данных"""
-        emp = data.get('employee', {})
-        start_date = data.get('start_date')
-        end_date = data.get('end_date')
-        days = data.get('days', 0)
+        report_columns = self._get_table_columns(rules, 'report_')
+        if 'Report' in workbook.sheetnames and report_columns:
+            start_row = self._get_table_start_row(report_columns)
+            employee_start_row = self.config.report_structure.get("employee_data_start_row", 9)
+            if start_row != employee_start_row:
+                raise ValueError(
+                    f"Строка данных Report ({start_row}) не совпадает со строкой календаря ({employee_start_row})"
+                )
+            columns, emit = self.data_mapper.compile_report_emitter(report_columns, 'report_', self._convert_value_type)
+            streams.append(SheetRowStream('Report', start_row, columns, self._iter_report_rows(vacation_infos, emit)))
         
-        start_date_str = start_date.strftime('%d.%m.%Y') if start_date else ""
-        end_date_str = end_date.strftime('%d.%m.%Y') if end_date else ""
+        print_columns = self._get_table_columns(rules, 'print_')
+        if 'Print' in workbook.sheetnames and print_columns:
+            start_row = self._get_table_start_row(print_columns)
+            columns, emit = self.data_mapper.compile_print_emitter(print_columns, 'print_', self._convert_value_type)
+            streams.append(SheetRowStream('Print', start_row, columns, self._iter_print_rows(vacation_infos, emit)))
         
-        return {
-            "print_row_number": index + 1,
-            "print_tab_number": emp.get("Табельный номер", ""),
-            "print_employee_name": emp.get("ФИО работника", ""),
-            "print_position": emp.get("Должность", ""),
-            "print_start_date": start_date_str,
-            "print_end_date": end_date_str,
-            "print_duration": str(days) if days > 0 else "",
-            "print_signature": "",
-            "print_acknowledgment_date": "",
-            "print_notes": "",
-        }
+        streams.append(SheetRowStream(self.config.conflicts_sheet_name, 1, CONFLICT_COLUMNS,
+                                      self._iter_conflict_rows(vacation_infos)))
+        return streams
 
-    def _normalize_vacation_data(self, vacation_infos: List[VacationInfo]) -> List[Dict]:
-        """Нормализует данные отпусков - каждый период = отдельная строка"""
-        normalized_data = []
-        for vacation_info in vacation_infos:
-            emp = vacation_info.employee
-            if not vacation_info.periods:
-                normalized_data.append({
-                    'employee': emp, 'period_num': 0, 'start_date': None, 'end_date': None, 'days': 0
-                })
-            else:
-                for period_idx, period in enumerate(vacation_info.periods, 1):
-                    normalized_data.append({
-                        'employee': emp, 'period_num': period_idx,
-                        'start_date': period.start_date, 'end_date': period.end_date, 'days': period.days
-                    })
-        return normalized_data
-
-    def _apply_borders_to_report_table(self, worksheet, data_count: int, rules: Dict[str, Dict[str, str]]):
-        """Применяет границы к таблице Report листа"""
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                           top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        # Получаем mapping столбцов из rules
-        header_rules = rules.get('header', {})
-        column_mapping = {}
+    def _iter_report_rows(self, vacation_infos: List[VacationInfo],
+                          emit: Callable[[VacationInfo, int], Tuple[Any, ...]]) -> Iterator[StreamRow]:
+        """Строки Report по одной: данные сотрудника и отметки дней отпуска в календаре"""
+        start_col = self.config.report_structure.get("calendar_start_col", 12)
+        calendar_index = self._get_calendar_index(start_col)
         
-        for cell_address, field_name in header_rules.items():
-            if field_name.startswith('report_'):
-                if cell_address.startswith('=') and '!' in cell_address:
-                    sheet_and_cell = cell_address[1:]
-                    if '!' in sheet_and_cell:
-                        sheet_part, cell_part = sheet_and_cell.split('!', 1)
-                        col_match = re.search(r'([A-Z]+)', cell_part)
-                        row_match = re.search(r'(\d+)', cell_part)
-                        if col_match and row_match:
-                            column_mapping[field_name] = (col_match.group(1), int(row_match.group(1)))
-                else:
-                    col_match = re.search(r'([A-Z]+)', cell_address)
-                    row_match = re.search(r'(\d+)', cell_address)
-                    if col_match and row_match:
-                        column_mapping[field_name] = (col_match.group(1), int(row_match.group(1)))
-        
-        if not column_mapping:
-            return
-        
-        # Находим диапазон столбцов и строк
-        min_row = float('inf')
-        max_row = 0
-        min_col = float('inf')
-        max_col = 0
-        
-        for col_str, header_row in column_mapping.values():
-            # Конвертируем буквенное обозначение столбца в номер
-            col_num = 0
-            for char in col_str:
-                col_num = col_num * 26 + (ord(char.upper()) - ord('A') + 1)
-            
-            min_col = min(min_col, col_num)
-            max_col = max(max_col, col_num)
-            min_row = min(min_row, header_row + 1)  # +1 потому что данные начинаются со следующей строки
-            max_row = max(max_row, header_row + 1 + data_count - 1)  # последняя строка с данными
-        
-        # Применяем границы ко всем ячейкам в диапазоне
-        for row in range(min_row, max_row + 1):
-            for col in range(min_col, max_col + 1):
-                cell = worksheet.cell(row=row, column=col)
-                cell.border = thin_border
-
-    def _apply_borders_to_table(self, worksheet, data_count: int):
-        """Применяет границы к таблице Print листа"""
-        thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                           top=Side(style='thin'), bottom=Side(style='thin'))
-        
-        report_structure = self.config.report_structure
-        start_row = report_structure.get("employee_data_start_row", 9)
-        
-        for row in range(start_row, start_row + data_count):
-            for col in range(1, 11):
-                worksheet.cell(row=row, column=col).border = thin_border
+        for index, vacation_info in enumerate(vacation_infos):
+            calendar_cells = []
+            for period in vacation_info.periods:
+                # Период обрезается по границам календаря (в т.ч. через Новый год)
+                columns = calendar_index.column_range(period.start_date, period.end_date)
+                if columns is None:
+                    continue
+                calendar_cells.extend((day_col, 1) for day_col in range(columns[0], columns[1] + 1))
+            yield emit(vacation_info, index), calendar_cells
+
+    def _iter_print_rows(self, vacation_infos: List[VacationInfo],
+                         emit: Callable[[PeriodRow, int], Tuple[Any, ...]]) -> Iterator[StreamRow]:
+        """Строки Print по одной: каждый период - отдельная строка, сначала корректно заполненные формы"""
+        index = 0
+        for correct_first in (True, False):
+            for vacation_info in vacation_infos:
+                if (vacation_info.status == VacationStatus.FILLED_CORRECT) != correct_first:
+                    continue
+                for period_row in self.data_mapper.iter_period_rows(vacation_info):
+                    yield emit(period_row, index), ()
+                    index += 1
 
-    def _fill_calendar_matrix(self, worksheet, vacation_infos: List[VacationInfo]):
-        """Заполняет календарную матрицу"""
+    def _fill_calendar_header(self, worksheet):
+        """Заполняет шапку календаря: названия месяцев и номера дней"""
         report_structure = self.config.report_structure
         start_col = report_structure.get("calendar_start_col", 12)
         month_row = report_structure.get("calendar_month_row", 7)
         day_row = report_structure.get("calendar_day_row", 8)
-        employee_start_row = report_structure.get("employee_data_start_row", 9)
         
         month_names = self.config.month_names
-        days_in_months = self.config.days_in_months
-        target_year = self.config.target_year
+        calendar_index = self._get_calendar_index(start_col)
         
-        col_offset = 0
-        for month_idx, month_name in enumerate(month_names):
-            month_col = start_col + col_offset
-            worksheet.cell(row=month_row, column=month_col, value=month_name)
-            
-            days_in_month = days_in_months[month_idx]
+        for month, month_col, days_in_month in calendar_index.month_columns():
+            worksheet.cell(row=month_row, column=month_col, value=month_names[month - 1])
             for day in range(1, days_in_month + 1):
-                day_col = start_col + col_offset + day - 1
-                worksheet.cell(row=day_row, column=day_col, value=day)
-            
-            col_offset += days_in_month
-        
-        for emp_idx, vacation_info in enumerate(vacation_infos):
-            emp_row = employee_start_row + emp_idx
-            for period in vacation_info.periods:
-                current_date = period.start_date
-                while current_date <= period.end_date:
-                    if current_date.year == target_year:
-                        day_col = self._get_calendar_column(current_date, start_col)
-                        if day_col:
-                            worksheet.cell(row=emp_row, column=day_col, value=1)
-                    
-                    from datetime import timedelta
-                    current_date = current_date + timedelta(days=1)
-                    if current_date > period.end_date:
-                        break
+                worksheet.cell(row=day_row, column=month_col + day - 1, value=day)
+
+    def _get_calendar_index(self, start_col: int) -> CalendarIndex:
+        """Возвращает общий календарь отчета для целевого года"""
+        return get_calendar_index(self.config.target_year, self.config.calendar_years, start_col)
 
     def _get_calendar_column(self, target_date: date, start_col: int) -> Optional[int]:
         """Вычисляет столбец для даты в календаре"""
-        target_year = self.config.target_year
-        days_in_months = self.config.days_in_months
-        
-        if target_date.year != target_year:
-            return None
-        
-        col_offset = sum(days_in_months[:target_date.month - 1]) + target_date.day - 1
-        return start_col + col_offset
+        return self._get_calendar_index(start_col).column(target_date)
 
     def _get_cell_value(self, worksheet, cell_address: str):
         """Безопасно получает значение ячейки"""
@@ -617,91 +587,141 @@ class ExcelHandler:
             
     def read_vacation_info_from_file(self, file_path: str) -> Optional[VacationInfo]:
         """Читает информацию об отпусках из файла сотрудника с новой логикой статусов"""
-        try:
-            # Загружаем rules из файла
-            employee_rules = self._load_filling_rules(file_path)
-            
-            workbook = openpyxl.load_workbook(file_path, data_only=True)
-            worksheet = workbook.worksheets[0]
-            
-            # Читаем данные сотрудника по rules
-            employee = {}
-            value_rules = employee_rules.get('value', {})
-            
-            for cell_address, field_name in value_rules.items():
+        return self.read_vacation_infos([file_path])[0]
+
+    def read_vacation_infos(self, file_paths: List[str],
+                            cancel_token: Optional[CancellationToken] = None,
+                            errors: Optional[List[Tuple[str, str]]] = None) -> List[Optional[VacationInfo]]:
+        """
+        Читает файлы сотрудников; статусы рассчитываются одним проходом по всему набору
+        
+        Args:
+            errors: список, в который добавляются (путь, причина) непрочитанных файлов
+        
+        Returns:
+            List[Optional[VacationInfo]]: по одному элементу на файл (None - файл не прочитан)
+        
+        Raises:
+            OperationCancelled: операция отменена (проверяется перед каждым файлом)
+        """
+        recalculate = self.config.recalculate_form_status
+        results: List[Optional[VacationInfo]] = []
+        pending = []  # (позиция в results, входные данные формы)
+        
+        for file_path in file_paths:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            try:
+                # Загружаем rules из файла
+                employee_rules = self._load_filling_rules(file_path)
+                
+                workbook = openpyxl.load_workbook(file_path, data_only=True)
                 try:
-                    is_formula, clean_address, sheet_name = self._parse_cell_address(cell_address)
-                    if sheet_name and sheet_name in workbook.sheetnames:
-                        ws = workbook[sheet_name]
-                    else:
-                        ws = worksheet
-                    
-                    value = self._get_cell_value(ws, clean_address)
-                    employee[field_name] = str(value).strip() if value is not None else ""
-                except Exception:
-                    employee[field_name] = ""
-            
-            # Читаем статус из B12
-            status_value = self._get_cell_value(worksheet, "B12")
-            status_text = str(status_value).strip() if status_value else ""
-            
-            # ОБНОВЛЕННАЯ ЛОГИКА: Сохраняем оригинальные статусы, но периоды читаем только для "корректно"
-            validation_statuses = self.config.validation_statuses
-            if status_text == validation_statuses["filled_correct"]:
-                vacation_status = VacationStatus.FILLED_CORRECT
-            elif status_text == validation_statuses["filled_incorrect"]:
-                vacation_status = VacationStatus.FILLED_INCORRECT  
-            elif status_text == validation_statuses["not_filled"]:
+                    employee = self._read_employee_values(workbook, employee_rules)
+                    if not recalculate:
+                        results.append(self._build_vacation_info(employee, self._read_cached_status(workbook)))
+                        continue
+                    # Нераспознанные данные формы - ошибка чтения файла, а не статус формы
+                    inputs = self.form_status_calculator.read_inputs(workbook)
+                finally:
+                    workbook.close()
+                
+                pending.append((len(results), inputs))
+                results.append(VacationInfo(employee=employee))
+            except Exception as e:
+                self.logger.error(f"Ошибка чтения файла {file_path}: {e}")
+                if errors is not None:
+                    errors.append((file_path, str(e)))
+                results.append(None)
+        
+        statuses = self.form_status_calculator.evaluate_many([inputs for _, inputs in pending])
+        for (position, _), status in zip(pending, statuses):
+            results[position] = self._build_vacation_info(results[position].employee, status)
+        return results
+
+    def _read_employee_values(self, workbook, employee_rules: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+        """Читает данные сотрудника по value-правилам"""
+        worksheet = workbook.worksheets[0]
+        employee = {}
+        value_rules = employee_rules.get('value', {})
+        
+        for cell_address, field_name in value_rules.items():
+            try:
+                is_formula, clean_address, sheet_name = self._parse_cell_address(cell_address)
+                if sheet_name and sheet_name in workbook.sheetnames:
+                    ws = workbook[sheet_name]
+                else:
+                    ws = worksheet
+                
+                value = self._get_cell_value(ws, clean_address)
+                employee[field_name] = str(value).strip() if value is not None else ""
+            except Exception:
+                employee[field_name] = ""
+        return employee
+
+    def _build_vacation_info(self, employee: Dict[str, str], form_status: FormStatus) -> VacationInfo:
+        """Собирает VacationInfo: периоды учитываются только для корректно заполненной формы"""
+        periods = form_status.periods if form_status.status == VacationStatus.FILLED_CORRECT else []
+        if form_status.status != VacationStatus.FILLED_CORRECT:
+            self.logger.debug("Статус формы '%s' не 'Форма заполнена корректно', периоды не читаются", form_status.text)
+        
+        vacation_info = VacationInfo(employee=employee, periods=periods, status=form_status.status)
+        if form_status.text and vacation_info.status != VacationStatus.FILLED_CORRECT:
+            vacation_info.validation_errors = [form_status.text]
+        return vacation_info
+
+    def _read_cached_status(self, workbook) -> FormStatus:
+        """Статус из сохраненного Excel значения B12 и продолжительности периодов из столбца E"""
+        worksheet = workbook.worksheets[0]
+        
+        # Читаем статус из B12
+        status_value = self._get_cell_value(worksheet, "B12")
+        status_text = str(status_value).strip() if status_value else ""
+        
+        # ОБНОВЛЕННАЯ ЛОГИКА: Сохраняем оригинальные статусы, но периоды читаем только для "корректно"
+        validation_statuses = self.config.validation_statuses
+        if status_text == validation_statuses["filled_correct"]:
+            vacation_status = VacationStatus.FILLED_CORRECT
+        elif status_text == validation_statuses["filled_incorrect"]:
+            vacation_status = VacationStatus.FILLED_INCORRECT  
+        elif status_text == validation_statuses["not_filled"]:
+            vacation_status = VacationStatus.NOT_FILLED
+        else:
+            # Неизвестные статусы считаем как "некорректно заполнена"
+            if "некорректно" in status_text.lower() or "ошибка" in status_text.lower():
+                vacation_status = VacationStatus.FILLED_INCORRECT
+            elif "не заполнена" in status_text.lower() or not status_text:
                 vacation_status = VacationStatus.NOT_FILLED
             else:
-                # Неизвестные статусы считаем как "некорректно заполнена"
-                if "некорректно" in status_text.lower() or "ошибка" in status_text.lower():
-                    vacation_status = VacationStatus.FILLED_INCORRECT
-                elif "не заполнена" in status_text.lower() or not status_text:
-                    vacation_status = VacationStatus.NOT_FILLED
-                else:
-                    vacation_status = VacationStatus.FILLED_INCORRECT
-            
-            # Читаем периоды отпусков только если статус "Форма заполнена корректно"
-            periods = []
-            if vacation_status == VacationStatus.FILLED_CORRECT:
-                for row in range(15, 30):
-                    start_date_value = self._get_cell_value(worksheet, f"C{row}")
-                    end_date_value = self._get_cell_value(worksheet, f"D{row}")
-                    
-                    if not start_date_value or not end_date_value:
-                        continue
+                vacation_status = VacationStatus.FILLED_INCORRECT
+        
+        # Читаем периоды отпусков только если статус "Форма заполнена корректно"
+        periods = []
+        if vacation_status == VacationStatus.FILLED_CORRECT:
+            for row in range(15, 30):
+                start_date_value = self._get_cell_value(worksheet, f"C{row}")
+                end_date_value = self._get_cell_value(worksheet, f"D{row}")
+                
+                if not start_date_value or not end_date_value:
+                    continue
+                
+                try:
+                    start_date = self._parse_date(start_date_value)
+                    end_date = self._parse_date(end_date_value)
                     
-                    try:
-                        start_date = self._parse_date(start_date_value)
-                        end_date = self._parse_date(end_date_value)
-                        
-                        if start_date and end_date:
-                            # Читаем продолжительность из столбца E для текущей строки
-                            days_value = self._get_cell_value(worksheet, f"E{row}")
-                            if days_value and isinstance(days_value, (int, float)) and int(days_value) > 0:
-                                days = int(days_value)
-                                periods.append(VacationPeriod(start_date, end_date, days))
-                            else:
-                                # Если значение не найдено в столбце E, равно 0 или отрицательное, пропускаем этот период
-                                continue
-                    except Exception:
-                        continue
-            else:
-                # Если статус не "Форма заполнена корректно", периоды не читаем
-                self.logger.debug(f"Статус формы '{status_text}' не 'Форма заполнена корректно', периоды не читаются")
-            
-            vacation_info = VacationInfo(employee=employee, periods=periods, status=vacation_status)
-            
-            if status_text and vacation_info.status != VacationStatus.FILLED_CORRECT:
-                vacation_info.validation_errors = [status_text]
-            
-            workbook.close()
-            return vacation_info
-            
-        except Exception as e:
-            self.logger.error(f"Ошибка чтения файла {file_path}: {e}")
-            return None
+                    if start_date and end_date:
+                        # Читаем продолжительность из столбца E для текущей строки
+                        days_value = self._get_cell_value(worksheet, f"E{row}")
+                        if days_value and isinstance(days_value, (int, float)) and int(days_value) > 0:
+                            days = int(days_value)
+                            periods.append(VacationPeriod(start_date, end_date, days))
+                        else:
+                            # Если значение не найдено в столбце E, равно 0 или отрицательное, пропускаем этот период
+                            continue
+                except Exception:
+                    continue
+        
+        return FormStatus(vacation_status, status_text, periods=periods)
 
     def read_block_report_data_by_rules(self, report_path: str) -> Optional[Dict]:
         """Читает данные из отчета по блоку используя его rules (ПРАВИЛЬНАЯ РЕАЛИЗАЦИЯ ИЗ ГИТХАБА)"""
@@ -773,20 +793,42 @@ class ExcelHandler:
             self.logger.error(f"Ошибка чтения отчета {report_path}: {e}")
             return None
 
-    def create_general_report_from_blocks(self, block_data: List[Dict], output_path: str) -> bool:
-        """Создает общий отчет используя rules из шаблона"""
+    # Шаги записи общего отчета (для прогресса create_general_report_from_blocks)
+    GENERAL_REPORT_WRITE_STEPS = ("Копирование шаблона", "Загрузка шаблона", "Заполнение таблицы", "Сохранение файла")
+
+    def create_general_report_from_blocks(
+        self,
+        block_data: List[Dict],
+        output_path: str,
+        step_callback: Optional[Callable[[str], None]] = None
+    ) -> bool:
+        """
+        Создает общий отчет используя rules из шаблона
+        
+        Args:
+            block_data: строки таблицы общего отчета
+            output_path: путь создаваемого файла
+            step_callback: вызывается перед каждым шагом GENERAL_REPORT_WRITE_STEPS
+        """
+        def step(index: int) -> None:
+            if step_callback:
+                step_callback(self.GENERAL_REPORT_WRITE_STEPS[index])
+        
         template_path = Path(self.config.general_report_template)
         if not template_path.exists():
             raise FileNotFoundError(f"Шаблон общего отчета не найден: {template_path}")
         
+        step(0)
         self.directory_manager.ensure_directory_exists(Path(output_path).parent)
         shutil.copy2(template_path, output_path)
         
         # Загружаем rules общего отчета
-        rules = self._load_filling_rules(str(template_path))
+        rules = self._get_cached_rules(str(template_path))
         
+        step(1)
         workbook = openpyxl.load_workbook(output_path)
         
+        step(2)
         # Используем DataMapper для динамического маппинга заголовка
         general_data = self.data_mapper.map_general_header_data(block_data)
         
@@ -796,6 +838,7 @@ class ExcelHandler:
         # Заполняем таблицу данных используя header правила
         self._fill_general_report_table_with_rules(workbook, block_data, rules)
         
+        step(3)
         workbook.save(output_path)
         workbook.close()
         return True
@@ -828,14 +871,13 @@ class ExcelHandler:
 
         # Сохраняем стили шаблонной строки (первая строка данных)
         total_cols = worksheet.max_column
-        template_cells = [worksheet.cell(row=data_start_row, column=col) for col in range(1, total_cols+1)]
-        template_styles = [self._copy_cell_style(cell) for cell in template_cells]
+        style_registry = StyleRegistry(workbook)
+        template_styles = style_registry.row_styles(worksheet, data_start_row, total_cols)
 
         # Найти строку итогов (первая строка после данных)
         summary_row = data_start_row + 1
-        summary_cells = [worksheet.cell(row=summary_row, column=col) for col in range(1, total_cols+1)]
-        summary_styles = [self._copy_cell_style(cell) for cell in summary_cells]
-        summary_formulas = [cell.value for cell in summary_cells]
+        summary_styles = style_registry.row_styles(worksheet, summary_row, total_cols)
+        summary_formulas = [worksheet.cell(row=summary_row, column=col).value for col in range(1, total_cols+1)]
 
         # Удаляем старые строки данных и итогов (если есть)
         for _ in range(len(block_data)):
@@ -846,9 +888,7 @@ class ExcelHandler:
         for i in range(len(block_data)):
             current_row = data_start_row + i
             worksheet.insert_rows(current_row)
-            for col in range(1, total_cols+1):
-                cell = worksheet.cell(row=current_row, column=col)
-                self._apply_cell_style(cell, template_styles[col-1])
+            style_registry.apply_row_styles(worksheet, current_row, template_styles)
 
         # Универсально заполняем значения по header-правилам
         for i, block_info in enumerate(block_data):
@@ -877,9 +917,7 @@ class ExcelHandler:
         # Вставляем строку итогов сразу после данных
         summary_row_new = data_start_row + len(block_data)
         worksheet.insert_rows(summary_row_new)
-        for col in range(1, total_cols+1):
-            cell = worksheet.cell(row=summary_row_new, column=col)
-            self._apply_cell_style(cell, summary_styles[col-1])
+        style_registry.apply_row_styles(worksheet, summary_row_new, summary_styles)
         
         # Корректируем формулы для нового количества строк данных
         updated_summary_formulas = []
@@ -912,43 +950,11 @@ class ExcelHandler:
             formula_to_apply = updated_summary_formulas[col - 1] if col - 1 < len(updated_summary_formulas) else summary_formulas[col-1]
             cell.value = formula_to_apply
 
-    def _copy_cell_style(self, cell):
-        """Копирует стиль, формат, границы, заливку, выравнивание, font"""
-        from copy import copy
-        return {
-            'font': copy(cell.font),
-            'fill': copy(cell.fill),
-            'border': copy(cell.border),
-            'alignment': copy(cell.alignment),
-            'number_format': cell.number_format,
-        }
-
-    def _apply_cell_style(self, cell, style_dict):
-        cell.font = style_dict['font']
-        cell.fill = style_dict['fill']
-        cell.border = style_dict['border']
-        cell.alignment = style_dict['alignment']
-        cell.number_format = style_dict['number_format']
-
     def _col_letters_to_index(self, letters):
         # 'A'->1, 'B'->2, ..., 'AA'->27
         from openpyxl.utils import column_index_from_string
         return column_index_from_string(letters)
 
-    def _apply_borders_to_general_table(self, worksheet, data_count: int, data_start_row: int):
-        """Применяет границы к таблице данных общего отчета"""
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-        
-        # Применяем границы к области ДАННЫХ (не заголовков)
-        for row in range(data_start_row, data_start_row + data_count):
-            for col in range(1, 9):  # A-H столбцы
-                worksheet.cell(row=row, column=col).border = thin_border
-
     def _get_all_vacation_periods_from_blocks(self, block_data: List[Dict]) -> List[VacationPeriod]:
         """Собирает все периоды отпусков из всех блоков"""
         all_periods = []
@@ -962,38 +968,8 @@ class ExcelHandler:
         return all_periods
 
     def _parse_date(self, value) -> Optional[date]:
-        """Парсит дату из различных форматов"""
-        if value is None:
-            return None
-        
-        # Если это уже объект date или datetime
-        if isinstance(value, date):
-            return value
-        if hasattr(value, 'date'):
-            return value.date()
-            
-        # Если это строка, пробуем различные форматы
-        if isinstance(value, str):
-            value = value.strip()
-            if not value:
-                return None
-        
-            # Пробуем стандартные форматы
-            date_formats = [
-                '%d.%m.%Y',
-                '%d/%m/%Y', 
-                '%Y-%m-%d',
-                '%d.%m.%y',
-                '%d/%m/%y'
-            ]
-            
-            for fmt in date_formats:
-                try:
-                    return datetime.strptime(value, fmt).date()
-                except ValueError:
-                    continue
-        
-        return None
+        """Парсит дату из различных форматов (общий кэширующий парсер)"""
+        return parse_date(value)
 
     def generate_output_filename(self, employee: Dict[str, str]) -> str:
         """Генерирует имя файла для сотрудника"""
@@ -1001,6 +977,51 @@ class ExcelHandler:
         clean_tab_num = self._clean_filename(employee['Табельный номер'])
         return f"{clean_fio} ({clean_tab_num}).xlsx"
 
+    def get_template_version(self) -> str:
+        """Версия шаблона сотрудника - имя файла шаблона без расширения"""
+        return Path(self.config.employee_template).stem
+
+    def get_header_cells(self) -> List[HeaderCell]:
+        """
+        Ячейки value-правил шаблона сотрудника (куда генератор пишет поля штатного расписания)
+
+        Лист и ячейка определяются так же, как при создании файла: без листа
+        или с неизвестным листом - первый лист, для диапазона - его первая ячейка.
+
+        Raises:
+            ValueError: правило задано именованным диапазоном
+        """
+        template_path = str(self.config.employee_template)
+        rules = self._get_cached_rules(template_path)
+        sheet_names = self._get_cached_template_workbook(template_path).sheetnames
+
+        cells = []
+        for cell_address, field_name in rules.get('value', {}).items():
+            _, clean_address, sheet_name = self._parse_cell_address(cell_address)
+            address = clean_address.split(':')[0].replace('$', '')
+            if not re.match(r'^[A-Z]+[0-9]+$', address):
+                raise ValueError(f"Правило '{cell_address}' не является адресом ячейки, обновление шапки невозможно")
+            if sheet_name not in sheet_names:
+                sheet_name = sheet_names[0]
+            cells.append(HeaderCell(sheet_name, address, field_name))
+        return cells
+
+    def get_header_value(self, employee: Dict[str, Any], field_name: str) -> Any:
+        """Значение поля сотрудника в том виде, в котором оно пишется в файл"""
+        return self._convert_value_type(employee.get(field_name, ''))
+
+    def build_header_task(self, employee: Dict[str, Any], file_path: str,
+                          header_cells: List[HeaderCell]) -> Dict[str, Any]:
+        """Задача сверки шапки файла сотрудника для update_employee_headers"""
+        return {
+            'file_path': file_path,
+            'employee_name': employee['ФИО работника'],
+            'cells': [
+                (cell.sheet_name, cell.address, cell.field_name, self.get_header_value(employee, cell.field_name))
+                for cell in header_cells
+            ]
+        }
+
     def generate_block_report_filename(self, block_name: str) -> str:
         """Генерирует имя файла отчета по блоку"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль расчета статуса формы сотрудника без пересчета формул в Excel
+"""
+
+import bisect
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from config import Config
+from core.date_parser import parse_date
+from models import VacationPeriod, VacationStatus
+
+
+# Листы шаблона формы сотрудника (v4.4)
+CALCULATION_SHEET = 'Расчёт'
+HOLIDAYS_SHEET = 'Справочник праздничных дней'
+USED_DAYS_SHEET = 'Справочник отпусков 2025 скрыть'
+
+# Ячейки листа расчета: код графика, табельный номер, дата выгрузки, лимит аванса
+# и первая дата технической таблицы календаря (определяет год планирования)
+SCHEDULE_CODE_CELL = 'C12'
+TAB_NUMBER_CELL = 'C9'
+EXPORT_DATE_CELL = 'C20'
+ADVANCE_LIMIT_CELL = 'F13'
+CALENDAR_START_CELL = 'R4'
+# Остатки к дате отсечки (основной, НРД, северный) и план начисления на год
+REMAINDER_CELLS = ('C14', 'C15', 'C16')
+PLANNED_CELLS = ('C17', 'C18', 'C19')
+# Федеральные праздники (O4:O16) и число строк под региональные (O17:O35)
+FEDERAL_HOLIDAYS_RANGE = (4, 16)
+HOLIDAYS_COLUMN = 'O'
+REGIONAL_HOLIDAYS_LIMIT = 19
+# Справочник праздничных дней: дата (E) и код графика (F) в строках 2-74
+HOLIDAY_DATE_COLUMN = 5
+HOLIDAY_CODE_COLUMN = 6
+HOLIDAYS_FIRST_ROW = 2
+HOLIDAYS_LAST_ROW = 74
+# Значение IFERROR формулы региональных праздников
+NO_HOLIDAY = date(2099, 12, 31)
+# Ячейка оклада на форме: заполненный оклад делает форму некорректной
+SALARY_CELL = 'K12'
+
+# Минимальная продолжительность одного из периодов
+LONG_PERIOD_DAYS = 14
+# Средний месяц в формуле накопления дней до конца предыдущего года
+DAYS_PER_MONTH = 29.3
+# Пустая ячейка даты в Excel - серийный номер 0
+EXCEL_EPOCH = date(1899, 12, 30)
+
+SALARY_ERROR = "(УДАЛИТЕ ОКЛАД ПЕРЕД СОХРАНЕНИЕМ)"
+NO_LONG_PERIOD_ERROR = "(Период продолжительностью в 14 дней: отсутствует)"
+PLAN_ERROR = "(не задан план начисления дней отпуска)"
+PERIOD_TOO_SHORT_ERROR = "ОШИБКА: Указанный период имеет продолжительность менее 1 дня"
+PERIOD_OVERLAP_ERROR = "ОШИБКА: Указанный период содержит пересечение с другим периодом"
+ADVANCE_LIMIT_ERROR = "ОШИБКА: Указанный период превышает лимит отпуска в аванс"
+INVALID_DATE_ERROR = "ОШИБКА: Дата периода не распознана"
+HOLIDAYS_NOTE = "ПРИМЕЧАНИЕ: В указанном периоде учтены праздничные дни"
+ERROR_MARKER = "ОШИБКА"
+
+
+@dataclass
+class FormInputs:
+    """Входные данные формы, от которых зависит статус (значения ячеек, не формулы)"""
+    # Строки периодов: (начало, окончание) как записаны в ячейках
+    period_cells: List[Tuple[Any, Any]]
+    salary_filled: bool
+    remainders: Tuple[float, float, float]
+    planned: Tuple[float, float, float]
+    export_date: date
+    used_days: float
+    advance_limit: float
+    holidays: FrozenSet[date]
+    calendar_year: int
+    # Региональные праздники в порядке ячеек O17:O35
+    regional_holidays: List[date] = field(default_factory=list)
+
+
+@dataclass
+class FormStatus:
+    """Результат расчета статуса формы (аналог ячейки B12 и столбцов E/H)"""
+    status: VacationStatus
+    text: str
+    periods: List[VacationPeriod] = field(default_factory=list)
+    remaining_days: Optional[int] = None
+    row_errors: Dict[int, List[str]] = field(default_factory=dict)
+
+
+@dataclass
+class PeriodRow:
+    """Заполненная строка периода формы (обе даты указаны)"""
+    index: int
+    start: Optional[date]
+    end: Optional[date]
+    # Продолжительность без праздников (E); None - дата не распознана (#ЗНАЧ!)
+    days: Optional[int]
+    # Текст проверки (H); None - значение ошибки Excel
+    check: Optional[str] = None
+
+
+@dataclass
+class FormCalculation:
+    """Промежуточные значения формул формы (лист формы и лист расчета)"""
+    rows: List[PeriodRow]
+    monthly_accrual: float                                  # Расчёт!F4
+    accrued: float                                          # Расчёт!F5
+    used_days: float                                        # Расчёт!F6
+    # Остатки к 31.12 по видам отпуска (F7:F9); None - #ДЕЛ/0! при нулевом плане
+    year_end_remainders: Optional[Tuple[float, float, float]]
+    usage: List[int]                                        # Расчёт!K4:K15
+    # Месячный баланс (L4:L15) и остаток к распределению (H8); None - #ДЕЛ/0!
+    balances: Optional[List[float]]
+    remaining_days: Optional[int]
+    distributed: int                                        # G8
+    status: FormStatus
+
+
+class _CalendarTable:
+    """Праздники и границы месяцев года, общие для всех форм с одним набором праздников"""
+
+    def __init__(self, holidays: FrozenSet[date], year: int):
+        self.holidays = sorted(holidays)
+        self.months = []
+        for month in range(1, 13):
+            first = date(year, month, 1)
+            last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+            self.months.append((first, last))
+
+    def is_holiday(self, day: date) -> bool:
+        """Дата входит в список праздников"""
+        position = bisect.bisect_left(self.holidays, day)
+        return position < len(self.holidays) and self.holidays[position] == day
+
+    def count_holidays(self, start: date, end: date) -> int:
+        """Количество праздников в [start, end]"""
+        return bisect.bisect_right(self.holidays, end) - bisect.bisect_left(self.holidays, start)
+
+    def working_days(self, start: date, end: date) -> int:
+        """NETWORKDAYS.INTL(start, end, "0000000", праздники): дни без праздников, со знаком"""
+        if start > end:
+            return -self.working_days(end, start)
+        return (end - start).days + 1 - self.count_holidays(start, end)
+
+    def monthly_usage(self, intervals: List[Tuple[date, date]]) -> List[int]:
+        """
+        Дни отпуска по месяцам года (столбец K листа расчета)
+
+        День учитывается один раз, даже если попадает в несколько периодов,
+        праздники не учитываются.
+        """
+        merged: List[Tuple[date, date]] = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+
+        usage = []
+        for first, last in self.months:
+            days = 0
+            for start, end in merged:
+                overlap_start, overlap_end = max(start, first), min(end, last)
+                if overlap_start <= overlap_end:
+                    days += self.working_days(overlap_start, overlap_end)
+            usage.append(days)
+        return usage
+
+
+@lru_cache(maxsize=64)
+def _get_calendar_table(holidays: FrozenSet[date], year: int) -> _CalendarTable:
+    """Таблица календаря для набора праздников (одна на все формы с тем же графиком)"""
+    return _CalendarTable(holidays, year)
+
+
+def _is_blank(value: Any) -> bool:
+    """Пустая ячейка в смысле Excel (C15="")"""
+    return value is None or value == ''
+
+
+def _number(value: Any, cell: str) -> float:
+    """Числовое значение ячейки (пустая ячейка - 0, как в Excel)"""
+    if _is_blank(value):
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().replace('\xa0', '').replace(' ', '').replace(',', '.'))
+    except ValueError:
+        raise ValueError(f"Нечисловое значение '{value}' в ячейке {CALCULATION_SHEET}!{cell}")
+
+
+def _excel_number_text(value: float) -> str:
+    """TEXT(value; "0,00"): два знака после запятой, округление от нуля"""
+    rounded = math.floor(abs(value) * 100 + 0.5) / 100
+    return f"{math.copysign(rounded, value) if rounded else 0.0:.2f}".replace('.', ',')
+
+
+def _lookup_key(value: Any) -> str:
+    """Ключ сравнения табельного номера или кода графика (153622 == '153622' == 153622.0)"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() if value is not None else ''
+
+
+class FormStatusCalculator:
+    """
+    Расчет статуса формы сотрудника по логике шаблона v4.4
+
+    Повторяет формулы шаблона: продолжительность периодов без праздников
+    (столбец E), проверки периодов (столбец H: длительность, пересечения,
+    лимит аванса по месячному балансу листа расчета), остаток к распределению
+    (H8) и итоговый статус (B12). Используются только введенные значения,
+    поэтому результат не зависит от того, пересчитывал ли Excel файл.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+
+    def read_inputs(self, workbook) -> FormInputs:
+        """
+        Читает входные данные формы из открытой книги сотрудника
+
+        Raises:
+            ValueError: в книге нет листов шаблона или значения нечисловые
+        """
+        for sheet_name in (CALCULATION_SHEET, HOLIDAYS_SHEET, USED_DAYS_SHEET):
+            if sheet_name not in workbook.sheetnames:
+                raise ValueError(f"В файле нет листа '{sheet_name}' шаблона формы сотрудника")
+
+        structure = self.config.employee_file_structure
+        form = workbook.worksheets[structure["active_sheet_index"]]
+        calculation = workbook[CALCULATION_SHEET]
+        rows = structure["employee_data_rows"]
+        columns = structure["vacation_columns"]
+
+        period_cells = [
+            (form[f"{columns['start_date']}{row}"].value, form[f"{columns['end_date']}{row}"].value)
+            for row in range(rows["start"], rows["end"] + 1)
+        ]
+
+        export_date = parse_date(calculation[EXPORT_DATE_CELL].value)
+        if export_date is None:
+            if not _is_blank(calculation[EXPORT_DATE_CELL].value):
+                raise ValueError(f"Не распознана дата выгрузки в ячейке {CALCULATION_SHEET}!{EXPORT_DATE_CELL}")
+            export_date = EXCEL_EPOCH
+
+        calendar_start = parse_date(calculation[CALENDAR_START_CELL].value)
+        if calendar_start is None:
+            raise ValueError(f"Нет даты календаря в ячейке {CALCULATION_SHEET}!{CALENDAR_START_CELL}")
+
+        federal_start, federal_end = FEDERAL_HOLIDAYS_RANGE
+        holidays = set()
+        for row in range(federal_start, federal_end + 1):
+            holiday = parse_date(calculation[f"{HOLIDAYS_COLUMN}{row}"].value)
+            if holiday is not None:
+                holidays.add(holiday)
+        regional_holidays = self._regional_holidays(workbook[HOLIDAYS_SHEET], calculation[SCHEDULE_CODE_CELL].value)
+        holidays.update(regional_holidays)
+
+        return FormInputs(
+            period_cells=period_cells,
+            salary_filled=not _is_blank(form[SALARY_CELL].value),
+            remainders=tuple(_number(calculation[cell].value, cell) for cell in REMAINDER_CELLS),
+            planned=tuple(_number(calculation[cell].value, cell) for cell in PLANNED_CELLS),
+            export_date=export_date,
+            used_days=self._used_days(workbook[USED_DAYS_SHEET], calculation[TAB_NUMBER_CELL].value),
+            advance_limit=_number(calculation[ADVANCE_LIMIT_CELL].value, ADVANCE_LIMIT_CELL),
+            holidays=frozenset(holidays),
+            calendar_year=calendar_start.year,
+            regional_holidays=regional_holidays
+        )
+
+    def _regional_holidays(self, worksheet, schedule_code: Any) -> List[date]:
+        """
+        Региональные праздники графика - значения O17:O35 листа расчета
+
+        Формула шаблона передает в INDEX(E2:E74; ...) абсолютный номер строки
+        (ROW), поэтому Excel берет дату из строки, следующей за найденной.
+        Расчет повторяет это поведение, чтобы совпадать с Excel.
+        """
+        code = _lookup_key(schedule_code)
+        rows = list(worksheet.iter_rows(min_row=HOLIDAYS_FIRST_ROW, max_row=HOLIDAYS_LAST_ROW,
+                                        min_col=HOLIDAY_DATE_COLUMN, max_col=HOLIDAY_CODE_COLUMN,
+                                        values_only=True))
+        holidays = []
+        for position, (_, row_code) in enumerate(rows):
+            if len(holidays) == REGIONAL_HOLIDAYS_LIMIT:
+                break
+            if _lookup_key(row_code) != code:
+                continue
+            # INDEX(E2:E74; ROW()) - позиция в диапазоне равна номеру строки листа
+            index = position + HOLIDAYS_FIRST_ROW
+            if index > len(rows):
+                holidays.append(NO_HOLIDAY)
+                continue
+            value = rows[index - 1][0]
+            holiday = parse_date(value)
+            if holiday is None:
+                if not _is_blank(value):
+                    raise ValueError(f"Не распознана дата праздника '{value}' в листе '{HOLIDAYS_SHEET}'")
+                holiday = EXCEL_EPOCH
+            holidays.append(holiday)
+
+        holidays.extend([NO_HOLIDAY] * (REGIONAL_HOLIDAYS_LIMIT - len(holidays)))
+        return holidays
+
+    def _used_days(self, worksheet, tab_number: Any) -> float:
+        """Дни отпуска, использованные после отсечки (SUMIF по табельному номеру)"""
+        key = _lookup_key(tab_number)
+        total = 0.0
+        for tab, days in worksheet.iter_rows(min_row=2, max_col=2, values_only=True):
+            if _lookup_key(tab) == key and isinstance(days, (int, float)):
+                total += days
+        return total
+
+    def evaluate(self, inputs: FormInputs) -> FormStatus:
+        """Рассчитывает статус одной формы"""
+        return self.calculate(inputs).status
+
+    def calculate(self, inputs: FormInputs) -> FormCalculation:
+        """Рассчитывает все промежуточные значения формул одной формы"""
+        return self._calculate(inputs, _get_calendar_table(inputs.holidays, inputs.calendar_year))
+
+    def calendar_table(self, inputs: FormInputs) -> _CalendarTable:
+        """Таблица календаря формы (праздники и границы месяцев)"""
+        return _get_calendar_table(inputs.holidays, inputs.calendar_year)
+
+    def evaluate_many(self, inputs_list: Sequence[FormInputs]) -> List[FormStatus]:
+        """
+        Рассчитывает статусы всего набора форм за один проход
+
+        Формы группируются по набору праздников: таблица календаря строится
+        один раз на группу, а сами формы считаются без обращения к книгам.
+        """
+        tables: Dict[Tuple[FrozenSet[date], int], _CalendarTable] = {}
+        results = []
+        for inputs in inputs_list:
+            key = (inputs.holidays, inputs.calendar_year)
+            table = tables.get(key)
+            if table is None:
+                table = tables[key] = _get_calendar_table(*key)
+            results.append(self._calculate(inputs, table).status)
+
+        self.logger.debug(f"Рассчитаны статусы форм: {len(results)}, календарей: {len(tables)}")
+        return results
+
+    def _calculate(self, inputs: FormInputs, table: _CalendarTable) -> FormCalculation:
+        """Формулы шаблона в порядке вычисления Excel"""
+        # Строки с обеими датами (E<>"") и их продолжительность (E)
+        rows: List[PeriodRow] = []
+        for row_index, (start_value, end_value) in enumerate(inputs.period_cells):
+            if _is_blank(start_value) or _is_blank(end_value):
+                continue
+            start, end = parse_date(start_value), parse_date(end_value)
+            if start is None or end is None:
+                rows.append(PeriodRow(row_index, start, end, None))
+                continue
+            rows.append(PeriodRow(row_index, start, end, table.working_days(start, end)))
+        valid_rows = [row for row in rows if row.days is not None]
+
+        # Лист расчета: начисление в месяц (F4), накопление до конца прошлого года (F5)
+        planned_total = sum(inputs.planned)
+        monthly_accrual = planned_total / 12
+        accrued = ((date(inputs.calendar_year - 1, 12, 31) - inputs.export_date).days / DAYS_PER_MONTH) * monthly_accrual
+        usage = table.monthly_usage([(min(row.start, row.end), max(row.start, row.end)) for row in valid_rows])
+        distributed = sum(row.days for row in valid_rows if row.days > 0)
+
+        year_end_remainders = None
+        balances = None
+        remaining_days = None
+        if planned_total != 0:
+            # Остатки к 31.12 (F7:F9) делятся пропорционально плану
+            year_end_remainders = tuple(
+                remainder + planned / planned_total * (accrued - inputs.used_days)
+                for remainder, planned in zip(inputs.remainders, inputs.planned)
+            )
+            # Месячный баланс с учетом введенных периодов (L4:L15)
+            balances = []
+            balance = sum(year_end_remainders)
+            for month_usage in usage:
+                balance += monthly_accrual - month_usage
+                balances.append(balance)
+            # Осталось распределить (H8) с округлением шаблона
+            remaining = sum(year_end_remainders) + planned_total - distributed
+            if math.fmod(abs(remaining), 1) >= 0.9:
+                remaining_days = int(math.copysign(math.ceil(abs(remaining)), remaining))
+            else:
+                remaining_days = int(math.trunc(remaining))
+
+        # Проверки периодов (столбец H)
+        for row in rows:
+            row.check = self._check_period(row, valid_rows, balances, inputs.advance_limit)
+
+        return FormCalculation(
+            rows=rows,
+            monthly_accrual=monthly_accrual,
+            accrued=accrued,
+            used_days=inputs.used_days,
+            year_end_remainders=year_end_remainders,
+            usage=usage,
+            balances=balances,
+            remaining_days=remaining_days,
+            distributed=distributed,
+            status=self._status(inputs, rows, remaining_days)
+        )
+
+    def _check_period(self, row: PeriodRow, rows: List[PeriodRow], balances: Optional[List[float]],
+                      advance_limit: float) -> Optional[str]:
+        """Текст проверки периода (столбец H); None - значение ошибки Excel"""
+        if row.days is None:
+            return None
+        if row.days < 1:
+            return PERIOD_TOO_SHORT_ERROR
+        if any(other.index != row.index and other.start <= row.end and other.end >= row.start for other in rows):
+            return PERIOD_OVERLAP_ERROR
+        if balances is None:
+            return None
+
+        start_balance = balances[row.start.month - 1]
+        end_balance = balances[row.end.month - 1]
+        start_exceeded = start_balance < advance_limit
+        end_exceeded = row.start.month != row.end.month and end_balance < advance_limit
+        if start_exceeded or end_exceeded:
+            parts = []
+            if start_exceeded:
+                parts.append(f"{ADVANCE_LIMIT_ERROR}\nАванс: {_excel_number_text(start_balance)} "
+                             f"Лимит: {_excel_number_text(advance_limit)}")
+            if end_exceeded:
+                parts.append(f"{ADVANCE_LIMIT_ERROR}\nАванс: {_excel_number_text(end_balance)} "
+                             f"Лимит: {_excel_number_text(advance_limit)}")
+            return "\n".join(parts)
+
+        if (row.end - row.start).days + 1 != row.days:
+            return HOLIDAYS_NOTE
+        return ""
+
+    def _status(self, inputs: FormInputs, rows: List[PeriodRow], remaining_days: Optional[int]) -> FormStatus:
+        """Итоговый статус формы (B12)"""
+        statuses = self.config.validation_statuses
+        # COUNTIF(H15:H29; "*ОШИБКА*"): значения ошибок Excel не учитываются
+        row_errors = {}
+        for row in rows:
+            if row.days is None:
+                row_errors[row.index] = [INVALID_DATE_ERROR]
+            elif row.check is not None and ERROR_MARKER in row.check:
+                row_errors[row.index] = [row.check]
+
+        if inputs.salary_filled:
+            return FormStatus(VacationStatus.FILLED_INCORRECT,
+                              f"{statuses['filled_incorrect']}\n{SALARY_ERROR}", row_errors=row_errors)
+
+        if not rows:
+            return FormStatus(VacationStatus.NOT_FILLED, statuses['not_filled'])
+
+        if row_errors:
+            return FormStatus(VacationStatus.FILLED_INCORRECT, statuses['filled_incorrect'],
+                              remaining_days=remaining_days, row_errors=row_errors)
+
+        if remaining_days is None:
+            # В шаблоне остатки делятся на сумму плана: без плана формулы дают #ДЕЛ/0!
+            return FormStatus(VacationStatus.FILLED_INCORRECT, f"{statuses['filled_incorrect']}\n{PLAN_ERROR}")
+
+        has_long_period = any(row.days >= LONG_PERIOD_DAYS for row in rows)
+        if has_long_period and remaining_days == 0:
+            periods = [VacationPeriod(row.start, row.end, row.days) for row in rows if row.days > 0]
+            return FormStatus(VacationStatus.FILLED_CORRECT, statuses['filled_correct'],
+                              periods=periods, remaining_days=remaining_days)
+
+        text = statuses['filled_incorrect']
+        if remaining_days != 0:
+            text += f"\n(осталось распределить дней: {remaining_days})"
+        if not has_long_period:
+            text += f"\n{NO_LONG_PERIOD_ERROR}"
+        return FormStatus(VacationStatus.FILLED_INCORRECT, text, remaining_days=remaining_days)
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль записи рассчитанных значений формул в файлы сотрудников
+"""
+
+import logging
+import math
+import os
+import re
+import shutil
+import zipfile
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+
+from config import Config
+from core.date_parser import parse_date
+from core.form_status import (
+    CALCULATION_SHEET, EXCEL_EPOCH, HOLIDAYS_COLUMN, REGIONAL_HOLIDAYS_LIMIT, SALARY_CELL,
+    FormCalculation, FormInputs, FormStatusCalculator, PLAN_ERROR
+)
+from core.report_stream_writer import resolve_sheet_parts
+
+
+# Ячейки формулы региональных праздников (массив O17:O35)
+REGIONAL_HOLIDAYS_FIRST_ROW = 17
+# Техническая таблица календаря листа расчета: дата (R) и отметка отпуска (S)
+CALENDAR_DATE_COLUMN = 'R'
+CALENDAR_FLAG_COLUMN = 'S'
+CALENDAR_FIRST_ROW = 4
+# Месячные строки листа расчета (январь-декабрь)
+MONTH_FIRST_ROW = 4
+# Итоги формы: распределить всего, распределено, осталось распределить, статус
+TOTAL_CELL = 'F8'
+DISTRIBUTED_CELL = 'G8'
+REMAINING_CELL = 'H8'
+STATUS_CELL = 'B12'
+# Столбцы строк периодов: продолжительность, проверка, дни к оплате, сумма
+DAYS_COLUMN = 'E'
+CHECK_COLUMN = 'H'
+PAY_DAYS_COLUMN = 'J'
+PAY_AMOUNT_COLUMN = 'K'
+# Коэффициент дней к оплате из формулы J15: ROUND(E15*14.4/29.3/12; 2)
+PAY_DAYS_FACTOR = 14.4 / 29.3 / 12
+# Формула заголовка накопления: ="текст (" & TEXT(C20,"ДД.ММ.ГГГГ") & ") текст"
+ACCRUED_TITLE_CELL = 'E5'
+ACCRUED_TITLE_RE = re.compile(r'^="([^"]*)"\s*&\s*TEXT\(C20,\s*"ДД\.ММ\.ГГГГ"\)\s*&\s*"([^"]*)"$')
+# TEXT(0; "ДД.ММ.ГГГГ") для пустой даты выгрузки
+ZERO_DATE_TEXT = "00.01.1900"
+
+# Простая ссылка: =Лист!A1, ='Лист'!$A$1, =A1
+REFERENCE_RE = re.compile(r"^=(?:'?([^'!]+)'?!)?\$?([A-Z]+)\$?(\d+)$")
+CELL_RE = re.compile(rb'<c r="([A-Z]+\d+)"([^>]*?)>(<f\b[^>]*?(?:/>|>.*?</f>))<v\s*(?:/>|></v>)</c>', re.DOTALL)
+TYPE_ATTR_RE = re.compile(rb'\st="[^"]*"')
+# Ячейка с формулой в XML листа
+FORMULA_CELL_RE = re.compile(rb'<c r="([A-Z]+\d+)"[^>]*>\s*<f\b')
+
+
+class ExcelError(str):
+    """Значение ошибки Excel (#ДЕЛ/0!, #ЗНАЧ!) для записи в кэш формулы"""
+
+
+DIV0_ERROR = ExcelError('#DIV/0!')
+VALUE_ERROR = ExcelError('#VALUE!')
+
+
+def _round_half_away(value: float, digits: int) -> float:
+    """ROUND Excel: половина округляется от нуля"""
+    factor = 10 ** digits
+    return math.copysign(math.floor(abs(value) * factor + 0.5) / factor, value)
+
+
+def _serial(value: Any) -> Any:
+    """Дата Excel - серийный номер дня (1899-12-30 = 0)"""
+    if isinstance(value, datetime):
+        delta = value - datetime(EXCEL_EPOCH.year, EXCEL_EPOCH.month, EXCEL_EPOCH.day)
+        return delta.days + delta.seconds / 86400
+    if isinstance(value, date):
+        return (value - EXCEL_EPOCH).days
+    return value
+
+
+class EmployeeFormulaCache:
+    """
+    Кэшированные значения формул файла сотрудника
+
+    openpyxl сохраняет формулы без результатов, поэтому Excel при открытии
+    пересчитывает всю книгу, а чтение с data_only=True видит None. Значения
+    формул шаблона рассчитываются по исходным данным (FormStatusCalculator),
+    дописываются в XML сохраненного файла, а полный пересчет при открытии
+    отключается. Если какая-то формула книги не рассчитана, файл не
+    помечается как посчитанный - это ошибка шаблона.
+    """
+
+    def __init__(self, config: Config, calculator: FormStatusCalculator):
+        self.config = config
+        self.calculator = calculator
+        self.logger = logging.getLogger(__name__)
+        # Адреса формул шаблона: ((путь, размер, mtime_ns), {имя листа: [адреса]})
+        self._template_formulas: Optional[Tuple[Tuple[str, int, int], Dict[str, List[str]]]] = None
+
+    def prepare(self, workbook) -> Dict[str, Dict[str, Any]]:
+        """
+        Рассчитывает значения всех формул книги перед сохранением
+
+        Также записывает в книгу значения массива региональных праздников
+        и отключает полный пересчет при открытии.
+
+        Returns:
+            {имя листа: {адрес: значение}}
+
+        Raises:
+            ValueError: входные данные формы не распознаны или в книге есть
+                формулы, которые не рассчитываются
+        """
+        inputs = self.calculator.read_inputs(workbook)
+        calculation = self.calculator.calculate(inputs)
+        form = workbook.worksheets[self.config.employee_file_structure["active_sheet_index"]]
+        values: Dict[str, Dict[str, Any]] = {form.title: {}, CALCULATION_SHEET: {}}
+
+        self._form_values(form, inputs, calculation, values[form.title])
+        self._calculation_values(workbook[CALCULATION_SHEET], inputs, calculation, values[CALCULATION_SHEET])
+        self._write_regional_holidays(workbook[CALCULATION_SHEET], inputs)
+        self._reference_values(workbook, values)
+
+        workbook.calculation.fullCalcOnLoad = False
+        return values
+
+    def _form_values(self, form, inputs: FormInputs, calculation: FormCalculation, values: Dict[str, Any]) -> None:
+        """Итоги, статус и столбцы E/H/J/K строк периодов"""
+        remainders = calculation.year_end_remainders
+        values[TOTAL_CELL] = sum(remainders) + sum(inputs.planned) if remainders is not None else DIV0_ERROR
+        values[DISTRIBUTED_CELL] = calculation.distributed
+        values[REMAINING_CELL] = calculation.remaining_days if calculation.remaining_days is not None else DIV0_ERROR
+        values[STATUS_CELL] = self._status_value(calculation)
+
+        rows = self.config.employee_file_structure["employee_data_rows"]
+        periods = {row.index: row for row in calculation.rows}
+        salary = form[SALARY_CELL].value
+        for row_index, row_number in enumerate(range(rows["start"], rows["end"] + 1)):
+            period = periods.get(row_index)
+            if period is None:
+                days = check = pay_days = pay_amount = ''
+            elif period.days is None:
+                days = check = pay_days = pay_amount = VALUE_ERROR
+            else:
+                days = period.days
+                check = period.check if period.check is not None else DIV0_ERROR
+                pay_days = _round_half_away(days * PAY_DAYS_FACTOR, 2)
+                pay_amount = '' if salary is None or salary == '' else self._salary_amount(salary, pay_days)
+            values[f"{DAYS_COLUMN}{row_number}"] = days
+            values[f"{CHECK_COLUMN}{row_number}"] = check
+            values[f"{PAY_DAYS_COLUMN}{row_number}"] = pay_days
+            values[f"{PAY_AMOUNT_COLUMN}{row_number}"] = pay_amount
+
+    def _status_value(self, calculation: FormCalculation) -> Any:
+        """Значение B12: текст статуса, а при нулевом плане - ошибка #ДЕЛ/0!, как в Excel"""
+        if calculation.status.text.endswith(PLAN_ERROR):
+            return DIV0_ERROR
+        return calculation.status.text
+
+    def _salary_amount(self, salary: Any, pay_days: float) -> Any:
+        """K15: оклад * дни к оплате"""
+        if isinstance(salary, (int, float)):
+            return salary * pay_days
+        return VALUE_ERROR
+
+    def _calculation_values(self, worksheet, inputs: FormInputs, calculation: FormCalculation,
+                            values: Dict[str, Any]) -> None:
+        """Лист расчета: параметры F4:F9, помесячные J/K/L, отметки календаря S, заголовок E5"""
+        title = worksheet[ACCRUED_TITLE_CELL].value
+        match = ACCRUED_TITLE_RE.match(title) if isinstance(title, str) else None
+        if match is None:
+            raise ValueError(f"Неизвестная формула {CALCULATION_SHEET}!{ACCRUED_TITLE_CELL}: {title}")
+        export_date = ZERO_DATE_TEXT if inputs.export_date == EXCEL_EPOCH else inputs.export_date.strftime('%d.%m.%Y')
+        values[ACCRUED_TITLE_CELL] = f"{match.group(1)}{export_date}{match.group(2)}"
+
+        values['F4'] = calculation.monthly_accrual
+        values['F5'] = calculation.accrued
+        values['F6'] = calculation.used_days
+        remainders = calculation.year_end_remainders
+        for offset in range(3):
+            values[f"F{7 + offset}"] = remainders[offset] if remainders is not None else DIV0_ERROR
+
+        previous_balance = sum(remainders) if remainders is not None else None
+        for month in range(12):
+            row = MONTH_FIRST_ROW + month
+            values[f"K{row}"] = calculation.usage[month]
+            if calculation.balances is None:
+                values[f"J{row}"] = values[f"L{row}"] = DIV0_ERROR
+                continue
+            values[f"J{row}"] = calculation.monthly_accrual + previous_balance
+            values[f"L{row}"] = calculation.balances[month]
+            previous_balance = calculation.balances[month]
+
+        # Дата отмечена на форме и не является праздником
+        table = self.calculator.calendar_table(inputs)
+        intervals = [
+            (min(row.start, row.end), max(row.start, row.end))
+            for row in calculation.rows if row.days is not None
+        ]
+        row = CALENDAR_FIRST_ROW
+        while True:
+            day = parse_date(worksheet[f"{CALENDAR_DATE_COLUMN}{row}"].value)
+            if day is None:
+                break
+            values[f"{CALENDAR_FLAG_COLUMN}{row}"] = (
+                not table.is_holiday(day) and any(start <= day <= end for start, end in intervals)
+            )
+            row += 1
+
+        values[f"{HOLIDAYS_COLUMN}{REGIONAL_HOLIDAYS_FIRST_ROW}"] = inputs.regional_holidays[0]
+
+    def _write_regional_holidays(self, worksheet, inputs: FormInputs) -> None:
+        """Остальные ячейки массива O17:O35 хранятся значениями - записываем праздники графика сотрудника"""
+        for offset in range(1, REGIONAL_HOLIDAYS_LIMIT):
+            cell = worksheet[f"{HOLIDAYS_COLUMN}{REGIONAL_HOLIDAYS_FIRST_ROW + offset}"]
+            cell.value = datetime.combine(inputs.regional_holidays[offset], datetime.min.time())
+
+    def _reference_values(self, workbook, values: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Значения формул-ссылок (=Расчёт!C10, =$F$4) и проверка, что рассчитаны все формулы
+
+        Raises:
+            ValueError: формула книги не рассчитана
+        """
+        unresolved = []
+        for sheet_name, addresses in self._template_formula_cells().items():
+            worksheet = workbook[sheet_name]
+            sheet_values = values.setdefault(sheet_name, {})
+            for address in addresses:
+                if worksheet[address].data_type != 'f' or address in sheet_values:
+                    continue
+                value = self._resolve_reference(workbook, sheet_name, address, values, set())
+                if value is None:
+                    unresolved.append(f"{sheet_name}!{address}")
+                else:
+                    sheet_values[address] = value
+
+        if unresolved:
+            raise ValueError(f"Не рассчитаны формулы шаблона: {', '.join(unresolved[:10])}"
+                             + (f" и еще {len(unresolved) - 10}" if len(unresolved) > 10 else ""))
+
+    def _template_formula_cells(self) -> Dict[str, List[str]]:
+        """
+        Адреса ячеек с формулами шаблона сотрудника по листам
+
+        Читаются из XML шаблона (перечитываются при его изменении): обход листа
+        через iter_rows создал бы пустые ячейки всего диапазона листа.
+        """
+        path = Path(self.config.employee_template)
+        stat = path.stat()
+        key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        if self._template_formulas is not None and self._template_formulas[0] == key:
+            return self._template_formulas[1]
+
+        with zipfile.ZipFile(path) as archive:
+            formula_cells = {
+                sheet_name: [match.group(1).decode("ascii") for match in FORMULA_CELL_RE.finditer(archive.read(part))]
+                for sheet_name, part in resolve_sheet_parts(archive).items()
+            }
+        self._template_formulas = (key, formula_cells)
+        return formula_cells
+
+    def _resolve_reference(self, workbook, sheet_name: str, address: str,
+                           values: Dict[str, Dict[str, Any]], visited: set) -> Any:
+        """Значение ячейки-ссылки; None - формула не является простой ссылкой"""
+        key = (sheet_name, address)
+        if key in visited:
+            return None
+        visited.add(key)
+
+        computed = values.get(sheet_name, {}).get(address)
+        if computed is not None:
+            return computed
+
+        cell = workbook[sheet_name][address]
+        if cell.data_type != 'f':
+            # Ссылка на пустую ячейку в Excel дает 0
+            return 0 if cell.value is None else cell.value
+
+        match = REFERENCE_RE.match(cell.value) if isinstance(cell.value, str) else None
+        if match is None:
+            return None
+        target_sheet = match.group(1) or sheet_name
+        if target_sheet not in workbook.sheetnames:
+            return None
+        return self._resolve_reference(workbook, target_sheet, f"{match.group(2)}{match.group(3)}", values, visited)
+
+    def write(self, file_path: str, values: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Дописывает значения формул в XML листов сохраненного файла
+
+        Returns:
+            int: количество записанных значений
+        """
+        written = 0
+        temp_path = f"{file_path}.cache.tmp"
+        try:
+            with zipfile.ZipFile(file_path) as source:
+                parts = {part: values[name] for name, part in resolve_sheet_parts(source).items() if values.get(name)}
+                with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as target:
+                    for item in source.infolist():
+                        sheet_values = parts.get(item.filename)
+                        if sheet_values is None:
+                            with source.open(item) as src, target.open(item, "w") as dst:
+                                shutil.copyfileobj(src, dst, 1024 * 1024)
+                            continue
+                        sheet_xml, count = self._patch_sheet(source.read(item), sheet_values)
+                        target.writestr(item, sheet_xml)
+                        written += count
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return written
+
+    def _patch_sheet(self, sheet_xml: bytes, values: Dict[str, Any]) -> Tuple[bytes, int]:
+        """Вставляет значения в ячейки формул листа"""
+        count = 0
+
+        def replace(match) -> bytes:
+            nonlocal count
+            address = match.group(1).decode("ascii")
+            if address not in values:
+                return match.group(0)
+            type_attr, value_xml = self._value_xml(values[address])
+            count += 1
+            attrs = TYPE_ATTR_RE.sub(b'', match.group(2))
+            return (b'<c r="' + match.group(1) + b'"' + attrs + type_attr + b'>'
+                    + match.group(3) + b'<v>' + value_xml + b'</v></c>')
+
+        return CELL_RE.sub(replace, sheet_xml), count
+
+    def _value_xml(self, value: Any) -> Tuple[bytes, bytes]:
+        """Тип и XML значения кэша формулы"""
+        if isinstance(value, ExcelError):
+            return b' t="e"', value.encode("ascii")
+        if isinstance(value, bool):
+            return b' t="b"', b'1' if value else b'0'
+        value = _serial(value)
+        if isinstance(value, (int, float)):
+            return b'', repr(value).encode("ascii")
+        return b' t="str"', escape(str(value)).encode("utf-8")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль обновления шапки существующих файлов сотрудников без пересоздания
+"""
+
+import os
+import re
+import shutil
+import time
+import traceback
+import zipfile
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.utils import column_index_from_string
+
+from core.cancellation import is_cancelled, worker_token
+from core.report_stream_writer import MAIN_NS, resolve_sheet_parts
+
+
+SHARED_STRINGS_PART = "xl/sharedStrings.xml"
+WORKBOOK_PART = "xl/workbook.xml"
+
+ADDRESS_RE = re.compile(r'^([A-Z]+)(\d+)$')
+CELL_ATTR_RE = re.compile(rb'\s(t|s)="([^"]*)"')
+VALUE_RE = re.compile(rb'<v>(.*?)</v>', re.DOTALL)
+TEXT_RE = re.compile(rb'<t\b[^>]*?(?:/>|>(.*?)</t>)', re.DOTALL)
+ROW_CELL_RE = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"')
+SHEET_DATA_RE = re.compile(rb'<sheetData\s*/>|<sheetData>(.*?)</sheetData>', re.DOTALL)
+ROW_START_RE = re.compile(rb'<row\b[^>]*?\br="(\d+)"[^>]*?(/?)>')
+CALC_PR_RE = re.compile(rb'<calcPr\b[^>]*?/>')
+FULL_CALC_RE = re.compile(rb'\sfullCalcOnLoad="[^"]*"')
+
+
+@dataclass(frozen=True)
+class HeaderCell:
+    """Ячейка value-правила шаблона: лист, адрес и поле штатного расписания"""
+    sheet_name: str
+    address: str
+    field_name: str
+
+
+@lru_cache(maxsize=256)
+def _cell_pattern(address: str) -> "re.Pattern":
+    """Элемент ячейки листа с заданным адресом (пустой или с содержимым)"""
+    return re.compile(rb'<c\b[^>]*?\br="' + address.encode("ascii") + rb'"[^>]*?(?:/>|>.*?</c>)', re.DOTALL)
+
+
+def _same_value(current: Any, expected: Any) -> bool:
+    """Совпадает ли значение ячейки с ожидаемым (число с числом, текст с текстом)"""
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        return isinstance(current, float) and current == expected
+    return isinstance(current, str) and current.strip() == str(expected).strip()
+
+
+class HeaderPatcher:
+    """
+    Правка ячеек value-правил в XML файла сотрудника
+
+    Файл не загружается через openpyxl: меняются только элементы нужных
+    ячеек в XML листов, остальное содержимое (строки периодов 15-29,
+    оформление, проверки данных) копируется из архива как есть. Значения
+    формул, зависящих от шапки, в файле устаревают, поэтому книга
+    помечается на полный пересчет при открытии в Excel.
+    """
+
+    def read_values(self, file_path: str, cells: Sequence[HeaderCell]) -> Dict[HeaderCell, Any]:
+        """
+        Текущие значения ячеек шапки
+
+        Returns:
+            {ячейка: float для чисел, str для текста, '' для пустой ячейки}
+
+        Raises:
+            ValueError: в файле нет листа из правил
+        """
+        with zipfile.ZipFile(file_path) as archive:
+            parts = self._sheet_parts(archive, cells)
+            shared_strings = self._shared_strings(archive)
+            values = {}
+            for part, part_cells in parts.items():
+                sheet_xml = archive.read(part)
+                for cell in part_cells:
+                    values[cell] = self._cell_value(sheet_xml, cell.address, shared_strings)
+        return values
+
+    def patch(self, file_path: str, changes: Dict[HeaderCell, Any]) -> None:
+        """
+        Записывает новые значения ячеек шапки и включает пересчет книги при открытии
+
+        Файл пишется во временный и заменяет исходный одной операцией.
+        """
+        temp_path = f"{file_path}.headers.tmp"
+        try:
+            with zipfile.ZipFile(file_path) as source:
+                parts = self._sheet_parts(source, list(changes))
+                with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as target:
+                    for item in source.infolist():
+                        if item.filename in parts:
+                            sheet_xml = source.read(item)
+                            for cell in parts[item.filename]:
+                                sheet_xml = self._set_cell(sheet_xml, cell.address, changes[cell])
+                            target.writestr(item, sheet_xml)
+                        elif item.filename == WORKBOOK_PART:
+                            target.writestr(item, self._force_full_calculation(source.read(item)))
+                        else:
+                            with source.open(item) as src, target.open(item, "w") as dst:
+                                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _sheet_parts(self, archive: zipfile.ZipFile, cells: Sequence[HeaderCell]) -> Dict[str, List[HeaderCell]]:
+        """Группирует ячейки по частям архива листов"""
+        sheet_parts = resolve_sheet_parts(archive)
+        parts: Dict[str, List[HeaderCell]] = {}
+        for cell in cells:
+            part = sheet_parts.get(cell.sheet_name)
+            if part is None:
+                raise ValueError(f"В файле нет листа '{cell.sheet_name}' для поля '{cell.field_name}'")
+            parts.setdefault(part, []).append(cell)
+        return parts
+
+    def _shared_strings(self, archive: zipfile.ZipFile) -> List[str]:
+        """Таблица общих строк книги"""
+        if SHARED_STRINGS_PART not in archive.namelist():
+            return []
+        root = ET.fromstring(archive.read(SHARED_STRINGS_PART))
+        return [
+            "".join(text.text or "" for text in item.iter(f"{MAIN_NS}t"))
+            for item in root.iter(f"{MAIN_NS}si")
+        ]
+
+    def _cell_value(self, sheet_xml: bytes, address: str, shared_strings: List[str]) -> Any:
+        """Значение ячейки из XML листа"""
+        match = _cell_pattern(address).search(sheet_xml)
+        if match is None:
+            return ''
+        element = match.group(0)
+        head = element[:element.index(b'>') + 1]
+        attrs = {name: value for name, value in CELL_ATTR_RE.findall(head)}
+        cell_type = attrs.get(b't', b'n')
+
+        if cell_type == b'inlineStr':
+            return unescape(b"".join(text or b"" for text in TEXT_RE.findall(element)).decode("utf-8"))
+        value_match = VALUE_RE.search(element)
+        if value_match is None:
+            return ''
+        raw = unescape(value_match.group(1).decode("utf-8"))
+        if cell_type == b's':
+            return shared_strings[int(raw)]
+        if cell_type == b'n':
+            return float(raw) if raw != '' else ''
+        return raw
+
+    def _cell_xml(self, address: str, style: Optional[bytes], value: Any) -> bytes:
+        """Элемент ячейки со значением: число, строка (inlineStr) или пустая ячейка"""
+        style_attr = b' s="' + style + b'"' if style is not None else b''
+        head = b'<c r="' + address.encode("ascii") + b'"' + style_attr
+        if value is None or value == '':
+            return head + b'/>'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return head + b'><v>' + repr(value).encode("ascii") + b'</v></c>'
+        return (head + b' t="inlineStr"><is><t xml:space="preserve">'
+                + escape(str(value)).encode("utf-8") + b'</t></is></c>')
+
+    def _set_cell(self, sheet_xml: bytes, address: str, value: Any) -> bytes:
+        """Заменяет ячейку в XML листа, сохраняя ее стиль; отсутствующая ячейка вставляется по порядку столбцов"""
+        match = _cell_pattern(address).search(sheet_xml)
+        if match is not None:
+            head = match.group(0)[:match.group(0).index(b'>') + 1]
+            style = dict(CELL_ATTR_RE.findall(head)).get(b's')
+            return sheet_xml[:match.start()] + self._cell_xml(address, style, value) + sheet_xml[match.end():]
+
+        if value is None or value == '':
+            return sheet_xml
+        letters, row_number = ADDRESS_RE.match(address).groups()
+        cell_xml = self._cell_xml(address, None, value)
+        return self._insert_cell(sheet_xml, int(row_number), column_index_from_string(letters), cell_xml)
+
+    def _insert_cell(self, sheet_xml: bytes, row_number: int, column: int, cell_xml: bytes) -> bytes:
+        """Вставляет ячейку в строку листа (строка создается, если ее нет)"""
+        sheet_data = SHEET_DATA_RE.search(sheet_xml)
+        if sheet_data is None:
+            raise ValueError("В листе нет элемента sheetData")
+        if sheet_data.group(1) is None:
+            new_data = b'<sheetData><row r="%d">' % row_number + cell_xml + b'</row></sheetData>'
+            return sheet_xml[:sheet_data.start()] + new_data + sheet_xml[sheet_data.end():]
+
+        for row in ROW_START_RE.finditer(sheet_xml, sheet_data.start(1), sheet_data.end(1)):
+            current = int(row.group(1))
+            if current < row_number:
+                continue
+            if current > row_number:
+                new_row = b'<row r="%d">' % row_number + cell_xml + b'</row>'
+                return sheet_xml[:row.start()] + new_row + sheet_xml[row.start():]
+            if row.group(2):
+                # Пустая строка <row .../>
+                opened = row.group(0)[:-2] + b'>'
+                return sheet_xml[:row.start()] + opened + cell_xml + b'</row>' + sheet_xml[row.end():]
+            row_end = sheet_xml.index(b'</row>', row.end())
+            position = row_end
+            for cell in ROW_CELL_RE.finditer(sheet_xml, row.end(), row_end):
+                if column_index_from_string(cell.group(1).decode("ascii")) > column:
+                    position = cell.start()
+                    break
+            return sheet_xml[:position] + cell_xml + sheet_xml[position:]
+
+        new_row = b'<row r="%d">' % row_number + cell_xml + b'</row>'
+        return sheet_xml[:sheet_data.end(1)] + new_row + sheet_xml[sheet_data.end(1):]
+
+    def _force_full_calculation(self, workbook_xml: bytes) -> bytes:
+        """Включает полный пересчет книги при открытии (calcPr fullCalcOnLoad="1")"""
+        match = CALC_PR_RE.search(workbook_xml)
+        if match is None:
+            return workbook_xml.replace(b'</workbook>', b'<calcPr fullCalcOnLoad="1"/></workbook>')
+        calc_pr = FULL_CALC_RE.sub(b'', match.group(0))
+        calc_pr = calc_pr[:-2].rstrip() + b' fullCalcOnLoad="1"/>'
+        return workbook_xml[:match.start()] + calc_pr + workbook_xml[match.end():]
+
+
+# Правщик создается один раз на процесс пула
+_patcher = HeaderPatcher()
+
+
+def update_employee_headers(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Сравнивает шапку файла сотрудника со штатным расписанием и правит отличия
+
+    Функция выполняется в процессе пула, поэтому принимает и возвращает
+    только простые данные. Файл без отличий не перезаписывается.
+
+    Args:
+        task: {'file_path', 'employee_name',
+               'cells': [(лист, адрес, поле, ожидаемое значение), ...]}
+
+    Returns:
+        Dict: {'file_path', 'employee_name', 'changes': [(поле, было, стало), ...],
+               'updated', 'cancelled', 'duration', 'error'}
+        (после отмены операции задача не начинается: cancelled = True)
+    """
+    start = time.perf_counter()
+    result = {
+        'file_path': task['file_path'],
+        'employee_name': task['employee_name'],
+        'changes': [],
+        'updated': False,
+        'cancelled': False,
+        'duration': 0.0,
+        'error': None
+    }
+    if is_cancelled(worker_token()):
+        result['cancelled'] = True
+        return result
+
+    try:
+        expected = {HeaderCell(sheet, address, field): value for sheet, address, field, value in task['cells']}
+        current = _patcher.read_values(task['file_path'], list(expected))
+        changes = {cell: value for cell, value in expected.items() if not _same_value(current[cell], value)}
+        result['changes'] = [(cell.field_name, current[cell], value) for cell, value in changes.items()]
+        if changes:
+            _patcher.patch(task['file_path'], changes)
+            result['updated'] = True
+    except Exception as e:
+        result['error'] = f"{e}\n{traceback.format_exc()}"
+
+    result['duration'] = time.perf_counter() - start
+    return result
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль настройки логирования приложения
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Профили подробности логирования на запуск: профиль -> уровень корневого логгера.
+# Сообщения по каждому файлу и папке пишутся на уровне DEBUG и видны только в verbose
+LOG_PROFILES = {
+    'quiet': logging.WARNING,
+    'normal': logging.INFO,
+    'verbose': logging.DEBUG,
+}
+
+_listener: Optional[QueueListener] = None
+_active_profile = 'normal'
+
+
+def profile_level(profile: str) -> int:
+    """
+    Уровень логирования профиля
+
+    Raises:
+        ValueError: неизвестный профиль
+    """
+    if profile not in LOG_PROFILES:
+        raise ValueError(f"Неизвестный профиль логирования: {profile} (доступны: {', '.join(LOG_PROFILES)})")
+    return LOG_PROFILES[profile]
+
+
+def current_profile() -> str:
+    """Профиль, с которым настроено логирование текущего процесса"""
+    return _active_profile
+
+
+def _stream_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return handler
+
+
+def _reset_root(level: int, handler: logging.Handler) -> None:
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+def setup_logging(profile: str = 'normal') -> None:
+    """
+    Настраивает логирование в консоль через очередь
+
+    Потоки приложения только кладут записи в очередь (QueueHandler), вывод
+    в консоль выполняет отдельный поток QueueListener: медленная консоль
+    Windows не задерживает обработку файлов. Очередь сбрасывается при
+    выходе из процесса (stop_logging).
+    """
+    global _listener, _active_profile
+    level = profile_level(profile)
+    stop_logging()
+
+    log_queue = queue.SimpleQueue()
+    _reset_root(level, QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, _stream_handler(), respect_handler_level=True)
+    _listener.start()
+    _active_profile = profile
+
+
+def stop_logging() -> None:
+    """Выводит оставшиеся в очереди записи и останавливает поток вывода"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def init_worker_logging(profile: str) -> None:
+    """
+    Логирование процесса пула: прямой вывод в консоль
+
+    Поток вывода очереди в процесс пула не переходит, а процессы пула пишут
+    в лог только ошибки отдельных файлов.
+    """
+    global _active_profile
+    _reset_root(profile_level(profile), _stream_handler())
+    _active_profile = profile
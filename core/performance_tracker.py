@@ -29,6 +29,25 @@ class FilePerformanceStats:
         self.error_message = error_message
 
 
+@dataclass
+class StagePerformanceStats:
+    """Статистика одного выполнения этапа операции (поиск, чтение, запись и т.п.)"""
+    name: str
+    title: str
+    start_time: float
+    end_time: Optional[float] = None
+    duration: Optional[float] = None
+    bytes_count: int = 0
+    rows_count: int = 0
+
+    def finish(self, bytes_count: int = 0, rows_count: int = 0):
+        """Завершает отслеживание этапа"""
+        self.end_time = time.time()
+        self.duration = self.end_time - self.start_time
+        self.bytes_count = bytes_count
+        self.rows_count = rows_count
+
+
 @dataclass
 class PerformanceReport:
     """Отчет о производительности"""
@@ -41,6 +60,22 @@ class PerformanceReport:
     fastest_file: Optional[FilePerformanceStats] = None
     slowest_file: Optional[FilePerformanceStats] = None
     files_stats: List[FilePerformanceStats] = field(default_factory=list)
+    stages_stats: List[StagePerformanceStats] = field(default_factory=list)
+    
+    def stage_totals(self) -> Dict[str, Dict]:
+        """Итоги по этапам в порядке первого выполнения: имя -> title, count, seconds, bytes, rows"""
+        totals = {}
+        for stage in self.stages_stats:
+            if stage.duration is None:
+                continue
+            total = totals.setdefault(stage.name, {
+                "title": stage.title, "count": 0, "seconds": 0.0, "bytes": 0, "rows": 0
+            })
+            total["count"] += 1
+            total["seconds"] += stage.duration
+            total["bytes"] += stage.bytes_count
+            total["rows"] += stage.rows_count
+        return totals
     
     def format_report(self) -> str:
         """Форматирует отчет в читаемый вид"""
@@ -49,6 +84,22 @@ class PerformanceReport:
         report.append("СТАТИСТИКА ПРОИЗВОДИТЕЛЬНОСТИ")
         report.append("=" * 60)
         
+        # Этапы операции
+        stage_totals = self.stage_totals()
+        if stage_totals:
+            report.append("Этапы:")
+            for total in stage_totals.values():
+                line = f"  {total['title']}: {total['seconds']:.2f}с ({total['count']} раз"
+                if total["bytes"]:
+                    line += f", {total['bytes'] / 1024:.1f} КБ"
+                if total["rows"]:
+                    line += f", {total['rows']} строк"
+                report.append(line + ")")
+            report.append("")
+            if not self.files_stats:
+                report.append(f"Общее время: {str(timedelta(seconds=int(self.total_duration)))}")
+                return "\n".join(report)
+        
         # Общая статистика
         report.append(f"Всего файлов: {self.total_files}")
         report.append(f"Успешно создано: {self.successful_files}")
@@ -90,11 +141,13 @@ class PerformanceTracker:
         self.start_time: Optional[float] = None
         self.end_time: Optional[float] = None
         self.skipped_count: int = 0
+        self.stages_stats: List[StagePerformanceStats] = []
         
     def start_batch(self):
         """Начинает отслеживание пакета файлов"""
         self.start_time = time.time()
         self.files_stats.clear()
+        self.stages_stats.clear()
         self.skipped_count = 0
         self.logger.info("Начато отслеживание производительности")
         
@@ -107,10 +160,20 @@ class PerformanceTracker:
         self.files_stats.append(stats)
         return stats
     
+    def start_stage(self, name: str, title: str) -> StagePerformanceStats:
+        """Начинает отслеживание этапа операции (итоги суммируются по name)"""
+        stats = StagePerformanceStats(
+            name=name,
+            title=title,
+            start_time=time.time()
+        )
+        self.stages_stats.append(stats)
+        return stats
+    
     def skip_file(self, filename: str):
         """Отмечает файл как пропущенный"""
         self.skipped_count += 1
-        self.logger.debug(f"Файл пропущен: {filename}")
+        self.logger.debug("Файл пропущен: %s", filename)
     
     def finish_batch(self) -> PerformanceReport:
         """Завершает отслеживание и создает отчет"""
@@ -148,7 +211,8 @@ class PerformanceTracker:
             average_duration_per_file=average_duration,
             fastest_file=fastest_file,
             slowest_file=slowest_file,
-            files_stats=self.files_stats.copy()
+            files_stats=self.files_stats.copy(),
+            stages_stats=self.stages_stats.copy()
         )
         
         self.logger.info(f"Отслеживание завершено. Создано {successful_count} файлов за {total_duration:.2f}с")
@@ -4,13 +4,14 @@
 Основной процессор для обработки файлов отпусков
 """
 
+import csv
 import logging
-import time
-import random
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Callable, Optional, Tuple
+from typing import List, Dict, Callable, Optional, Tuple, Iterator
 
 from models import (
     VacationInfo, ProcessingProgress, OperationLog, ProcessingStatus, ValidationResult, VacationStatus
@@ -20,13 +21,33 @@ from core.validator import Validator
 from core.excel_handler import ExcelHandler
 from core.employee_file_creator import EmployeeFileCreator
 from core.directory_manager import DirectoryManager
+from core.block_report_worker import build_block_report
+from core.cancellation import CancellationToken, init_worker, is_cancelled, worker_cancellation
+from core.logging_setup import current_profile, init_worker_logging
+from core.header_patcher import update_employee_headers
+from core.performance_tracker import PerformanceTracker, PerformanceReport
+from core.progress_aggregator import ProgressAggregator
+from core.staff_diff import StaffDiff
+from core.template_migrator import migrate_employee_file
 
 import shutil
 
 
+def _init_pool_worker(log_profile: str, cancel_event=None) -> None:
+    """Инициализатор процесса пула: логирование и токен отмены операции"""
+    init_worker_logging(log_profile)
+    if cancel_event is not None:
+        init_worker(cancel_event)
+
+
 class VacationProcessor:
     """Основной класс для обработки операций с отпусками"""
     
+    # Задач в очереди пула на один процесс
+    POOL_TASKS_PER_WORKER = 4
+    # Названия результатов миграции для отчета
+    MIGRATION_STATUS_NAMES = {'migrated': "Перенесен", 'skipped': "Пропущен (текущий шаблон)", 'error': "Ошибка"}
+    
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
@@ -34,6 +55,16 @@ class VacationProcessor:
         self.excel_handler = ExcelHandler(config)
         self.employee_file_creator = EmployeeFileCreator(config)
         self.directory_manager = DirectoryManager(config)
+        self.staff_differ = self.employee_file_creator.staff_differ
+
+    def diff_staff(self, employees: List[Dict], target_directory: str) -> StaffDiff:
+        """
+        Сравнивает штатное расписание с файлами целевой папки по табельному номеру
+
+        Raises:
+            ValueError: снимок штатного расписания в папке поврежден
+        """
+        return self.staff_differ.diff(employees, target_directory)
 
     def create_employee_files_to_existing(
             self, 
@@ -42,7 +73,8 @@ class VacationProcessor:
             progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
             department_progress_callback: Optional[Callable[[int, int, str], None]] = None,
             file_progress_callback: Optional[Callable[[int, int, str], None]] = None,
-            employees_to_create: Optional[list] = None
+            employees_to_create: Optional[list] = None,
+            cancel_token: Optional[CancellationToken] = None
         ) -> OperationLog:
             """
             Создает файлы сотрудников в существующей папке
@@ -54,8 +86,230 @@ class VacationProcessor:
                 progress_callback=progress_callback,
                 department_progress_callback=department_progress_callback,
                 file_progress_callback=file_progress_callback,
-                employees_to_create=employees_to_create
+                employees_to_create=employees_to_create,
+                cancel_token=cancel_token
+            )
+
+    def update_employee_headers(
+        self,
+        employees: List[Dict],
+        target_directory: str,
+        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> OperationLog:
+        """
+        Обновляет шапку существующих файлов сотрудников по штатному расписанию
+
+        Для каждого сотрудника, файл которого уже есть в папке подразделения,
+        ячейки value-правил сравниваются с данными штатного расписания;
+        отличающиеся ячейки переписываются в XML файла на месте, введенные
+        периоды отпусков не затрагиваются. Файлы без отличий не перезаписываются.
+        Файлы обрабатываются в пуле процессов (header_update_workers).
+        При отмене уже обновленные файлы попадают в снимок штатного расписания.
+        """
+        operation_log = OperationLog.open("Обновление шапки файлов сотрудников", self.config)
+        operation_log.add_entry("INFO", "Начало обновления шапки файлов сотрудников")
+        progress = ProgressAggregator(self.config, "Поиск файлов сотрудников")
+        progress.subscribe(progress_callback)
+
+        try:
+            start_time = datetime.now()
+            progress.start()
+
+            header_cells = self.excel_handler.get_header_cells()
+            if not Path(target_directory).is_dir():
+                operation_log.add_entry("ERROR", f"Папка не найдена: {target_directory}")
+                operation_log.finish(ProcessingStatus.ERROR)
+                progress.finish()
+                return operation_log
+
+            # Задачи только для сотрудников, файл которых лежит в папке их подразделения
+            # (поиск по табельному номеру: файл находится и после смены ФИО)
+            tasks = []
+            employees_by_file = {}
+            departments_by_file = {}
+            for employee, existing in self.staff_differ.diff(employees, target_directory).matched:
+                employees_by_file[existing.file_path] = employee
+                departments_by_file[existing.file_path] = existing.department
+                progress.add_department(existing.department, 1)
+                tasks.append(self.excel_handler.build_header_task(employee, existing.file_path, header_cells))
+
+            progress.set_operation(f"Сравнение шапки файлов: {len(tasks)}")
+
+            def failed(task: Dict, error: Exception) -> Dict:
+                return {
+                    'file_path': task['file_path'],
+                    'employee_name': task['employee_name'],
+                    'changes': [],
+                    'updated': False,
+                    'cancelled': False,
+                    'duration': 0.0,
+                    'error': f"Сбой процесса обновления шапки: {error}"
+                }
+
+            applied = []
+            for result in self._run_in_pool(update_employee_headers, tasks, self.config.header_update_workers,
+                                            failed, "шапки файлов", cancel_token):
+                if result['cancelled']:
+                    continue
+                dept_name = departments_by_file[result['file_path']]
+                if result['error']:
+                    operation_log.count('errors', dept_name)
+                    operation_log.add_entry(
+                        "ERROR", f"Ошибка обновления {result['employee_name']}: {result['error'].splitlines()[0]}"
+                    )
+                    self.logger.error(f"Ошибка обновления шапки {result['file_path']}: {result['error']}")
+                elif result['updated']:
+                    operation_log.count('updated', dept_name)
+                    changes = "; ".join(f"{field}: '{old}' -> '{new}'" for field, old, new in result['changes'])
+                    operation_log.add_entry("INFO", f"Обновлен: {result['employee_name']} ({changes})")
+                else:
+                    operation_log.count('unchanged', dept_name)
+                if not result['error']:
+                    applied.append(employees_by_file[result['file_path']])
+
+                progress.advance(dept_name, current_file=Path(result['file_path']).name)
+
+            # Снимок штатного расписания: данные обновленных файлов считаются перенесенными
+            self.staff_differ.update_snapshot(target_directory, applied)
+
+            duration = datetime.now() - start_time
+            processed = progress.finish("Шапка файлов обновлена").processed_files
+
+            operation_log.add_entry(
+                "INFO",
+                f"Обновлено: {operation_log.counter('updated')}, "
+                f"Без изменений: {operation_log.counter('unchanged')}, Ошибок: {operation_log.counter('errors')}"
+            )
+            operation_log.add_entry("INFO", f"Время выполнения: {duration.total_seconds():.1f} сек")
+            if is_cancelled(cancel_token):
+                self._finish_cancelled(operation_log, processed, len(tasks))
+            else:
+                operation_log.finish(
+                    ProcessingStatus.SUCCESS if operation_log.counter('errors') == 0 else ProcessingStatus.ERROR
+                )
+            return operation_log
+
+        except Exception as e:
+            error_msg = f"Критическая ошибка: {e}"
+            operation_log.add_entry("ERROR", error_msg)
+            self.logger.error(error_msg, exc_info=True)
+            operation_log.finish(ProcessingStatus.ERROR)
+            progress.finish()
+            return operation_log
+
+    def migrate_employee_templates(
+        self,
+        target_directory: str,
+        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
+    ) -> OperationLog:
+        """
+        Переносит все файлы сотрудников целевой папки на текущую версию шаблона
+
+        Каждый файл пересоздается по шаблону employee_template с шапкой,
+        прочитанной по правилам его собственного листа 'rules', и введенными
+        периодами отпусков. Исходные файлы переносятся в резервную папку рядом
+        с целевой, по каждому файлу пишется строка отчета о миграции (CSV).
+        Файлы обрабатываются в пуле процессов (migration_workers). После отмены
+        необработанные файлы остаются на старом шаблоне, повторный запуск
+        продолжит перенос (файлы текущей версии пропускаются).
+        """
+        operation_log = OperationLog.open("Перенос файлов сотрудников на новый шаблон", self.config)
+        operation_log.add_entry("INFO", f"Шаблон: {self.excel_handler.get_template_version()}")
+        progress = ProgressAggregator(self.config, "Поиск файлов сотрудников")
+        progress.subscribe(progress_callback)
+
+        try:
+            start_time = datetime.now()
+            progress.start()
+
+            snapshot = self.directory_manager.snapshot(target_directory)
+            if snapshot is None:
+                operation_log.add_entry("ERROR", f"Папка не найдена: {target_directory}")
+                operation_log.finish(ProcessingStatus.ERROR)
+                progress.finish()
+                return operation_log
+
+            timestamp = start_time.strftime('%Y%m%d_%H%M%S')
+            backup_root = Path(target_directory).parent / f"backup_migration_{timestamp}"
+            report_path = Path(target_directory) / f"Отчет о миграции_{timestamp}.csv"
+            config_data = dict(self.config.data)
+            tasks = []
+            departments_by_file = {}
+            for dept_name, dept_snapshot in snapshot.departments.items():
+                progress.add_department(dept_name, len(dept_snapshot.employee_files))
+                for entry in dept_snapshot.employee_files:
+                    departments_by_file[entry.path] = dept_name
+                    tasks.append({
+                        'file_path': entry.path,
+                        'backup_path': str(backup_root / dept_name / entry.name),
+                        'config_data': config_data
+                    })
+
+            progress.set_operation(f"Перенос файлов на новый шаблон: {len(tasks)}")
+
+            def failed(task: Dict, error: Exception) -> Dict:
+                return {
+                    'file_path': task['file_path'],
+                    'employee_name': '',
+                    'status': 'error',
+                    'cancelled': False,
+                    'source_version': '',
+                    'periods': 0,
+                    'duration': 0.0,
+                    'error': f"Сбой процесса миграции: {error}"
+                }
+
+            with open(report_path, 'w', encoding='utf-8-sig', newline='') as report_file:
+                writer = csv.writer(report_file, delimiter=';')
+                writer.writerow(["Файл", "Сотрудник", "Результат", "Версия шаблона файла",
+                                 "Периодов перенесено", "Время, с", "Ошибка"])
+                for result in self._run_in_pool(migrate_employee_file, tasks, self.config.migration_workers,
+                                                failed, "миграция файлов", cancel_token):
+                    if result['cancelled']:
+                        continue
+                    dept_name = departments_by_file[result['file_path']]
+                    operation_log.count(result['status'], dept_name)
+                    error = result['error'].splitlines()[0] if result['error'] else ''
+                    writer.writerow([
+                        os.path.relpath(result['file_path'], target_directory), result['employee_name'],
+                        self.MIGRATION_STATUS_NAMES[result['status']], result['source_version'],
+                        result['periods'], f"{result['duration']:.2f}", error
+                    ])
+                    if result['error']:
+                        operation_log.add_entry("ERROR", f"Ошибка миграции {Path(result['file_path']).name}: {error}")
+                        self.logger.error(f"Ошибка миграции {result['file_path']}: {result['error']}")
+
+                    progress.advance(dept_name, current_file=Path(result['file_path']).name)
+
+            duration = datetime.now() - start_time
+            processed = progress.finish("Перенос на новый шаблон завершен").processed_files
+
+            operation_log.add_entry(
+                "INFO",
+                f"Перенесено: {operation_log.counter('migrated')}, "
+                f"Уже на текущем шаблоне: {operation_log.counter('skipped')}, Ошибок: {operation_log.counter('error')}"
             )
+            if operation_log.counter('migrated'):
+                operation_log.add_entry("INFO", f"Исходные файлы сохранены в {backup_root}")
+            operation_log.add_entry("INFO", f"Отчет о миграции: {report_path}")
+            operation_log.add_entry("INFO", f"Время выполнения: {duration.total_seconds():.1f} сек")
+            if is_cancelled(cancel_token):
+                self._finish_cancelled(operation_log, processed, len(tasks))
+            else:
+                operation_log.finish(
+                    ProcessingStatus.SUCCESS if operation_log.counter('error') == 0 else ProcessingStatus.ERROR
+                )
+            return operation_log
+
+        except Exception as e:
+            error_msg = f"Критическая ошибка: {e}"
+            operation_log.add_entry("ERROR", error_msg)
+            self.logger.error(error_msg, exc_info=True)
+            operation_log.finish(ProcessingStatus.ERROR)
+            progress.finish()
+            return operation_log
 
     def _clean_filename_for_exe(self, filename: str) -> str:
         """Очищает имя файла для exe от недопустимых символов"""
@@ -83,13 +337,14 @@ class VacationProcessor:
             Dict[str, int]: {название_подразделения: количество_файлов}
         """
         try:
-            departments = self.directory_manager.scan_existing_departments(target_directory)
+            # Один снимок дерева: подразделения и их файлы без повторных обходов
+            snapshot = self.directory_manager.snapshot(target_directory)
+            if snapshot is None:
+                return {}
             
-            # Подсчитываем файлы в каждом подразделении
             departments_info = {}
-            for dept_name, dept_path in departments.items():
-                files = self.directory_manager._scan_department_files(Path(dept_path))
-                departments_info[dept_name] = len(files)
+            for dept_name, dept_snapshot in snapshot.departments.items():
+                departments_info[dept_name] = len(dept_snapshot.employee_files)
             
             return departments_info
             
@@ -100,7 +355,8 @@ class VacationProcessor:
     def update_block_reports(
         self,
         selected_departments: List[Dict],
-        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None
+        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> OperationLog:
         """
         Обновляет отчеты по выбранным подразделениям
@@ -108,118 +364,137 @@ class VacationProcessor:
         Args:
             selected_departments: список выбранных подразделений в формате [{'name': str, 'path': str, 'files_count': int}]
             progress_callback: функция для обновления прогресса
+            cancel_token: токен отмены (отмененный блок не создает отчет, готовые отчеты остаются)
             
         Returns:
             OperationLog: лог операции
         """
-        operation_log = OperationLog("Обновление отчетов по подразделениям")
+        operation_log = OperationLog.open("Обновление отчетов по подразделениям", self.config)
         operation_log.add_entry("INFO", "Начало обновления отчетов по блокам")
+        progress = ProgressAggregator(self.config, "Подготовка к созданию отчетов")
+        progress.subscribe(progress_callback)
         
         try:
             start_time = datetime.now()
-            total_files = sum(dept['files_count'] for dept in selected_departments)
-            progress = ProcessingProgress(
-                current_operation="Подготовка к созданию отчетов",
-                start_time=start_time,
-                total_blocks=len(selected_departments),
-                total_files=total_files
-            )
+            for dept_info in selected_departments:
+                progress.add_department(dept_info['name'], dept_info['files_count'])
+            progress.start()
             
-            if progress_callback:
-                progress_callback(progress)
+            processed_blocks = 0
+            rebuilt_blocks = []
+            skipped_blocks = []
+            tasks = []
             
-            success_count = 0
-            error_count = 0
-            files_processed_total = 0
-            
-            for i, dept_info in enumerate(selected_departments):
+            # Подготовка: снимок папок, отпечатки и пропуск неизменившихся блоков
+            for dept_info in selected_departments:
+                if is_cancelled(cancel_token):
+                    break
                 dept_name = dept_info['name']
                 dept_path = Path(dept_info['path'])
-                files_in_dept = dept_info['files_count']
                 
-                progress.current_operation = f"Создание отчета: {dept_name}"
-                progress.current_block = dept_name
-                progress.processed_blocks = i
-                if progress_callback:
-                    progress_callback(progress)
+                progress.set_operation(f"Проверка подразделения: {dept_name}")
                 
                 try:
                     if not dept_path.exists():
                         error_msg = f"Папка подразделения не найдена: {dept_name}"
                         operation_log.add_entry("ERROR", error_msg)
-                        error_count += 1
+                        operation_log.count('errors', dept_name)
+                        processed_blocks += 1
+                        progress.finish_department(dept_name)
                         continue
                     
-                    # Читаем файлы сотрудников
-                    employee_files = self.directory_manager._scan_department_files(dept_path)
-                    vacation_infos = []
+                    # Свежий снимок папки: размеры и время изменения файлов входят в отпечаток
+                    dept_snapshot = self.directory_manager.scan_department(dept_path)
+                    employee_files = [entry.path for entry in dept_snapshot.employee_files]
+                    input_digest = self.excel_handler.report_digest.compute(dept_name, dept_snapshot.employee_files)
                     
-                    files_processed_in_dept = 0
-                    for file_path in employee_files:
-                        # Дополнительная проверка - исключаем отчеты и временные файлы
-                        filename = Path(file_path).name
-                        if (filename.startswith('~$') or 
-                            filename.startswith('Отчет') or 
-                            filename.startswith('отчет') or 
-                            'отчет' in filename.lower() or
-                            filename.startswith('ОБЩИЙ_ОТЧЕТ') or
-                            filename.startswith('общий_отчет')):
-                            continue
-                        
-                        vacation_info = self.excel_handler.read_vacation_info_from_file(file_path)
-                        if vacation_info and vacation_info.employee.get('ФИО работника'):
-                            vacation_infos.append(vacation_info)
-                        
-                        files_processed_in_dept += 1
-                        files_processed_total += 1
-                        progress.processed_files = files_processed_total
-                        
-                        # ИСПРАВЛЕНИЕ: Обновляем прогресс для каждого файла
-                        if progress_callback:
-                            progress_callback(progress)
-                        
-                        time.sleep(0.1)  # Небольшая задержка для демонстрации прогресса
+                    # Пропускаем блок, если последний отчет построен по тем же данным
+                    latest_report = dept_snapshot.latest_block_report
+                    if (self.config.skip_unchanged_block_reports and latest_report is not None and
+                            self.excel_handler.report_digest.read(latest_report.path) == input_digest):
+                        skipped_blocks.append(dept_name)
+                        operation_log.count('skipped', dept_name)
+                        operation_log.add_entry("INFO", f"Отчет без изменений: {dept_name} ({latest_report.name})")
+                        processed_blocks += 1
+                        progress.finish_department(dept_name)
+                        continue
                     
-                    # Создаем отчет
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     report_filename = f"Отчет по блоку_{dept_name}_{timestamp}.xlsx"
-                    report_path = dept_path / report_filename
-                    
-                    success = self.excel_handler.create_block_report(
-                        dept_name, vacation_infos, str(report_path)
-                    )
-                    
-                    if success:
-                        success_count += 1
-                        # ИСПРАВЛЕНИЕ: Убираем уровень success для ИТОГ сообщений - просто INFO
-                        operation_log.add_entry("INFO", f"Создан отчет: {dept_name}")
-                    else:
-                        error_count += 1
-                        operation_log.add_entry("ERROR", f"Ошибка создания отчета: {dept_name}")
+                    tasks.append({
+                        'dept_name': dept_name,
+                        'report_path': str(dept_path / report_filename),
+                        'employee_files': employee_files,
+                        'input_digest': input_digest,
+                        'config_data': self.config.data
+                    })
                 
                 except Exception as e:
-                    error_count += 1
+                    operation_log.count('errors', dept_name)
+                    processed_blocks += 1
+                    progress.finish_department(dept_name)
                     error_msg = f"Ошибка обработки {dept_name}: {e}"
                     operation_log.add_entry("ERROR", error_msg)
                     self.logger.error(error_msg)
+            
+            # Самые большие блоки запускаются первыми, чтобы не оказаться в хвосте
+            tasks.sort(key=lambda task: len(task['employee_files']), reverse=True)
+            
+            progress.set_operation(f"Создание отчетов: {len(tasks)}")
+            
+            for result in self._run_block_report_tasks(tasks, cancel_token):
+                dept_name = result['dept_name']
+                if result['cancelled']:
+                    continue
+                processed_blocks += 1
+                
+                for file_path, error in result['file_errors']:
+                    operation_log.count('file_errors', dept_name)
+                    operation_log.add_entry("ERROR", f"Файл не прочитан ({dept_name}): {file_path}: {error}")
+                
+                if result['success']:
+                    operation_log.count('created', dept_name)
+                    rebuilt_blocks.append(dept_name)
+                    # ИСПРАВЛЕНИЕ: Убираем уровень success для ИТОГ сообщений - просто INFO
+                    operation_log.add_entry("INFO", f"Создан отчет: {dept_name}")
+                    self.logger.info(
+                        f"Отчет {dept_name}: {result['employees_count']} сотр., {result['duration']:.1f} сек"
+                    )
+                elif result['error']:
+                    operation_log.count('errors', dept_name)
+                    error_msg = f"Ошибка обработки {dept_name}: {result['error'].splitlines()[0]}"
+                    operation_log.add_entry("ERROR", error_msg)
+                    self.logger.error(f"Ошибка обработки {dept_name}: {result['error']}")
+                else:
+                    operation_log.count('errors', dept_name)
+                    operation_log.add_entry("ERROR", f"Ошибка создания отчета: {dept_name}")
                 
                 # Обновляем прогресс по блокам
-                progress.processed_blocks = i + 1
-                if progress_callback:
-                    progress_callback(progress)
+                progress.set_operation(f"Создан отчет: {dept_name}")
+                progress.finish_department(dept_name)
             
             # Завершение
-            end_time = datetime.now()
-            duration = end_time - start_time
-            
-            progress.current_operation = "Отчеты созданы"
-            progress.end_time = end_time
-            if progress_callback:
-                progress_callback(progress)
+            duration = datetime.now() - start_time
+            progress.finish("Отчеты созданы")
             
             operation_log.add_entry("INFO", f"Создание отчетов завершено за {duration.total_seconds():.1f} сек")
-            operation_log.add_entry("INFO", f"Успешно: {success_count}, Ошибок: {error_count}")
-            operation_log.finish(ProcessingStatus.SUCCESS)
+            operation_log.add_entry(
+                "INFO",
+                f"Успешно: {operation_log.counter('created')}, Без изменений: {operation_log.counter('skipped')}, "
+                f"Ошибок: {operation_log.counter('errors')}"
+            )
+            if operation_log.counter('file_errors'):
+                operation_log.add_entry(
+                    "WARNING", f"Не прочитано файлов сотрудников (не вошли в отчеты): {operation_log.counter('file_errors')}"
+                )
+            if rebuilt_blocks:
+                operation_log.add_entry("INFO", f"Пересозданы отчеты: {', '.join(rebuilt_blocks)}")
+            if skipped_blocks:
+                operation_log.add_entry("INFO", f"Пропущены без изменений: {', '.join(skipped_blocks)}")
+            if is_cancelled(cancel_token):
+                self._finish_cancelled(operation_log, processed_blocks, len(selected_departments))
+            else:
+                operation_log.finish(ProcessingStatus.SUCCESS)
             
             return operation_log
             
@@ -228,50 +503,159 @@ class VacationProcessor:
             operation_log.add_entry("ERROR", error_msg)
             self.logger.error(error_msg, exc_info=True)
             operation_log.finish(ProcessingStatus.ERROR)
+            progress.finish()
             
             return operation_log
 
+    def _run_block_report_tasks(self, tasks: List[Dict],
+                                cancel_token: Optional[CancellationToken] = None) -> Iterator[Dict]:
+        """
+        Выполняет построение отчетов по блокам и отдает результаты по мере готовности
+        
+        Каждое подразделение - отдельная задача пула процессов; задачи
+        отправляются в переданном порядке. Одна задача или report_workers = 1
+        выполняются в текущем процессе без запуска пула.
+        """
+        def failed(task: Dict, error: Exception) -> Dict:
+            # Сбой самого процесса пула (результат задачи не получен)
+            return {
+                'dept_name': task['dept_name'],
+                'report_path': task['report_path'],
+                'success': False,
+                'cancelled': False,
+                'files_processed': len(task['employee_files']),
+                'employees_count': 0,
+                'file_errors': [],
+                'duration': 0.0,
+                'error': f"Сбой процесса построения отчета: {error}"
+            }
+        
+        return self._run_in_pool(build_block_report, tasks, self.config.report_workers, failed, "отчетов",
+                                 cancel_token)
+    
+    def _run_in_pool(self, function: Callable[[Dict], Dict], tasks: List[Dict], workers_setting: int,
+                     failed: Callable[[Dict, Exception], Dict], title: str,
+                     cancel_token: Optional[CancellationToken] = None) -> Iterator[Dict]:
+        """
+        Выполняет задачи в пуле процессов и отдает результаты по мере готовности
+        
+        workers_setting - значение из конфигурации (0 - по числу ядер). Одна
+        задача или один процесс выполняются в текущем процессе без пула.
+        В пул одновременно отправляется не больше POOL_TASKS_PER_WORKER задач
+        на процесс: для десятков тысяч задач не копятся очередь и результаты.
+        
+        После отмены (cancel_token) новые задачи не отправляются, неначатые
+        снимаются с очереди; выполняемые задачи доступны функции задачи через
+        cancellation.worker_token() и отдают результаты как обычно.
+        """
+        if not tasks or is_cancelled(cancel_token):
+            return
+        
+        workers = min(self._get_workers(workers_setting), len(tasks))
+        if workers <= 1:
+            with worker_cancellation(cancel_token):
+                for task in tasks:
+                    if is_cancelled(cancel_token):
+                        return
+                    yield function(task)
+            return
+        
+        self.logger.info("Выполнение %d задач (%s) в %d процессах", len(tasks), title, workers)
+        pending_tasks = iter(tasks)
+        limit = workers * self.POOL_TASKS_PER_WORKER
+        cancel_event = cancel_token.event if cancel_token is not None else None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                 initargs=(current_profile(), cancel_event)) as executor:
+            futures = {}
+            for task in pending_tasks:
+                futures[executor.submit(function, task)] = task
+                if len(futures) >= limit:
+                    break
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = futures.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield failed(task, e)
+                if is_cancelled(cancel_token):
+                    for future in [future for future in futures if future.cancel()]:
+                        del futures[future]
+                    continue
+                for task in pending_tasks:
+                    futures[executor.submit(function, task)] = task
+                    if len(futures) >= limit:
+                        break
+    
+    def _finish_cancelled(self, operation_log: OperationLog, processed: int, total: int) -> None:
+        """Завершает лог отмененной операции"""
+        message = f"Операция остановлена пользователем: обработано {processed} из {total}"
+        operation_log.add_entry("WARNING", message)
+        self.logger.info(message)
+        operation_log.finish(ProcessingStatus.CANCELLED)
+
+    def _get_workers(self, workers_setting: int) -> int:
+        """Количество процессов пула (0 в конфигурации - по числу ядер)"""
+        if workers_setting > 0:
+            return workers_setting
+        return os.cpu_count() or 1
+
     def create_general_report(
         self,
         selected_departments: List[Dict],
         base_directory: str,
-        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None
+        progress_callback: Optional[Callable[[ProcessingProgress], None]] = None,
+        cancel_token: Optional[CancellationToken] = None
     ) -> OperationLog:
         """
         Создает общий отчет по выбранным подразделениям
         Использует ТОЛЬКО блочные отчеты (Отчет по блоку_*), не трогает файлы сотрудников
+        Отмена проверяется перед чтением каждого отчета по блоку и перед записью файла
         """
-        operation_log = OperationLog("Создание общего отчета")
+        operation_log = OperationLog.open("Создание общего отчета", self.config)
+        tracker = PerformanceTracker()
+        tracker.start_batch()
         try:
             start_time = datetime.now()
+            write_steps = ExcelHandler.GENERAL_REPORT_WRITE_STEPS
+            # Шаги: поиск и чтение отчета каждого блока, сведение данных, шаги записи файла
             progress = ProcessingProgress(
                 current_operation="Подготовка к созданию общего отчета",
                 start_time=start_time,
                 total_blocks=len(selected_departments),
                 processed_blocks=0,
-                total_files=len(selected_departments), # total_files в данном контексте = total_blocks
+                total_files=2 * len(selected_departments) + 1 + len(write_steps),
                 processed_files=0
             )
-            if progress_callback:
-                progress_callback(progress)
+
+            def report_step(operation: str) -> None:
+                progress.current_operation = operation
+                if progress_callback:
+                    progress_callback(progress)
+
+            def finish_step(stage, bytes_count: int = 0, rows_count: int = 0) -> None:
+                stage.finish(bytes_count, rows_count)
+                progress.processed_files += 1
+                progress.processed_bytes += bytes_count
+                progress.processed_rows += rows_count
+
+            report_step(progress.current_operation)
             # 1. Сбор данных из отчетов по блокам
             missing_reports = []
             block_data = []
             
-            # Прогресс-бар для общего отчета будет обновляться по processed_blocks
-            # А files_progress_bar в GUI будет эмулировать работу внутри каждого блока.
-            
             for i, dept_info in enumerate(selected_departments):
+                if is_cancelled(cancel_token):
+                    self._finish_cancelled(operation_log, i, len(selected_departments))
+                    return operation_log
                 dept_name = dept_info['name']
                 dept_path = Path(dept_info['path'])
-
-                progress.current_operation = f"Сбор данных из отчета: {dept_name}"
                 progress.current_block = dept_name
-                progress.processed_blocks = i # Обновляем обработанные блоки перед чтением
-                progress.processed_files = i # для files_progress_bar также
-                if progress_callback:
-                    progress_callback(progress)
+                progress.processed_blocks = i
 
+                report_step(f"Поиск отчета по блоку: {dept_name}")
+                stage = tracker.start_stage("locate", "Поиск отчетов по блокам")
                 if not dept_path.exists():
                     error_msg = f"Папка подразделения не существует: {dept_path}. Отчет не может быть создан."
                     operation_log.add_entry("ERROR", error_msg)
@@ -286,7 +670,11 @@ class VacationProcessor:
                     operation_log.finish(ProcessingStatus.ERROR)
                     self.logger.error(error_msg)
                     return operation_log
+                finish_step(stage)
                 
+                report_size = os.path.getsize(block_report_path)
+                report_step(f"Чтение отчета по блоку: {dept_name} ({report_size / 1024:.1f} КБ)")
+                stage = tracker.start_stage("read", "Чтение отчетов по блокам")
                 block_info_raw = self.excel_handler.read_block_report_data_by_rules(block_report_path)
                 if not block_info_raw:
                     error_msg = f"Не удалось прочитать отчет по блоку для отдела: {dept_name}. Отчет не может быть создан."
@@ -294,16 +682,12 @@ class VacationProcessor:
                     operation_log.finish(ProcessingStatus.ERROR)
                     self.logger.error(error_msg)
                     return operation_log
+                finish_step(stage, bytes_count=report_size)
                 
                 block_data.append((dept_name, block_info_raw))
                 operation_log.add_entry("INFO", f"Данные собраны из отчета для '{dept_name}'")
             
-            # После цикла, обновляем progress.processed_blocks на общее количество успешно обработанных
             progress.processed_blocks = len(block_data)
-            progress.processed_files = len(block_data) # для files_progress_bar также
-            progress.current_operation = "Все данные блоков собраны"
-            if progress_callback:
-                progress_callback(progress)
 
             if missing_reports:
                 missing_deps_str = ", ".join(missing_reports)
@@ -317,6 +701,8 @@ class VacationProcessor:
                 operation_log.finish(ProcessingStatus.ERROR)
                 return operation_log
 
+            report_step(f"Сведение данных: {len(block_data)} блоков")
+            stage = tracker.start_stage("aggregate", "Сведение данных")
             total_employees_all = sum(int(b[1].get('total_employees', 0)) for b in block_data)
             
             # Формируем финальный список для общего отчета
@@ -341,22 +727,33 @@ class VacationProcessor:
                     'update_date': block_info_raw.get('update_date', ''),
                 }
                 final_block_data.append(block_info)
+            finish_step(stage, rows_count=len(final_block_data))
             
             # 2. Создание общего отчета
-            progress.current_operation = "Создание файла общего отчета"
-            # Обновляем processed_blocks на общее количество блоков, чтобы верхний прогресс-бар был на 100% перед созданием файла
-            progress.processed_blocks = len(selected_departments) # total_blocks изначально
-            if progress_callback:
-                progress_callback(progress)
+            if is_cancelled(cancel_token):
+                self._finish_cancelled(operation_log, len(block_data), len(selected_departments))
+                return operation_log
 
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             report_filename = f"ОБЩИЙ_ОТЧЕТ_{timestamp}.xlsx"
             report_path = Path(base_directory) / report_filename
             
+            # Шаги записи: каждый следующий шаг завершает предыдущий
+            write_stage = None
+
+            def on_write_step(step_title: str) -> None:
+                nonlocal write_stage
+                if write_stage is not None:
+                    finish_step(write_stage)
+                report_step(f"Создание файла общего отчета: {step_title}")
+                write_stage = tracker.start_stage("write", "Запись общего отчета")
+
             success = self.excel_handler.create_general_report_from_blocks(
-                final_block_data, str(report_path)
+                final_block_data, str(report_path), step_callback=on_write_step
             )
             if success:
+                finish_step(write_stage, bytes_count=os.path.getsize(report_path), rows_count=len(final_block_data))
+                report_step("Общий отчет создан")
                 end_time = datetime.now()
                 duration = end_time - start_time
                 total_employees_all = sum(b['employees_count'] for b in final_block_data if 'employees_count' in b)
@@ -364,6 +761,7 @@ class VacationProcessor:
                 operation_log.add_entry("INFO", f"Общий отчет создан: {report_path}")
                 operation_log.add_entry("INFO", f"Блоков: {len(final_block_data)}, Сотрудников: {total_employees_all}, Заполнили корректно: {total_correct_all}")
                 operation_log.add_entry("INFO", f"Время выполнения: {duration.total_seconds():.1f} сек")
+                self._add_stage_timings(operation_log, tracker.finish_batch())
                 operation_log.finish(ProcessingStatus.SUCCESS)
             else:
                 error_msg = "Ошибка создания общего отчета"
@@ -377,6 +775,15 @@ class VacationProcessor:
             operation_log.finish(ProcessingStatus.ERROR)
             return operation_log
 
+    def _add_stage_timings(self, operation_log: OperationLog, performance_report: PerformanceReport) -> None:
+        """Время этапов операции: метрики и записи лога, подробный отчет - в консольный лог"""
+        for name, total in performance_report.stage_totals().items():
+            operation_log.metrics[f"{name}_seconds"] = total["seconds"]
+            operation_log.metrics[f"{name}_bytes"] = total["bytes"]
+            operation_log.metrics[f"{name}_rows"] = total["rows"]
+            operation_log.add_entry("INFO", f"{total['title']}: {total['seconds']:.2f} сек")
+        self.logger.info("\n%s", performance_report.format_report())
+
     def _find_latest_block_report(self, dept_path: str, dept_name: str) -> Optional[str]:
         """
         Находит последний отчет по блоку для подразделения
@@ -395,24 +802,13 @@ class VacationProcessor:
                 self.logger.error(f"Папка подразделения не существует: {dept_path_obj}")
                 return None
             
-            # Ищем файлы отчетов
-            report_files = []
-            for file_path in dept_path_obj.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() == '.xlsx':
-                    filename = file_path.name
-                    if (not filename.startswith('~$') and # Игнорируем временные файлы Excel
-                        (filename.startswith("Отчет по блоку") or 
-                        filename.startswith("отчет по блоку") or
-                        "отчет" in filename.lower())):
-                        report_files.append(file_path)
-            
-            if not report_files:
+            # Самый новый отчет по блоку из снимка папки
+            latest_report = self.directory_manager.scan_department(dept_path_obj, reuse=True).latest_block_report
+            if latest_report is None:
                 self.logger.warning(f"Отчеты по блоку не найдены в {dept_path_obj}")
                 return None
             
-            # Возвращаем самый новый файл
-            latest_file = max(report_files, key=lambda f: f.stat().st_mtime)
-            return str(latest_file)
+            return latest_report.path
             
         except Exception as e:
             self.logger.error(f"Ошибка поиска отчета для {dept_name}: {e}")
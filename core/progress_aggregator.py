@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль сбора прогресса операций с параллельными исполнителями
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from config import Config
+from models import ProgressSnapshot
+
+
+class ProgressAggregator:
+    """
+    Потокобезопасный сборщик прогресса операции
+
+    Исполнители (потоки, результаты процессов пула) сообщают приращения
+    по подразделениям через advance; подписчики получают неизменяемые
+    снимки ProgressSnapshot из отдельного потока с постоянным интервалом
+    progress_publish_interval_ms, а не на каждый файл. Снимок содержит
+    скорость обработки за последние RATE_WINDOW_SECONDS секунд, оценку
+    оставшегося времени и прогресс каждого подразделения.
+
+    Использование:
+        with ProgressAggregator(config, "Операция") as progress:
+            progress.subscribe(callback)
+            progress.add_department(name, files_count)
+            progress.advance(name)
+    """
+
+    # Окно расчета скорости обработки (секунды)
+    RATE_WINDOW_SECONDS = 10.0
+    # Точек скорости в окне (ограничивает память при тысячах файлов в секунду)
+    RATE_SAMPLES = 50
+
+    def __init__(self, config: Config, operation: str = ""):
+        self.logger = logging.getLogger(__name__)
+        self._interval = config.progress_publish_interval_ms / 1000
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[ProgressSnapshot], None]] = []
+
+        self._operation = operation
+        self._current_file = ""
+        self._current_block = ""
+        self._extra_files = 0
+        self._processed_files = 0
+        # Подразделение -> [обработано, всего]
+        self._departments: Dict[str, List[int]] = {}
+        self._completed_departments = set()
+
+        self._start_time = datetime.now()
+        self._end_time: Optional[datetime] = None
+        self._samples = deque([(time.monotonic(), 0)])
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._finished = False
+
+    def __enter__(self) -> 'ProgressAggregator':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.finish()
+
+    def subscribe(self, callback: Optional[Callable[[ProgressSnapshot], None]]) -> None:
+        """Подписывает на снимки прогресса (None игнорируется)"""
+        if callback is not None:
+            self._subscribers.append(callback)
+
+    def start(self) -> None:
+        """Запускает поток публикации снимков"""
+        if self._thread is not None:
+            raise RuntimeError("Публикация прогресса уже запущена")
+        self._thread = threading.Thread(target=self._run, name="progress-publisher", daemon=True)
+        self._thread.start()
+
+    def set_operation(self, operation: str, current_file: str = "") -> None:
+        """Текущий этап операции"""
+        with self._lock:
+            self._operation = operation
+            self._current_file = current_file
+
+    def add_department(self, name: str, files_count: int) -> None:
+        """Добавляет подразделение к общему объему работы"""
+        with self._lock:
+            self._departments.setdefault(name, [0, 0])[1] += files_count
+
+    def add_files(self, files_count: int) -> None:
+        """Добавляет файлы без подразделения к общему объему работы"""
+        with self._lock:
+            self._extra_files += files_count
+
+    def advance(self, department: Optional[str] = None, files: int = 1, current_file: str = "") -> None:
+        """Учитывает обработанные файлы (department - подразделение файлов)"""
+        with self._lock:
+            self._processed_files += files
+            if department is not None:
+                counts = self._departments.setdefault(department, [0, 0])
+                counts[0] += files
+                if counts[0] >= counts[1]:
+                    self._completed_departments.add(department)
+                self._current_block = department
+            if current_file:
+                self._current_file = current_file
+            self._add_sample(time.monotonic())
+
+    def finish_department(self, department: str) -> None:
+        """Завершает подразделение: необработанные файлы считаются обработанными"""
+        with self._lock:
+            counts = self._departments.setdefault(department, [0, 0])
+            self._processed_files += max(0, counts[1] - counts[0])
+            counts[0] = max(counts[0], counts[1])
+            self._completed_departments.add(department)
+            self._current_block = department
+            self._add_sample(time.monotonic())
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def finish(self, operation: Optional[str] = None) -> ProgressSnapshot:
+        """Останавливает публикацию и отправляет последний снимок (повторный вызов только возвращает его)"""
+        with self._lock:
+            if self._finished:
+                return self._build_snapshot(time.monotonic())
+            if operation is not None:
+                self._operation = operation
+            self._end_time = datetime.now()
+            self._finished = True
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.publish()
+
+    def snapshot(self) -> ProgressSnapshot:
+        """Текущее состояние операции"""
+        with self._lock:
+            return self._build_snapshot(time.monotonic())
+
+    def publish(self) -> ProgressSnapshot:
+        """Отправляет текущий снимок подписчикам"""
+        snapshot = self.snapshot()
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                self.logger.error(f"Ошибка в подписчике прогресса: {e}")
+        return snapshot
+
+    def _run(self) -> None:
+        """Поток публикации: снимок каждые progress_publish_interval_ms до finish"""
+        self.publish()
+        while not self._stop_event.wait(self._interval):
+            self.publish()
+
+    def _add_sample(self, now: float) -> None:
+        """Точка для расчета скорости (вызывается под блокировкой)"""
+        if now - self._samples[-1][0] >= self.RATE_WINDOW_SECONDS / self.RATE_SAMPLES:
+            self._samples.append((now, self._processed_files))
+        while len(self._samples) > 1 and self._samples[1][0] <= now - self.RATE_WINDOW_SECONDS:
+            self._samples.popleft()
+
+    def _build_snapshot(self, now: float) -> ProgressSnapshot:
+        """Снимок состояния (вызывается под блокировкой)"""
+        total_files = self._extra_files + sum(total for _, total in self._departments.values())
+
+        reference_time, reference_processed = self._samples[0]
+        elapsed = now - reference_time
+        rate = (self._processed_files - reference_processed) / elapsed if elapsed > 0 else 0.0
+        remaining = total_files - self._processed_files
+        eta = remaining / rate if rate > 0 else None
+
+        return ProgressSnapshot(
+            current_operation=self._operation,
+            current_file=self._current_file,
+            current_block=self._current_block,
+            processed_files=self._processed_files,
+            total_files=total_files,
+            processed_blocks=len(self._completed_departments),
+            total_blocks=len(self._departments),
+            start_time=self._start_time,
+            end_time=self._end_time,
+            files_per_second=rate,
+            eta_seconds=eta,
+            departments={name: (done, total) for name, (done, total) in self._departments.items()},
+            finished=self._finished
+        )
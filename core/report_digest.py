@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль отпечатка входных данных отчета по блоку
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl.packaging.custom import StringProperty
+
+from config import Config
+from core.directory_snapshot import FileEntry
+
+
+# Имя пользовательского свойства книги, в котором хранится отпечаток
+DIGEST_PROPERTY_NAME = "VacationInputDigest"
+
+# Версия схемы отпечатка (состава входящих в него данных)
+DIGEST_VERSION = "3"
+
+# Параметры конфигурации, от которых зависит содержимое отчета по блоку
+REPORT_CONFIG_KEYS = (
+    "target_year",
+    "calendar_years",
+    "month_names",
+    "conflicts_sheet_name",
+    "date_format",
+    "recalculate_form_status",
+    "validation_statuses",
+    "employee_file_structure",
+)
+
+# Корень исходников приложения (при запуске не из exe)
+SOURCE_ROOT = Path(__file__).resolve().parent.parent
+
+CUSTOM_PROPS_PART = "docProps/custom.xml"
+CUSTOM_PROPS_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}"
+
+
+class ReportDigest:
+    """
+    Отпечаток входных данных отчета по блоку
+
+    В отпечаток входят пути, размеры и время изменения файлов сотрудников,
+    название блока, хеши шаблонов отчета и файла сотрудника, параметры
+    конфигурации, влияющие на отчет, и хеш сборки программы (exe или
+    исходников), поэтому новая сборка с другим годом календаря или логикой
+    статусов пересоздает отчеты. Отпечаток записывается в пользовательские
+    свойства книги отчета, а при повторном запуске читается напрямую из
+    docProps/custom.xml без загрузки листов.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        # Кэш хешей файлов: {путь: (размер, mtime_ns, хеш)}
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    def compute(self, block_name: str, employee_files: List[FileEntry]) -> str:
+        """
+        Вычисляет отпечаток входных данных отчета
+
+        Args:
+            block_name: название блока
+            employee_files: файлы сотрудников из снимка папки
+
+        Returns:
+            str: шестнадцатеричный SHA-256
+        """
+        digest = hashlib.sha256()
+        digest.update(f"v{DIGEST_VERSION}\n{block_name}\n".encode("utf-8"))
+        digest.update(f"build:{self.build_hash()}\n".encode("utf-8"))
+        digest.update(f"template:{self.file_hash(self.config.block_report_template)}\n".encode("utf-8"))
+        digest.update(f"employee_template:{self.file_hash(self.config.employee_template)}\n".encode("utf-8"))
+        report_config = {key: self.config.get(key) for key in REPORT_CONFIG_KEYS}
+        digest.update(f"config:{json.dumps(report_config, sort_keys=True, ensure_ascii=False)}\n".encode("utf-8"))
+        for entry in sorted(employee_files, key=lambda item: item.path):
+            digest.update(f"{entry.path}|{entry.size}|{entry.mtime!r}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def build_hash(self) -> str:
+        """Хеш сборки программы: файла exe или исходников приложения"""
+        if getattr(sys, 'frozen', False):
+            return self.file_hash(sys.executable)
+        digest = hashlib.sha256()
+        source_files = sorted(SOURCE_ROOT.glob("*.py")) + sorted((SOURCE_ROOT / "core").glob("*.py"))
+        for source_file in source_files:
+            digest.update(f"{source_file.relative_to(SOURCE_ROOT).as_posix()}:{self.file_hash(str(source_file))}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def file_hash(self, file_path: str) -> str:
+        """Хеш содержимого файла (пересчитывается только при изменении файла)"""
+        path = Path(file_path)
+        stat = path.stat()
+        key = str(path.resolve())
+
+        cached = self._file_hashes.get(key)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(1024 * 1024), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        self._file_hashes[key] = (stat.st_size, stat.st_mtime_ns, file_hash)
+        return file_hash
+
+    def stamp(self, workbook, digest: str) -> None:
+        """Записывает отпечаток в пользовательские свойства книги"""
+        props = workbook.custom_doc_props
+        if DIGEST_PROPERTY_NAME in props.names:
+            del props[DIGEST_PROPERTY_NAME]
+        props.append(StringProperty(name=DIGEST_PROPERTY_NAME, value=digest))
+
+    def read(self, report_path: str) -> Optional[str]:
+        """
+        Читает отпечаток из файла отчета
+
+        Returns:
+            Optional[str]: отпечаток или None, если отчет построен без него
+        """
+        try:
+            with zipfile.ZipFile(report_path) as archive:
+                if CUSTOM_PROPS_PART not in archive.namelist():
+                    return None
+                root = ET.fromstring(archive.read(CUSTOM_PROPS_PART))
+        except (OSError, zipfile.BadZipFile, ET.ParseError) as e:
+            self.logger.warning(f"Не удалось прочитать отпечаток отчета {report_path}: {e}")
+            return None
+
+        for prop in root.iter(f"{CUSTOM_PROPS_NS}property"):
+            if prop.get("name") == DIGEST_PROPERTY_NAME:
+                for value in prop:
+                    return value.text
+        return None
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль потоковой записи строк таблиц в готовый файл отчета
+"""
+
+import logging
+import math
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+ROW_RE = re.compile(rb'<row\b[^>]*?(?:/>|>.*?</row>)', re.DOTALL)
+ROW_ATTRS_RE = re.compile(rb'<row\b([^>]*?)/?>')
+ROW_NUMBER_RE = re.compile(rb'\br="(\d+)"')
+ROW_SKIP_ATTRS_RE = re.compile(rb'\s(?:r|spans)="[^"]*"')
+CELL_RE = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', re.DOTALL)
+CELL_STYLE_RE = re.compile(rb'<c\b[^>]*?\bs="(\d+)"')
+DIMENSION_RE = re.compile(rb'<dimension\s+ref="\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?"\s*/>')
+
+SHEET_DATA_OPEN = b'<sheetData>'
+SHEET_DATA_EMPTY = b'<sheetData/>'
+SHEET_DATA_CLOSE = b'</sheetData>'
+
+# Объем строк листа в памяти до переноса во временный файл (байт)
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Дополнительные ячейки строки: пары (номер столбца, значение)
+RowCells = Sequence[Tuple[int, Any]]
+
+# Строка потока: значения по позициям столбцов потока и дополнительные ячейки
+StreamRow = Tuple[Sequence[Any], RowCells]
+
+
+@dataclass
+class SheetRowStream:
+    """
+    Строки, которые нужно записать в лист начиная с start_row
+
+    columns - номера столбцов таблицы; i-е значение строки пишется в columns[i]
+    (строка может быть короче columns). Дополнительные ячейки (например,
+    отметки календаря) задаются парами (столбец, значение).
+    """
+    sheet_name: str
+    start_row: int
+    columns: Tuple[int, ...]
+    rows: Iterable[StreamRow]
+
+
+@lru_cache(maxsize=1024)
+def _column_letter(col: int) -> bytes:
+    """Буквенное обозначение столбца"""
+    return get_column_letter(col).encode("ascii")
+
+
+@lru_cache(maxsize=1024)
+def _column_index(letters: bytes) -> int:
+    """Номер столбца по буквенному обозначению"""
+    col = 0
+    for char in letters.decode("ascii"):
+        col = col * 26 + (ord(char) - ord('A') + 1)
+    return col
+
+
+def resolve_sheet_parts(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """Сопоставляет имена листов с частями архива xlsx (xl/worksheets/sheetN.xml)"""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+
+    targets = {}
+    for rel in rels.iter(f"{PACKAGE_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = target
+
+    parts = {}
+    for sheet in workbook.iter(f"{MAIN_NS}sheet"):
+        parts[sheet.get("name")] = targets.get(sheet.get(f"{REL_NS}id"))
+    return parts
+
+
+class ReportStreamWriter:
+    """
+    Потоковая запись табличных строк в сохраненный файл отчета
+
+    Отчет сначала сохраняется из шаблона через openpyxl с заполненной шапкой
+    и пустыми таблицами. Затем XML нужных листов переписывается: строки
+    шаблона выше таблицы копируются как есть, а строки данных генерируются
+    по одной из итератора и сразу пишутся в архив. Стили ячеек берутся
+    из первой строки данных шаблона (прототипа), поэтому оформление
+    сохраняется, а потребление памяти не зависит от размера блока.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def write(self, file_path: str, streams: List[SheetRowStream]) -> Dict[str, int]:
+        """
+        Дописывает строки в листы сохраненного файла
+
+        Args:
+            file_path: путь к сохраненному xlsx
+            streams: строки по листам
+
+        Returns:
+            Dict[str, int]: {имя листа: количество записанных строк}
+        """
+        written: Dict[str, int] = {}
+        temp_path = f"{file_path}.stream.tmp"
+
+        try:
+            with zipfile.ZipFile(file_path) as source:
+                sheet_parts = resolve_sheet_parts(source)
+                streams_by_part = {}
+                for stream in streams:
+                    part = sheet_parts.get(stream.sheet_name)
+                    if part is None:
+                        raise ValueError(f"Лист {stream.sheet_name} не найден в файле {file_path}")
+                    streams_by_part[part] = stream
+
+                with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED) as target:
+                    for item in source.infolist():
+                        stream = streams_by_part.get(item.filename)
+                        if stream is None:
+                            with source.open(item) as src, target.open(item, "w") as dst:
+                                shutil.copyfileobj(src, dst, 1024 * 1024)
+                            continue
+
+                        with target.open(item.filename, "w") as dst:
+                            written[stream.sheet_name] = self._write_sheet(source.read(item), stream, dst)
+
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        self.logger.debug(f"Потоковая запись {file_path}: {written}")
+        return written
+
+    def _write_sheet(self, sheet_xml: bytes, stream: SheetRowStream, dst) -> int:
+        """
+        Переписывает XML листа, вставляя сгенерированные строки
+
+        Строки пишутся во временный буфер (в памяти до SPOOL_MAX_SIZE, дальше
+        на диске): диапазон <dimension> в начале листа известен только после
+        записи последней строки.
+        """
+        if SHEET_DATA_EMPTY in sheet_xml:
+            head, tail = sheet_xml.split(SHEET_DATA_EMPTY, 1)
+            body = b''
+        else:
+            head, rest = sheet_xml.split(SHEET_DATA_OPEN, 1)
+            body, tail = rest.split(SHEET_DATA_CLOSE, 1)
+
+        columns = stream.columns
+        rows = enumerate(stream.rows, stream.start_row)
+        pending = next(rows, None)
+        prototype_styles: Optional[Dict[int, bytes]] = None
+        prototype_attrs = b''
+        written = 0
+        # Последняя строка и самый правый столбец сгенерированных строк
+        last_row = 0
+        last_col = 0
+
+        def row_xml_of(row_number: int, row: StreamRow, styles: Dict[int, bytes], attrs: bytes) -> bytes:
+            nonlocal written, last_row, last_col
+            row_values, extra_cells = row
+            last_col = max(last_col, max(columns[:len(row_values)], default=0),
+                           max((col for col, _ in extra_cells), default=0), max(styles, default=0))
+            last_row = row_number
+            written += 1
+            return self._row_xml(row_number, columns, row, styles, attrs)
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as rows_buffer:
+            for match in ROW_RE.finditer(body):
+                row_xml = match.group(0)
+                row_number = int(ROW_NUMBER_RE.search(row_xml).group(1))
+
+                if row_number < stream.start_row:
+                    rows_buffer.write(row_xml)
+                    continue
+
+                row_attrs = self._row_attrs(row_xml)
+                if prototype_styles is None:
+                    # Первая строка области данных шаблона - прототип оформления
+                    prototype_styles = self._cell_styles(row_xml)
+                    prototype_attrs = row_attrs
+
+                while pending is not None and pending[0] < row_number:
+                    rows_buffer.write(row_xml_of(pending[0], pending[1], prototype_styles, prototype_attrs))
+                    pending = next(rows, None)
+
+                if pending is not None and pending[0] == row_number:
+                    # Строка шаблона заменяется строкой данных
+                    rows_buffer.write(row_xml_of(row_number, pending[1], prototype_styles, row_attrs))
+                    pending = next(rows, None)
+                else:
+                    rows_buffer.write(row_xml)
+
+            while pending is not None:
+                rows_buffer.write(row_xml_of(pending[0], pending[1], prototype_styles or {}, prototype_attrs))
+                pending = next(rows, None)
+
+            dst.write(self._update_dimension(head, last_row, last_col))
+            dst.write(SHEET_DATA_OPEN)
+            rows_buffer.seek(0)
+            shutil.copyfileobj(rows_buffer, dst, 1024 * 1024)
+
+        dst.write(SHEET_DATA_CLOSE)
+        dst.write(tail)
+        return written
+
+    def _update_dimension(self, head: bytes, last_row: int, last_col: int) -> bytes:
+        """Расширяет диапазон <dimension> листа до последней сгенерированной строки и столбца"""
+        match = DIMENSION_RE.search(head)
+        if match is None or not last_row:
+            return head
+        first_letters, first_row, end_letters, end_row = match.groups()
+        end_col = max(_column_index(end_letters or first_letters), last_col)
+        end_row = max(int(end_row or first_row), last_row)
+        ref = (first_letters + first_row + b':' + _column_letter(end_col) + str(end_row).encode("ascii"))
+        return head[:match.start()] + b'<dimension ref="' + ref + b'"/>' + head[match.end():]
+
+    def _row_attrs(self, row_xml: bytes) -> bytes:
+        """Атрибуты строки шаблона (высота и т.п.) без номера и диапазона"""
+        match = ROW_ATTRS_RE.match(row_xml)
+        if not match:
+            return b''
+        return ROW_SKIP_ATTRS_RE.sub(b'', match.group(1)).rstrip()
+
+    def _cell_styles(self, row_xml: bytes) -> Dict[int, bytes]:
+        """Стили ячеек строки-прототипа: {номер столбца: индекс стиля}"""
+        styles = {}
+        for match in CELL_RE.finditer(row_xml):
+            style = CELL_STYLE_RE.match(match.group(0))
+            if style and style.group(1) != b'0':
+                styles[_column_index(match.group(1))] = style.group(1)
+        return styles
+
+    def _row_xml(self, row_number: int, columns: Tuple[int, ...], row: StreamRow,
+                 styles: Dict[int, bytes], attrs: bytes) -> bytes:
+        """Собирает XML строки данных"""
+        row_ref = str(row_number).encode("ascii")
+        row_values, extra_cells = row
+        values = dict(zip(columns, row_values))
+        if extra_cells:
+            values.update(extra_cells)
+
+        parts = [b'<row r="', row_ref, b'"', attrs, b'>']
+        for col in sorted(styles.keys() | values.keys()):
+            parts.append(self._cell_xml(_column_letter(col) + row_ref, styles.get(col), values.get(col)))
+        parts.append(b'</row>')
+        return b''.join(parts)
+
+    def _cell_xml(self, ref: bytes, style: Optional[bytes], value: Any) -> bytes:
+        """Собирает XML ячейки (строки записываются как inlineStr)"""
+        style_attr = b' s="' + style + b'"' if style else b''
+
+        if value is None or value == '':
+            return b'<c r="' + ref + b'"' + style_attr + b'/>'
+
+        if isinstance(value, bool):
+            return b'<c r="' + ref + b'"' + style_attr + b' t="b"><v>' + (b'1' if value else b'0') + b'</v></c>'
+
+        if isinstance(value, (int, float)) and math.isfinite(value):
+            return b'<c r="' + ref + b'"' + style_attr + b'><v>' + repr(value).encode("ascii") + b'</v></c>'
+
+        text = escape(ILLEGAL_CHARACTERS_RE.sub('', str(value))).encode("utf-8")
+        return (b'<c r="' + ref + b'"' + style_attr + b' t="inlineStr"><is><t xml:space="preserve">'
+                + text + b'</t></is></c>')
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль сравнения штатного расписания с предыдущим состоянием
+"""
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+
+
+TAB_NUMBER_FIELD = 'Табельный номер'
+NAME_FIELD = 'ФИО работника'
+DEPARTMENT_FIELD = 'Подразделение 1'
+# Служебные поля сотрудника, которые не сравниваются
+IGNORED_FIELDS = frozenset({'vacation_dates'})
+
+SNAPSHOT_VERSION = 1
+# Имя файла сотрудника: "ФИО (табельный номер).xlsx"
+EMPLOYEE_FILE_RE = re.compile(r'^(?P<name>.*) \((?P<tab>[^()]*)\)\.xlsx$')
+
+
+@dataclass
+class ExistingEmployee:
+    """Файл сотрудника в дереве папок"""
+    tab_number: str
+    name: str
+    department: str
+    file_path: str
+
+
+@dataclass
+class EmployeeMove:
+    """Файл сотрудника нужно перенести: перевод в другое подразделение 1 или смена имени файла"""
+    employee: Dict[str, str]
+    existing: ExistingEmployee
+
+
+@dataclass
+class EmployeeChange:
+    """Сотрудник на прежнем месте с измененными полями: (поле, было, стало)"""
+    employee: Dict[str, str]
+    existing: ExistingEmployee
+    fields: List[Tuple[str, str, str]]
+
+
+@dataclass
+class StaffDiff:
+    """Отличия нового штатного расписания от дерева файлов и предыдущего снимка"""
+    added: List[Dict[str, str]] = field(default_factory=list)
+    removed: List[ExistingEmployee] = field(default_factory=list)
+    moved: List[EmployeeMove] = field(default_factory=list)
+    changed: List[EmployeeChange] = field(default_factory=list)
+    # Файл в папке своего подразделения, но имя файла устарело (сменилось ФИО)
+    renamed: List[EmployeeMove] = field(default_factory=list)
+    # Сотрудники, файл которых лежит в папке своего подразделения
+    matched: List[Tuple[Dict[str, str], ExistingEmployee]] = field(default_factory=list)
+    # Поля сравнивались со снимком предыдущего запуска (без снимка - только ФИО из имени файла)
+    has_snapshot: bool = False
+
+    @property
+    def unchanged_count(self) -> int:
+        return len(self.matched) - len(self.changed)
+
+    @property
+    def employees_to_create(self) -> List[Dict[str, str]]:
+        """Сотрудники, файла которых нет ни в одной папке"""
+        return list(self.added)
+
+    @property
+    def relocations(self) -> List[EmployeeMove]:
+        """Существующие файлы, которые переносятся или переименовываются"""
+        return self.moved + self.renamed
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def summary_lines(self) -> List[str]:
+        """Краткая сводка изменений для окна и консоли"""
+        lines = [
+            f"Новые сотрудники: {len(self.added)}",
+            f"Переведены в другое подразделение: {len(self.moved)}",
+            f"Изменены данные: {len(self.changed)} (из них сменили ФИО: {len(self.renamed)})",
+            f"Нет в штатном расписании (файлы остаются): {len(self.removed)}",
+            f"Без изменений: {self.unchanged_count}",
+        ]
+        if not self.has_snapshot:
+            lines.append("Снимок предыдущего запуска не найден - поля сравнены только по именам файлов")
+        return lines
+
+
+class StaffDiffer:
+    """
+    Сравнение штатного расписания по табельному номеру
+
+    Существующие сотрудники берутся из снимка дерева папок (имена файлов
+    "ФИО (табельный номер).xlsx" в папках подразделений), значения полей -
+    из снимка штатного расписания, который сохраняется в целевую папку после
+    успешного создания файлов. Сравнение выполняется за один проход по
+    словарю табельных номеров, файлы сотрудников не открываются.
+    """
+
+    def __init__(self, config: Config, directory_manager, excel_handler):
+        self.config = config
+        self.directory_manager = directory_manager
+        self.excel_handler = excel_handler
+        self.logger = logging.getLogger(__name__)
+
+    def diff(self, employees: List[Dict[str, str]], target_directory: str) -> StaffDiff:
+        """
+        Сравнивает сотрудников штатного расписания с содержимым целевой папки
+
+        Raises:
+            ValueError: снимок штатного расписания поврежден
+        """
+        index = self.index_tree(target_directory)
+        previous = self.load_snapshot(target_directory)
+        result = StaffDiff(has_snapshot=previous is not None)
+        previous = previous or {}
+
+        for employee in employees:
+            key = self._file_tab_number(employee)
+            records = index.pop(key, None)
+            if not records:
+                result.added.append(employee)
+                continue
+
+            department = self.directory_manager._clean_directory_name(employee.get(DEPARTMENT_FIELD, ''))
+            in_place = next((record for record in records if record.department == department), None)
+            # Копии файла в других подразделениях остаются лишними
+            result.removed.extend(record for record in records if record is not in_place and
+                                  (in_place is not None or record is not records[0]))
+            if in_place is None:
+                result.moved.append(EmployeeMove(employee, records[0]))
+                continue
+
+            result.matched.append((employee, in_place))
+            if Path(in_place.file_path).name != self.excel_handler.generate_output_filename(employee):
+                result.renamed.append(EmployeeMove(employee, in_place))
+            changes = self._field_changes(employee, in_place, previous.get(key))
+            if changes:
+                result.changed.append(EmployeeChange(employee, in_place, changes))
+
+        for records in index.values():
+            result.removed.extend(records)
+
+        self.logger.info(
+            f"Сравнение штатного расписания: новых {len(result.added)}, переведено {len(result.moved)}, "
+            f"изменено {len(result.changed)}, удалено {len(result.removed)}"
+        )
+        return result
+
+    def index_tree(self, target_directory: str) -> Dict[str, List[ExistingEmployee]]:
+        """Файлы сотрудников целевой папки по табельному номеру из имени файла"""
+        index: Dict[str, List[ExistingEmployee]] = {}
+        snapshot = self.directory_manager.snapshot(target_directory)
+        if snapshot is None:
+            return index
+
+        for dept_name, dept_snapshot in snapshot.departments.items():
+            for entry in dept_snapshot.employee_files:
+                match = EMPLOYEE_FILE_RE.match(entry.name)
+                if match is None:
+                    continue
+                record = ExistingEmployee(match.group('tab'), match.group('name'), dept_name, entry.path)
+                index.setdefault(record.tab_number, []).append(record)
+        return index
+
+    def _file_tab_number(self, employee: Dict[str, str]) -> str:
+        """Табельный номер в том виде, в котором он записан в имени файла"""
+        return EMPLOYEE_FILE_RE.match(self.excel_handler.generate_output_filename(employee)).group('tab')
+
+    def _field_changes(self, employee: Dict[str, str], existing: ExistingEmployee,
+                       previous: Optional[Dict[str, str]]) -> List[Tuple[str, str, str]]:
+        """Измененные поля сотрудника относительно снимка (без снимка - ФИО по имени файла)"""
+        if previous is None:
+            name = EMPLOYEE_FILE_RE.match(self.excel_handler.generate_output_filename(employee)).group('name')
+            return [(NAME_FIELD, existing.name, employee.get(NAME_FIELD, ''))] if name != existing.name else []
+
+        changes = []
+        for field_name in employee.keys() | previous.keys():
+            if field_name in IGNORED_FIELDS:
+                continue
+            old, new = previous.get(field_name, ''), employee.get(field_name, '')
+            if old != new:
+                changes.append((field_name, old, new))
+        return sorted(changes)
+
+    def snapshot_path(self, target_directory: str) -> Path:
+        """Путь к снимку штатного расписания в целевой папке"""
+        return Path(target_directory) / self.config.staff_snapshot_file
+
+    def load_snapshot(self, target_directory: str) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+        Снимок штатного расписания предыдущего запуска: {табельный номер: поля}
+
+        Returns:
+            None, если снимка нет
+
+        Raises:
+            ValueError: файл снимка поврежден или другой версии
+        """
+        path = self.snapshot_path(target_directory)
+        if not path.exists():
+            return None
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Не удалось прочитать снимок штатного расписания {path}: {e}")
+        if data.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия снимка штатного расписания {path}: {data.get('version')}")
+        return data['employees']
+
+    def save_snapshot(self, target_directory: str, employees: List[Dict[str, str]],
+                      pending: Optional[List[Dict[str, str]]] = None) -> None:
+        """
+        Сохраняет снимок штатного расписания, перенесенного в файлы
+
+        Args:
+            employees: сотрудники штатного расписания
+            pending: сотрудники, изменения которых еще не перенесены в файлы
+                     (для них остаются значения предыдущего снимка)
+        """
+        previous = self.load_snapshot(target_directory) or {}
+        pending_keys = {self._file_tab_number(employee) for employee in pending or []}
+        entries = {}
+        for employee in employees:
+            key = self._file_tab_number(employee)
+            if key not in pending_keys:
+                entries[key] = self._snapshot_entry(employee)
+            elif key in previous:
+                entries[key] = previous[key]
+        self._write_snapshot(target_directory, entries)
+
+    def update_snapshot(self, target_directory: str, employees: List[Dict[str, str]]) -> None:
+        """Переносит в снимок данные сотрудников, файлы которых обновлены"""
+        entries = self.load_snapshot(target_directory) or {}
+        for employee in employees:
+            entries[self._file_tab_number(employee)] = self._snapshot_entry(employee)
+        self._write_snapshot(target_directory, entries)
+
+    def _snapshot_entry(self, employee: Dict[str, str]) -> Dict[str, str]:
+        return {key: value for key, value in employee.items() if key not in IGNORED_FIELDS}
+
+    def _write_snapshot(self, target_directory: str, entries: Dict[str, Dict[str, str]]) -> None:
+        """Записывает снимок через временный файл"""
+        path = self.snapshot_path(target_directory)
+        data = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': datetime.now().isoformat(timespec='seconds'),
+            'employees': entries
+        }
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False, indent=1)
+        os.replace(temp_path, path)
+        self.logger.info(f"Снимок штатного расписания сохранен: {path} ({len(entries)} сотр.)")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль общих стилей оформления отчетов
+"""
+
+from copy import copy
+from dataclasses import dataclass
+from typing import List
+
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Protection, Side
+
+
+# Тонкая рамка таблиц отчетов (один объект на все приложение)
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+
+@dataclass(frozen=True)
+class CellStyle:
+    """Снимок оформления ячейки: объекты стилей общие для всех ячеек, которым он присваивается"""
+    font: Font
+    fill: PatternFill
+    border: Border
+    alignment: Alignment
+    protection: Protection
+    number_format: str
+
+
+class StyleRegistry:
+    """
+    Оформление диапазонов и строк книги общими объектами стилей
+
+    openpyxl хранит каждый присвоенный ячейке Font/Fill/Border в таблице
+    стилей книги один раз (одинаковые объекты не дублируются), поэтому
+    ячейкам присваиваются одни и те же объекты без копирования на каждую
+    ячейку. Рамка меняет только границы, шрифт, заливка и формат ячеек
+    шаблона сохраняются.
+    """
+
+    def __init__(self, workbook):
+        self.workbook = workbook
+
+    def stamp_border(self, worksheet, min_row: int, max_row: int, min_col: int, max_col: int,
+                     border: Border = THIN_BORDER) -> None:
+        """Применяет рамку ко всем ячейкам диапазона (включительно)"""
+        if max_row < min_row or max_col < min_col:
+            return
+
+        for row in worksheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+            for cell in row:
+                cell.border = border
+
+    def row_styles(self, worksheet, row: int, max_col: int) -> List[CellStyle]:
+        """Снимок стилей строки (столбцы 1..max_col) для последующего тиражирования"""
+        styles = []
+        for col in range(1, max_col + 1):
+            cell = worksheet.cell(row=row, column=col)
+            styles.append(CellStyle(
+                font=copy(cell.font),
+                fill=copy(cell.fill),
+                border=copy(cell.border),
+                alignment=copy(cell.alignment),
+                protection=copy(cell.protection),
+                number_format=cell.number_format
+            ))
+        return styles
+
+    def apply_row_styles(self, worksheet, row: int, styles: List[CellStyle]) -> None:
+        """Присваивает строке ранее снятые стили"""
+        for col, style in enumerate(styles, 1):
+            cell = worksheet.cell(row=row, column=col)
+            cell.font = style.font
+            cell.fill = style.fill
+            cell.border = style.border
+            cell.alignment = style.alignment
+            cell.protection = style.protection
+            cell.number_format = style.number_format
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль общего кэша правил заполнения шаблонов
+"""
+
+import os
+import threading
+from typing import Callable, Dict
+
+from core.events import event_bus, EventType, Event
+
+Rules = Dict[str, Dict[str, str]]
+
+
+class TemplateRulesCache:
+    """
+    Разобранные листы 'rules' шаблонов, общие для всех ExcelHandler процесса
+
+    Файл шаблона при обращении к кэшу не проверяется: запись удаляется по
+    событию TEMPLATE_CHANGED от TemplateWatcher, и измененный шаблон
+    разбирается заново. Вызывающий получает копию правил, поэтому изменения
+    правил одной операцией не видны другим. Заполняется заранее в фоновом
+    потоке при запуске приложения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Абсолютный путь шаблона -> правила
+        self._entries: Dict[str, Rules] = {}
+        event_bus.subscribe(EventType.TEMPLATE_CHANGED, self._on_template_changed)
+
+    def get(self, template_path: str, loader: Callable[[str], Rules]) -> Rules:
+        """Правила шаблона из кэша или разобранные loader"""
+        key = os.path.abspath(template_path)
+        with self._lock:
+            rules = self._entries.get(key)
+        if rules is None:
+            rules = loader(template_path)
+            with self._lock:
+                self._entries[key] = rules
+        return {rule_type: dict(type_rules) for rule_type, type_rules in rules.items()}
+
+    def invalidate(self, template_path: str) -> None:
+        """Удаляет правила шаблона из кэша"""
+        with self._lock:
+            self._entries.pop(os.path.abspath(template_path), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _on_template_changed(self, event: Event) -> None:
+        # Первая проверка шаблона (previous None) только фиксирует исходное состояние
+        if event.data["previous"] is not None:
+            self.invalidate(event.data["template_path"])
+
+
+template_rules_cache = TemplateRulesCache()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль переноса заполненных файлов сотрудников на новую версию шаблона
+"""
+
+import os
+import time
+import traceback
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, List
+
+import openpyxl
+
+from core.block_report_worker import _get_excel_handler
+from core.cancellation import is_cancelled, worker_token
+
+
+CORE_PROPS_PART = "docProps/core.xml"
+CORE_PROPS_VERSION = "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}version"
+
+
+def read_template_version(file_path: str) -> str:
+    """
+    Версия шаблона из свойств книги (cp:version) без загрузки книги
+
+    Returns:
+        str: версия или пустая строка, если свойство не записано
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        if CORE_PROPS_PART not in archive.namelist():
+            return ''
+        root = ET.fromstring(archive.read(CORE_PROPS_PART))
+    version = root.find(CORE_PROPS_VERSION)
+    return (version.text or '') if version is not None else ''
+
+
+def _read_header_values(excel_handler, workbook, value_rules: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Значения шапки по value-правилам файла (как записаны генератором: числа, строки)
+
+    Raises:
+        ValueError: лист правила отсутствует в файле
+    """
+    employee = {}
+    for cell_address, field_name in value_rules.items():
+        _, clean_address, sheet_name = excel_handler._parse_cell_address(cell_address)
+        if sheet_name is None:
+            # Адрес без листа генератор записывает на первый лист
+            worksheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            raise ValueError(f"В файле нет листа '{sheet_name}' для поля '{field_name}' ({cell_address})")
+        value = worksheet[clean_address.split(':')[0].replace('$', '')].value
+        employee[field_name] = value if value is not None else ''
+    return employee
+
+
+def _read_vacation_rows(config, workbook) -> List[Dict[str, Any]]:
+    """Введенные периоды отпусков по строкам формы (пустые строки сохраняют позицию)"""
+    structure = config.employee_file_structure
+    form = workbook.worksheets[structure["active_sheet_index"]]
+    rows = structure["employee_data_rows"]
+    columns = structure["vacation_columns"]
+    return [
+        {
+            'start_date': form[f"{columns['start_date']}{row}"].value,
+            'end_date': form[f"{columns['end_date']}{row}"].value
+        }
+        for row in range(rows["start"], rows["end"] + 1)
+    ]
+
+
+def migrate_employee_file(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Пересоздает файл сотрудника по текущему шаблону с данными старого файла
+
+    Шапка читается по правилам листа 'rules' самого файла, периоды отпусков -
+    из строк формы. Новый файл создается рядом во временном файле, исходный
+    переносится в резервную папку, новый занимает его место. Файл, уже
+    созданный по текущей версии шаблона, пропускается. После отмены операции
+    задача не начинается и возвращает cancelled = True.
+
+    Функция выполняется в процессе пула, поэтому принимает и возвращает
+    только простые данные.
+
+    Args:
+        task: {'file_path', 'backup_path', 'config_data'}
+
+    Returns:
+        Dict: {'file_path', 'employee_name', 'status' ('migrated', 'skipped', 'error'),
+               'cancelled', 'source_version', 'periods', 'duration', 'error'}
+    """
+    start = time.perf_counter()
+    file_path = task['file_path']
+    result = {
+        'file_path': file_path,
+        'employee_name': '',
+        'status': 'error',
+        'cancelled': False,
+        'source_version': '',
+        'periods': 0,
+        'duration': 0.0,
+        'error': None
+    }
+    # Временный файл с префиксом ~$ снимок папки считает временным файлом Excel
+    temp_path = str(Path(file_path).with_name(f"~$migrate_{Path(file_path).name}"))
+    if is_cancelled(worker_token()):
+        result['cancelled'] = True
+        return result
+
+    try:
+        excel_handler = _get_excel_handler(task['config_data'])
+        target_version = excel_handler.get_template_version()
+
+        # Версия читается из свойств в архиве: актуальные файлы не загружаются целиком
+        result['source_version'] = read_template_version(file_path)
+        if result['source_version'] == target_version:
+            result['status'] = 'skipped'
+            return result
+
+        workbook = openpyxl.load_workbook(file_path, data_only=False)
+        try:
+            rules = excel_handler.read_filling_rules(workbook, file_path)
+            employee = _read_header_values(excel_handler, workbook, rules.get('value', {}))
+            vacation_rows = _read_vacation_rows(excel_handler.config, workbook)
+        finally:
+            workbook.close()
+
+        result['employee_name'] = str(employee.get('ФИО работника', ''))
+        if not result['employee_name']:
+            raise ValueError("В файле не заполнено ФИО работника")
+        result['periods'] = sum(1 for row in vacation_rows if row['start_date'] or row['end_date'])
+        employee['vacation_dates'] = vacation_rows
+
+        if not excel_handler.create_employee_file(employee, temp_path):
+            raise ValueError("Не удалось создать файл по новому шаблону")
+
+        backup_path = Path(task['backup_path'])
+        backup_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(file_path, backup_path)
+        try:
+            os.replace(temp_path, file_path)
+        except OSError:
+            os.replace(backup_path, file_path)
+            raise
+        result['status'] = 'migrated'
+    except Exception as e:
+        result['error'] = f"{e}\n{traceback.format_exc()}"
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        result['duration'] = time.perf_counter() - start
+
+    return result
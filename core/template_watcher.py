@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль отслеживания изменений файлов шаблонов
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from config import Config
+from core.events import event_bus, EventType
+
+
+@dataclass(frozen=True)
+class TemplateState:
+    """Состояние файла шаблона на момент последней проверки"""
+    path: str
+    exists: bool
+    size: int = 0
+    mtime_ns: int = 0
+    content_hash: str = ""
+
+
+class TemplateWatcher:
+    """
+    Кэш наличия и содержимого шаблонов
+
+    Проверка выполняется по запросу (check / check_async), а не постоянным
+    опросом: stat шаблона на сетевом диске не выполняется при каждом
+    обращении к состоянию. Хэш содержимого считается только при изменении
+    размера или времени изменения файла, поэтому сохранение без изменений
+    не считается изменением. По каждому изменившемуся шаблону публикуется
+    TEMPLATE_CHANGED с новым состоянием.
+    """
+
+    # Размер блока чтения файла для хэша
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._states: Dict[str, TemplateState] = {}
+        self._checking = False
+        self._last_check: Optional[float] = None
+
+    def template_paths(self) -> List[str]:
+        return [self.config.employee_template, self.config.block_report_template,
+                self.config.general_report_template]
+
+    def state(self, template_path: str) -> Optional[TemplateState]:
+        """Последнее известное состояние шаблона (None - еще не проверялся)"""
+        with self._lock:
+            return self._states.get(template_path)
+
+    @property
+    def checked(self) -> bool:
+        """Выполнена ли хотя бы одна проверка"""
+        return self._last_check is not None
+
+    def seconds_since_check(self) -> Optional[float]:
+        if self._last_check is None:
+            return None
+        return time.monotonic() - self._last_check
+
+    def check(self) -> List[TemplateState]:
+        """
+        Проверяет шаблоны и публикует TEMPLATE_CHANGED по изменившимся
+
+        Returns:
+            List[TemplateState]: новые состояния изменившихся шаблонов
+        """
+        changed = []
+        for template_path in self.template_paths():
+            previous = self.state(template_path)
+            current = self._read_state(template_path, previous)
+            with self._lock:
+                self._states[template_path] = current
+            if (previous is not None and previous.exists == current.exists and
+                    previous.content_hash == current.content_hash):
+                # Файл не изменился или пересохранен с тем же содержимым
+                continue
+            changed.append((previous, current))
+        self._last_check = time.monotonic()
+
+        # События - после обновления всех состояний: обработчик видит результат всей проверки
+        for previous, current in changed:
+            self.logger.info("Шаблон изменился: %s (%s)", current.path, "найден" if current.exists else "отсутствует")
+            event_bus.emit_simple(
+                EventType.TEMPLATE_CHANGED,
+                {"template_path": current.path, "state": current, "previous": previous},
+                "TemplateWatcher"
+            )
+        return [current for _, current in changed]
+
+    def check_async(self, min_interval_seconds: float = 0.0) -> bool:
+        """
+        Запускает проверку в фоновом потоке
+
+        Проверка не запускается, если предыдущая еще идет или была меньше
+        min_interval_seconds назад.
+
+        Returns:
+            bool: True - проверка запущена
+        """
+        with self._lock:
+            age = self.seconds_since_check()
+            if self._checking or (age is not None and age < min_interval_seconds):
+                return False
+            self._checking = True
+        threading.Thread(target=self._check_in_background, name="template-watcher", daemon=True).start()
+        return True
+
+    def _check_in_background(self) -> None:
+        try:
+            self.check()
+        except Exception as e:
+            self.logger.error(f"Ошибка проверки шаблонов: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                self._checking = False
+
+    def _read_state(self, template_path: str, previous: Optional[TemplateState]) -> TemplateState:
+        """Состояние файла; хэш пересчитывается только при изменении размера или времени"""
+        try:
+            stat = os.stat(template_path)
+        except FileNotFoundError:
+            return TemplateState(template_path, exists=False)
+
+        if (previous is not None and previous.exists and
+                previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns):
+            return previous
+
+        digest = hashlib.sha256()
+        with open(template_path, 'rb') as template_file:
+            for chunk in iter(lambda: template_file.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return TemplateState(template_path, True, stat.st_size, stat.st_mtime_ns, digest.hexdigest())
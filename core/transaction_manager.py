@@ -17,7 +17,7 @@ from core.events import event_bus, EventType
 @dataclass
 class TransactionOperation:
     """Операция в транзакции"""
-    operation_type: str  # 'create_file', 'create_directory', 'delete_file'
+    operation_type: str  # 'create_file', 'create_directory', 'delete_file', 'move_file'
     path: str
     metadata: Dict[str, Any]
     backup_path: Optional[str] = None
@@ -122,6 +122,8 @@ class TransactionManager:
                         rollback_success &= self._rollback_create_directory(operation)
                     elif operation.operation_type == 'delete_file':
                         rollback_success &= self._rollback_delete_file(operation)
+                    elif operation.operation_type == 'move_file':
+                        rollback_success &= self._rollback_move_file(operation)
                 except Exception as e:
                     self.logger.error(f"Ошибка отката операции {operation.operation_type}: {e}")
                     rollback_success = False
@@ -173,7 +175,7 @@ class TransactionManager:
                 backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{path.name}"
                 backup_path = str(self._backup_dir / backup_name)
                 shutil.copy2(path, backup_path)
-                self.logger.debug(f"Создана резервная копия: {backup_path}")
+                self.logger.debug("Создана резервная копия: %s", backup_path)
             
             operation = TransactionOperation(
                 operation_type='create_file',
@@ -189,6 +191,51 @@ class TransactionManager:
             self.logger.error(f"Ошибка добавления операции создания файла: {e}")
             return False
     
+    def add_file_move(self, source_path: str, target_path: str, employee: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Добавляет операцию переноса файла в транзакцию (до переноса)
+        
+        Исходный файл копируется в резервную папку: при откате восстанавливается
+        его содержимое до переноса и правки шапки.
+        
+        Args:
+            source_path: текущий путь файла
+            target_path: новый путь файла
+            employee: данные сотрудника (для метаданных)
+            
+        Returns:
+            bool: True если операция добавлена успешно
+        """
+        if not self._transaction_active:
+            return True  # Если транзакция не активна, просто продолжаем
+        
+        try:
+            source = Path(source_path)
+            backup_path: Optional[str] = None
+            if self._backup_dir:
+                backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{source.name}"
+                backup_path = str(self._backup_dir / backup_name)
+                shutil.copy2(source, backup_path)
+                self.logger.debug("Создана резервная копия: %s", backup_path)
+            
+            metadata: Dict[str, Any] = {'source_path': str(source)}
+            if employee is not None:
+                metadata['employee'] = employee
+            
+            operation = TransactionOperation(
+                operation_type='move_file',
+                path=str(Path(target_path)),
+                metadata=metadata,
+                backup_path=backup_path
+            )
+            
+            self._current_transaction.append(operation)
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка добавления операции переноса файла: {e}")
+            return False
+    
     def add_directory_creation(self, dir_path: str, department_name: Optional[str] = None) -> bool:
         """
         Добавляет операцию создания директории в транзакцию
@@ -227,11 +274,11 @@ class TransactionManager:
                 if operation.backup_path and Path(operation.backup_path).exists():
                     # Восстанавливаем из резервной копии
                     shutil.copy2(operation.backup_path, path)
-                    self.logger.debug(f"Восстановлен файл из резервной копии: {operation.path}")
+                    self.logger.debug("Восстановлен файл из резервной копии: %s", operation.path)
                 else:
                     # Удаляем созданный файл
                     path.unlink()
-                    self.logger.debug(f"Удален созданный файл: {operation.path}")
+                    self.logger.debug("Удален созданный файл: %s", operation.path)
                 
                 # Отправляем событие об откате
                 event_bus.emit_simple(
@@ -255,7 +302,7 @@ class TransactionManager:
                 # Удаляем директорию только если она пустая
                 try:
                     path.rmdir()
-                    self.logger.debug(f"Удалена созданная директория: {operation.path}")
+                    self.logger.debug("Удалена созданная директория: %s", operation.path)
                 except OSError:
                     # Директория не пустая - оставляем как есть
                     self.logger.warning(f"Директория не пустая, оставляем: {operation.path}")
@@ -266,13 +313,34 @@ class TransactionManager:
             self.logger.error(f"Ошибка отката создания директории {operation.path}: {e}")
             return False
     
+    def _rollback_move_file(self, operation: TransactionOperation) -> bool:
+        """Откатывает перенос файла: файл возвращается на прежнее место"""
+        try:
+            source = Path(operation.metadata['source_path'])
+            target = Path(operation.path)
+            
+            if operation.backup_path and Path(operation.backup_path).exists():
+                # Восстанавливаем содержимое до правки шапки
+                shutil.copy2(operation.backup_path, source)
+                if target.exists():
+                    target.unlink()
+            elif target.exists():
+                target.replace(source)
+            self.logger.debug("Перенос файла откачен: %s -> %s", operation.path, source)
+            
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Ошибка отката переноса файла {operation.path}: {e}")
+            return False
+    
     def _rollback_delete_file(self, operation: TransactionOperation) -> bool:
         """Откатывает удаление файла"""
         try:
             if operation.backup_path and Path(operation.backup_path).exists():
                 # Восстанавливаем из резервной копии
                 shutil.copy2(operation.backup_path, operation.path)
-                self.logger.debug(f"Восстановлен удаленный файл: {operation.path}")
+                self.logger.debug("Восстановлен удаленный файл: %s", operation.path)
             
             return True
             
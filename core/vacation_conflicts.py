@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Модуль поиска пересечений отпусков внутри команды
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+
+
+# Поля сотрудника, используемые для группировки
+DEPARTMENT_FIELDS = ['Подразделение 4', 'Подразделение 3', 'Подразделение 2', 'Подразделение 1']
+POSITION_FIELD = 'Должность'
+
+# Столбцы листа пересечений (самая широкая строка - пара сотрудников, 9 значений)
+SHEET_COLUMNS = tuple(range(1, 10))
+
+
+@dataclass
+class ConflictPair:
+    """Пересечение отпусков двух сотрудников"""
+    group_type: str
+    group_name: str
+    employee_a: str
+    tab_number_a: str
+    employee_b: str
+    tab_number_b: str
+    start_date: date
+    end_date: date
+
+    @property
+    def days(self) -> int:
+        """Количество дней пересечения"""
+        return (self.end_date - self.start_date).days + 1
+
+
+@dataclass
+class OverlapWindow:
+    """Непрерывное окно, в котором отдыхают одновременно два и более сотрудника"""
+    group_type: str
+    group_name: str
+    start_date: date
+    end_date: date
+    peak: int
+    employees: List[str] = field(default_factory=list)
+
+    @property
+    def days(self) -> int:
+        """Длительность окна в днях"""
+        return (self.end_date - self.start_date).days + 1
+
+
+@dataclass
+class ConflictReport:
+    """Результат поиска пересечений"""
+    pairs: List[ConflictPair] = field(default_factory=list)
+    windows: List[OverlapWindow] = field(default_factory=list)
+    periods_count: int = 0
+
+    @property
+    def has_conflicts(self) -> bool:
+        """Есть ли хотя бы одно пересечение"""
+        return bool(self.pairs)
+
+    def format_report(self) -> str:
+        """Форматирует отчет в читаемый вид"""
+        report = []
+        report.append("=" * 60)
+        report.append("ПЕРЕСЕЧЕНИЯ ОТПУСКОВ")
+        report.append("=" * 60)
+        report.append(f"Проверено периодов: {self.periods_count}")
+        report.append(f"Пересекающихся пар: {len(self.pairs)}")
+        report.append(f"Окон одновременного отсутствия: {len(self.windows)}")
+
+        if not self.pairs:
+            report.append("")
+            report.append("Пересечений не найдено")
+            return "\n".join(report)
+
+        current_group = None
+        for pair in self.pairs:
+            group = (pair.group_type, pair.group_name)
+            if group != current_group:
+                current_group = group
+                report.append("")
+                report.append(f"[{pair.group_type}] {pair.group_name}")
+            report.append(
+                f"  {pair.employee_a} / {pair.employee_b}: "
+                f"{pair.start_date.strftime('%d.%m.%Y')} - {pair.end_date.strftime('%d.%m.%Y')} ({pair.days} дн.)"
+            )
+
+        report.append("")
+        report.append("Окна одновременного отсутствия:")
+        for window in self.windows:
+            report.append(
+                f"  [{window.group_type}] {window.group_name}: "
+                f"{window.start_date.strftime('%d.%m.%Y')} - {window.end_date.strftime('%d.%m.%Y')}, "
+                f"одновременно до {window.peak} сотр. ({', '.join(window.employees)})"
+            )
+
+        return "\n".join(report)
+
+
+class VacationConflictDetector:
+    """
+    Поиск пересечений отпусков методом заметающей прямой
+
+    Периоды каждой группы сортируются по датам начала/окончания один раз
+    (O(n log n)), после чего один проход находит все пересекающиеся пары
+    и окна одновременного отсутствия. Стоимость прохода пропорциональна
+    числу периодов плюс числу найденных пересечений.
+    """
+
+    GROUP_DEPARTMENT = "Подразделение"
+    GROUP_POSITION = "Должность"
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def detect(self, vacation_infos: List[Any]) -> ConflictReport:
+        """
+        Ищет пересечения по подразделениям и по должностям
+
+        Args:
+            vacation_infos: список VacationInfo (нужны только employee и periods)
+
+        Returns:
+            ConflictReport: найденные пары и окна
+        """
+        report = ConflictReport()
+
+        by_department: Dict[str, List[Tuple[date, date, str, str]]] = {}
+        by_position: Dict[str, List[Tuple[date, date, str, str]]] = {}
+
+        for vacation_info in vacation_infos:
+            employee = vacation_info.employee
+            name = employee.get('ФИО работника', '')
+            tab_number = employee.get('Табельный номер', '') or name
+            department = self._get_department(employee)
+            position = employee.get(POSITION_FIELD, '')
+
+            for period in vacation_info.periods:
+                if not period.start_date or not period.end_date or period.end_date < period.start_date:
+                    continue
+                interval = (period.start_date, period.end_date, tab_number, name)
+                report.periods_count += 1
+                if department:
+                    by_department.setdefault(department, []).append(interval)
+                if position:
+                    by_position.setdefault(position, []).append(interval)
+
+        for group_type, groups in ((self.GROUP_DEPARTMENT, by_department), (self.GROUP_POSITION, by_position)):
+            for group_name in sorted(groups):
+                pairs, windows = self._sweep(group_type, group_name, groups[group_name])
+                report.pairs.extend(pairs)
+                report.windows.extend(windows)
+
+        self.logger.info(
+            f"Проверка пересечений: {report.periods_count} периодов, "
+            f"{len(report.pairs)} пар, {len(report.windows)} окон"
+        )
+        return report
+
+    def _get_department(self, employee: Dict[str, str]) -> str:
+        """Возвращает самое детальное заполненное подразделение сотрудника"""
+        for field_name in DEPARTMENT_FIELDS:
+            value = employee.get(field_name, '')
+            if value:
+                return str(value)
+        return ''
+
+    def _sweep(self, group_type: str, group_name: str,
+               intervals: List[Tuple[date, date, str, str]]) -> Tuple[List[ConflictPair], List[OverlapWindow]]:
+        """Один проход заметающей прямой по периодам группы"""
+        # События: (день, тип, индекс). Окончание хранится как первый свободный день,
+        # тип 0 (окончание) сортируется раньше типа 1 (начало) в тот же день
+        events = []
+        for idx, (start, end, _, _) in enumerate(intervals):
+            events.append((start, 1, idx))
+            events.append((end + timedelta(days=1), 0, idx))
+        events.sort()
+
+        active: Dict[int, Tuple[date, date, str, str]] = {}
+        # Счетчик одновременно отдыхающих периодов по каждому сотруднику
+        active_employees: Dict[str, int] = {}
+        names: Dict[str, str] = {}
+
+        pair_overlaps: Dict[Tuple[str, str], List[Tuple[date, date]]] = {}
+        windows: List[OverlapWindow] = []
+        window: Optional[OverlapWindow] = None
+        window_members: Dict[str, None] = {}
+
+        i = 0
+        while i < len(events):
+            day = events[i][0]
+            # Обрабатываем все события одного дня, затем фиксируем состояние
+            while i < len(events) and events[i][0] == day:
+                _, event_type, idx = events[i]
+                start, end, tab_number, name = intervals[idx]
+                if event_type == 0:
+                    del active[idx]
+                    active_employees[tab_number] -= 1
+                    if active_employees[tab_number] == 0:
+                        del active_employees[tab_number]
+                else:
+                    for other_start, other_end, other_tab, _ in active.values():
+                        if other_tab == tab_number:
+                            continue
+                        key = (other_tab, tab_number) if other_tab < tab_number else (tab_number, other_tab)
+                        pair_overlaps.setdefault(key, []).append((max(start, other_start), min(end, other_end)))
+                    active[idx] = intervals[idx]
+                    active_employees[tab_number] = active_employees.get(tab_number, 0) + 1
+                    names[tab_number] = name
+                i += 1
+
+            concurrent = len(active_employees)
+            if concurrent >= 2:
+                if window is None:
+                    window = OverlapWindow(group_type, group_name, day, day, concurrent)
+                    window_members = {}
+                window.peak = max(window.peak, concurrent)
+                for tab_number in active_employees:
+                    window_members[tab_number] = None
+            elif window is not None:
+                window.end_date = day - timedelta(days=1)
+                window.employees = [names[tab] for tab in window_members]
+                windows.append(window)
+                window = None
+
+        pairs = []
+        for (tab_a, tab_b), overlaps in pair_overlaps.items():
+            for start, end in self._merge_ranges(overlaps):
+                pairs.append(ConflictPair(
+                    group_type=group_type,
+                    group_name=group_name,
+                    employee_a=names[tab_a],
+                    tab_number_a=tab_a,
+                    employee_b=names[tab_b],
+                    tab_number_b=tab_b,
+                    start_date=start,
+                    end_date=end
+                ))
+        pairs.sort(key=lambda p: (p.start_date, p.employee_a, p.employee_b))
+
+        return pairs, windows
+
+    def _merge_ranges(self, ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+        """Объединяет смежные и пересекающиеся диапазоны дат"""
+        merged: List[Tuple[date, date]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + timedelta(days=1):
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def iter_sheet_rows(self, report: ConflictReport) -> Iterator[List[Any]]:
+        """
+        Строки листа пересечений в отчете (заголовки, пары, окна) по одной
+
+        Строки формируются лениво, чтобы большие отчеты не держали
+        в памяти еще одну копию всех пересечений.
+        """
+        yield ["Пересекающиеся отпуска"]
+        yield ["Разрез", "Группа", "Сотрудник 1", "Таб. номер 1",
+               "Сотрудник 2", "Таб. номер 2", "Начало", "Окончание", "Дней"]
+        if not report.pairs:
+            yield ["Пересечений не найдено"]
+        for pair in report.pairs:
+            yield [pair.group_type, pair.group_name,
+                   pair.employee_a, pair.tab_number_a,
+                   pair.employee_b, pair.tab_number_b,
+                   pair.start_date.strftime('%d.%m.%Y'), pair.end_date.strftime('%d.%m.%Y'), pair.days]
+
+        yield []
+        yield ["Окна одновременного отсутствия"]
+        yield ["Разрез", "Группа", "Начало", "Окончание", "Дней",
+               "Одновременно сотрудников", "Сотрудники"]
+        for window in report.windows:
+            yield [window.group_type, window.group_name,
+                   window.start_date.strftime('%d.%m.%Y'), window.end_date.strftime('%d.%m.%Y'),
+                   window.days, window.peak, ", ".join(window.employees)]
@@ -82,7 +82,7 @@ class Validator:
             # Загружаем правила заполнения из шаблона для динамического маппинга
             from core.excel_handler import ExcelHandler
             excel_handler = ExcelHandler(self.config)
-            rules = excel_handler._load_filling_rules(self.config.employee_template)
+            rules = excel_handler._get_cached_rules(self.config.employee_template)
             needed_fields = list(rules.get('value', {}).values())
             # Чтение данных сотрудников по нужным полям
             all_employees = self._read_employees(worksheet, header_row, header_map, needed_fields)
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Создание отчета по блоку - Автономный скрипт
-Использует файлы сотрудников в текущей папке для создания отчета по подразделению
+Создание отчета по блоку - отдельный скрипт
+Использует файлы сотрудников в текущей папке для создания отчета по подразделению.
+Запускается из корня проекта: календарь, статусы форм, пересечения отпусков и
+оформление берутся из config и модулей core (calendar_index, directory_snapshot,
+form_status, style_registry, vacation_conflicts)
 """
 
 import os
@@ -10,13 +13,12 @@ import sys
 import shutil
 import re
 from pathlib import Path
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from typing import List, Optional, Dict, Any
 
 # Проверка зависимостей
 try:
     import openpyxl
-    from openpyxl.styles import Border, Side
 except ImportError:
     print("ОШИБКА: Не установлена библиотека openpyxl")
     print("Установите: pip install openpyxl")
@@ -24,13 +26,20 @@ except ImportError:
     time.sleep(3)
     sys.exit(1)
 
+from config import Config
+from core.calendar_index import CalendarIndex, get_calendar_index
+from core.directory_snapshot import DirectoryScanner
+from core.form_status import FormStatusCalculator
+from core.style_registry import StyleRegistry
+from core.vacation_conflicts import VacationConflictDetector, ConflictReport
+
 # =====================================================
 # КОНСТАНТЫ
 # =====================================================
 
 TEMPLATE_PATH = r"M:\Подразделения\АУП\Стажерская программа\Отпуск Р7\templates\block_report_template v3.xlsx"
-TARGET_YEAR = 2026
-DAYS_IN_MONTHS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+TARGET_YEAR = Config.DEFAULT_CONFIG["target_year"]
+CALENDAR_YEARS = Config.DEFAULT_CONFIG["calendar_years"]
 MONTH_NAMES = ['Январь', 'Февраль', 'Март', 'Апрель', 'Май', 'Июнь',
                'Июль', 'Август', 'Сентябрь', 'Октябрь', 'Ноябрь', 'Декабрь']
 
@@ -40,6 +49,10 @@ VALIDATION_STATUSES = {
     "filled_correct": "Форма заполнена корректно"
 }
 
+CONFLICTS_SHEET_NAME = "Пересечения"
+
+FORM_STATUS_CALCULATOR = FormStatusCalculator(Config())
+
 CALENDAR_START_COL = 12
 CALENDAR_MONTH_ROW = 7
 CALENDAR_DAY_ROW = 8
@@ -213,46 +226,15 @@ def scan_employee_files(directory: str) -> List[str]:
     
     print(f"Сканирование папки: {directory_path.absolute()}")
     
-    for file_path in directory_path.iterdir():
-        if (file_path.is_file() and 
-            file_path.suffix.lower() == '.xlsx' and 
-            not file_path.name.startswith('~$') and 
-            not file_path.name.startswith('!') and   # Системные файлы
-            not file_path.name.startswith('Отчет') and  # Отчеты по блоку
-            not file_path.name.startswith('отчет') and  # Отчеты по блоку (с маленькой буквы)
-            not 'отчет' in file_path.name.lower() and  # Любые отчеты
-            not file_path.name.startswith('ОБЩИЙ_ОТЧЕТ') and  # Общие отчеты
-            not file_path.name.startswith('общий_отчет') and  # Общие отчеты (с маленькой буквы)
-            is_employee_file(file_path.name)):
-            employee_files.append(str(file_path))
+    # Отчеты, временные и системные файлы отсеиваются классификацией снимка папки
+    dept_snapshot = DirectoryScanner().scan_department(str(directory_path))
+    for entry in dept_snapshot.employee_files:
+        if is_employee_file(entry.name):
+            employee_files.append(entry.path)
     
     print(f"Найдено файлов сотрудников: {len(employee_files)}")
     return employee_files
 
-def parse_date(date_value) -> Optional[date]:
-    """Парсит дату"""
-    if not date_value:
-        return None
-    
-    if isinstance(date_value, date):
-        return date_value
-    if isinstance(date_value, datetime):
-        return date_value.date()
-    
-    date_str = str(date_value).strip()
-    if not date_str:
-        return None
-    
-    formats = ["%d.%m.%Y", "%d.%m.%y", "%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y"]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    
-    return None
-
 def get_cell_value(worksheet, cell_address: str):
     """Получает значение ячейки"""
     try:
@@ -290,52 +272,14 @@ def read_vacation_info(file_path: str, employee_rules: Dict = None) -> Optional[
             except Exception:
                 employee[field_name] = ""
         
-        # ОБНОВЛЕННАЯ ЛОГИКА: Читаем статус из B12 ПЕРЕД чтением периодов
-        status_value = get_cell_value(worksheet, "B12")
-        status_text = str(status_value).strip() if status_value else ""
-        
-        # Определяем статус валидации
-        if status_text == VALIDATION_STATUSES["filled_correct"]:
-            vacation_status = "Форма заполнена корректно"
-        elif status_text == VALIDATION_STATUSES["filled_incorrect"]:
-            vacation_status = "Форма заполнена некорректно"
-        elif status_text == VALIDATION_STATUSES["not_filled"]:
-            vacation_status = "Форма не заполнена"
-        else:
-            # Неизвестные статусы обрабатываем по содержимому
-            if "некорректно" in status_text.lower() or "ошибка" in status_text.lower():
-                vacation_status = "Форма заполнена некорректно"
-            elif "не заполнена" in status_text.lower() or not status_text:
-                vacation_status = "Форма не заполнена"
-            else:
-                vacation_status = "Форма заполнена некорректно"
-        
-        # КЛЮЧЕВОЕ ИЗМЕНЕНИЕ: Читаем периоды отпусков ТОЛЬКО если статус "Форма заполнена корректно"
-        periods = []
-        if vacation_status == "Форма заполнена корректно":
-            for row in range(15, 30):
-                start_date_value = get_cell_value(worksheet, f"C{row}")
-                end_date_value = get_cell_value(worksheet, f"D{row}")
-                
-                if not start_date_value or not end_date_value:
-                    continue
-                
-                try:
-                    start_date = parse_date(start_date_value)
-                    end_date = parse_date(end_date_value)
-                    
-                    if start_date and end_date:
-                        # ОБНОВЛЕННАЯ ПРОВЕРКА: Читаем продолжительность из столбца E
-                        days_value = get_cell_value(worksheet, f"E{row}")
-                        if days_value and isinstance(days_value, (int, float)) and int(days_value) > 0:
-                            days = int(days_value)
-                            periods.append(VacationPeriod(start_date, end_date, days))
-                        else:
-                            # Если значение не найдено в столбце E, равно 0 или отрицательное, пропускаем этот период
-                            continue
-                except Exception:
-                    continue
-        else:
+        # Статус рассчитывается по логике шаблона, без сохраненного Excel значения B12;
+        # нераспознанные данные формы - ошибка чтения файла
+        form_status = FORM_STATUS_CALCULATOR.evaluate(FORM_STATUS_CALCULATOR.read_inputs(workbook))
+        vacation_status = form_status.status.value
+        status_text = form_status.text
+        periods = [VacationPeriod(p.start_date, p.end_date, p.days) for p in form_status.periods]
+        
+        if vacation_status != "Форма заполнена корректно":
             # ВАЖНО: Если статус НЕ "Форма заполнена корректно", периоды не читаем
             print(f"Статус формы '{status_text}' не является 'Форма заполнена корректно', периоды не читаются")
         
@@ -352,45 +296,35 @@ def read_vacation_info(file_path: str, employee_rules: Dict = None) -> Optional[
         print(f"ОШИБКА: Не удалось прочитать файл {file_path}: {e}")
         return None
 
+def get_report_calendar() -> CalendarIndex:
+    """Возвращает календарь отчета"""
+    return get_calendar_index(TARGET_YEAR, CALENDAR_YEARS, CALENDAR_START_COL)
+
 def get_calendar_column(target_date: date, start_col: int) -> Optional[int]:
     """Вычисляет столбец для даты в календаре"""
-    if target_date.year != TARGET_YEAR:
-        return None
-    
-    col_offset = sum(DAYS_IN_MONTHS[:target_date.month - 1]) + target_date.day - 1
-    return start_col + col_offset
+    return get_calendar_index(TARGET_YEAR, CALENDAR_YEARS, start_col).column(target_date)
 
 def fill_calendar_matrix(worksheet, vacation_infos: List[VacationInfo]):
     """Заполняет календарную матрицу"""
     try:
+        calendar_index = get_report_calendar()
+        
         # Заголовки месяцев и дней
-        col_offset = 0
-        for month_idx, month_name in enumerate(MONTH_NAMES):
-            month_col = CALENDAR_START_COL + col_offset
-            worksheet.cell(row=CALENDAR_MONTH_ROW, column=month_col, value=month_name)
-            
-            days_in_month = DAYS_IN_MONTHS[month_idx]
+        for month, month_col, days_in_month in calendar_index.month_columns():
+            worksheet.cell(row=CALENDAR_MONTH_ROW, column=month_col, value=MONTH_NAMES[month - 1])
             for day in range(1, days_in_month + 1):
-                day_col = CALENDAR_START_COL + col_offset + day - 1
-                worksheet.cell(row=CALENDAR_DAY_ROW, column=day_col, value=day)
-            
-            col_offset += days_in_month
+                worksheet.cell(row=CALENDAR_DAY_ROW, column=month_col + day - 1, value=day)
         
         # Отпуска сотрудников - только для статуса "корректно"
         for emp_idx, vacation_info in enumerate(vacation_infos):
             emp_row = EMPLOYEE_DATA_START_ROW + emp_idx
             # ОБНОВЛЕННАЯ ЛОГИКА: Заполняем календарь только если есть периоды (т.е. статус корректный)
             for period in vacation_info.periods:
-                current_date = period.start_date
-                while current_date <= period.end_date:
-                    if current_date.year == TARGET_YEAR:
-                        day_col = get_calendar_column(current_date, CALENDAR_START_COL)
-                        if day_col:
-                            worksheet.cell(row=emp_row, column=day_col, value=1)
-                    
-                    current_date += timedelta(days=1)
-                    if current_date > period.end_date:
-                        break
+                columns = calendar_index.column_range(period.start_date, period.end_date)
+                if columns is None:
+                    continue
+                for day_col in range(columns[0], columns[1] + 1):
+                    worksheet.cell(row=emp_row, column=day_col, value=1)
                         
     except Exception as e:
         print(f"ПРЕДУПРЕЖДЕНИЕ: Ошибка заполнения календаря: {e}")
@@ -485,9 +419,6 @@ def get_row_data(item, index: int, prefix: str) -> Dict[str, Any]:
 
 def apply_borders_to_table(worksheet, data_count: int, column_mapping: Dict[str, tuple]):
     """Применяет границы к таблице"""
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                       top=Side(style='thin'), bottom=Side(style='thin'))
-    
     # Находим минимальную и максимальную строку и столбец
     min_row = float('inf')
     max_row = 0
@@ -505,11 +436,9 @@ def apply_borders_to_table(worksheet, data_count: int, column_mapping: Dict[str,
         min_row = min(min_row, header_row + 1)  # +1 потому что данные начинаются со следующей строки
         max_row = max(max_row, header_row + 1 + data_count - 1)  # последняя строка с данными
     
-    # Применяем границы ко всем ячейкам в диапазоне
-    for row in range(min_row, max_row + 1):
-        for col in range(min_col, max_col + 1):
-            cell = worksheet.cell(row=row, column=col)
-            cell.border = thin_border
+    # Применяем границы ко всему диапазону одним общим стилем
+    if data_count > 0:
+        StyleRegistry(worksheet.parent).stamp_border(worksheet, min_row, max_row, min_col, max_col)
 
 def normalize_vacation_data(vacation_infos: List[VacationInfo]) -> List[Dict]:
     """
@@ -533,7 +462,21 @@ def normalize_vacation_data(vacation_infos: List[VacationInfo]) -> List[Dict]:
                 })
     return normalized_data
 
-def create_block_report(block_name: str, vacation_infos: List[VacationInfo], output_path: str) -> bool:
+def fill_conflicts_sheet(workbook, conflict_report: ConflictReport):
+    """Добавляет лист с пересечениями отпусков"""
+    try:
+        if CONFLICTS_SHEET_NAME in workbook.sheetnames:
+            del workbook[CONFLICTS_SHEET_NAME]
+        worksheet = workbook.create_sheet(CONFLICTS_SHEET_NAME)
+        
+        for row in VacationConflictDetector().iter_sheet_rows(conflict_report):
+            worksheet.append(row)
+            
+    except Exception as e:
+        print(f"ПРЕДУПРЕЖДЕНИЕ: Ошибка заполнения листа пересечений: {e}")
+
+def create_block_report(block_name: str, vacation_infos: List[VacationInfo], output_path: str,
+                        conflict_report: Optional[ConflictReport] = None) -> bool:
     """Создает отчет по блоку"""
     try:
         # Копируем шаблон
@@ -572,6 +515,10 @@ def create_block_report(block_name: str, vacation_infos: List[VacationInfo], out
             normalized_data = normalize_vacation_data(sorted_vacation_infos)
             fill_table_by_prefix(workbook['Print'], normalized_data, rules, 'print_', get_row_data)
         
+        if conflict_report is None:
+            conflict_report = VacationConflictDetector().detect(vacation_infos)
+        fill_conflicts_sheet(workbook, conflict_report)
+        
         workbook.save(output_path)
         workbook.close()
         
@@ -667,7 +614,8 @@ def main():
     output_filename = re.sub(invalid_chars, '_', output_filename)
     output_path = Path(current_dir) / output_filename
     
-    success = create_block_report(block_name, vacation_infos, str(output_path))
+    conflict_report = VacationConflictDetector().detect(vacation_infos)
+    success = create_block_report(block_name, vacation_infos, str(output_path), conflict_report)
     
     if success:
         print()
@@ -698,6 +646,9 @@ def main():
             total_days = total_days_by_status.get(status, 0)
             print(f"  {status}: {count} сотр., {total_days} дней")
         
+        print()
+        print(conflict_report.format_report())
+        
         print("\nОтчет создан в текущей папке.")
     else:
         print("ОШИБКА: Не удалось создать отчет")
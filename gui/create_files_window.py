@@ -16,7 +16,9 @@ import os
 
 
 from config import Config
+from gui.log_view import LogView
 from core.processor import VacationProcessor
+from core.cancellation import CancellationToken
 from core.events import event_bus, EventType
 from models import ProcessingProgress, ProcessingStatus
 
@@ -24,6 +26,8 @@ from models import ProcessingProgress, ProcessingStatus
 class CreateFilesWindow:
     """Окно для создания файлов отпусков сотрудников"""
     
+    # Источник событий прогресса, которые окно отправляет из рабочих потоков себе же
+    EVENT_SOURCE = "CreateFilesWindow"
 
     def __init__(self, parent: tk.Tk, config: Config, main_window):
         """Конструктор окна создания файлов"""
@@ -59,6 +63,8 @@ class CreateFilesWindow:
         # Инициализация переменной прогресса для совместимости с on_processing_complete
         self.progress_var = tk.IntVar(value=0)
         self.stop_processing = False
+        # Токен отмены текущего запуска (передается в процессор)
+        self.cancel_token = None
         
         # Подписка на события
         self._setup_event_listeners()
@@ -75,15 +81,29 @@ class CreateFilesWindow:
 
     def _setup_event_listeners(self):
         """Настройка подписки на события"""
-        event_bus.subscribe(EventType.FILE_CREATED, self._on_file_created)
-        event_bus.subscribe(EventType.DIRECTORY_CREATED, self._on_directory_created)
-        event_bus.subscribe(EventType.ERROR_OCCURRED, self._on_error_occurred)
+        for event_type, handler in self._event_handlers():
+            event_bus.subscribe(event_type, handler)
+    
+    def _event_handlers(self):
+        """Обработчики событий шины окна"""
+        return [
+            (EventType.FILE_CREATED, self._on_file_created),
+            (EventType.DIRECTORY_CREATED, self._on_directory_created),
+            (EventType.ERROR_OCCURRED, self._on_error_occurred),
+            (EventType.PROGRESS_UPDATE, self._on_progress_event),
+            (EventType.DEPARTMENT_PROGRESS, self._on_department_progress_event),
+            (EventType.FILE_PROGRESS, self._on_file_progress_event),
+        ]
     
     def _on_file_created(self, event):
-        """Обработчик события создания файла"""
-        file_path = event.data.get("file_path")
-        if file_path and hasattr(self, 'created_files'):
-            self.created_files.append(file_path)
+        """Обработчик события создания файла (из очереди шины приходит пакет файлов)"""
+        if not hasattr(self, 'created_files'):
+            return
+        for data in event.items:
+            # Перенесенный или пропущенный (уже существовавший) файл не создан
+            # в этом запуске и при откате не удаляется
+            if data.get("file_path") and not data.get("moved_from") and not data.get("skipped"):
+                self.created_files.append(data["file_path"])
     
     def _on_directory_created(self, event):
         """Обработчик события создания папки"""
@@ -181,44 +201,9 @@ class CreateFilesWindow:
         self.info_frame.columnconfigure(0, weight=1)
         self.info_frame.rowconfigure(0, weight=1)
         
-        # Текстовая область с прокруткой и возможностью копирования
-        self.info_text = tk.Text(
-            self.info_frame,
-            height=12,
-            wrap=tk.WORD,
-            font=("TkDefaultFont", 9),
-            state=tk.NORMAL,
-            cursor="arrow"
-        )
-        
-        # Делаем текст доступным для выделения и копирования
-        def on_key(event):
-            # Разрешаем только копирование
-            if event.state & 0x4:  # Ctrl нажат
-                if event.keysym.lower() in ['c', 'a']:
-                    return  # Разрешаем Ctrl+C и Ctrl+A
-            return "break"  # Блокируем все остальные клавиши
-        
-        self.info_text.bind('<Key>', on_key)
-        self.info_text.bind('<Control-a>', lambda e: self.info_text.tag_add("sel", "1.0", "end"))
-        
-        # Контекстное меню для копирования
-        def show_context_menu(event):
-            try:
-                context_menu = tk.Menu(self.info_text, tearoff=0)
-                context_menu.add_command(label="Выделить всё", command=lambda: self.info_text.tag_add("sel", "1.0", "end"))
-                context_menu.add_command(label="Копировать", command=lambda: self.copy_selected_text())
-                context_menu.tk_popup(event.x_root, event.y_root)
-            except:
-                pass
-        
-        self.info_text.bind('<Button-3>', show_context_menu)
-        
-        info_scrollbar = ttk.Scrollbar(self.info_frame, orient=tk.VERTICAL, command=self.info_text.yview)
-        self.info_text.configure(yscrollcommand=info_scrollbar.set)
-        
-        self.info_text.grid(row=0, column=0, sticky="nsew")
-        info_scrollbar.grid(row=0, column=1, sticky="ns")
+        # Сообщения выводятся пакетами по таймеру, полный текст - в файле лога
+        self.log_view = LogView(self.info_frame, self.config, "create_files")
+        self.log_view.grid(row=0, column=0, sticky="nsew")
         
         # Инициализация
         self.add_info("Выберите файл с сотрудниками для начала работы")
@@ -270,7 +255,7 @@ class CreateFilesWindow:
         
         # Центрирование кнопок
         buttons_frame.columnconfigure(0, weight=1)
-        buttons_frame.columnconfigure(2, weight=1)
+        buttons_frame.columnconfigure(3, weight=1)
         
         # Кнопка создания файлов
         self.create_btn = ttk.Button(
@@ -280,6 +265,15 @@ class CreateFilesWindow:
             state=tk.DISABLED
         )
         self.create_btn.grid(row=0, column=1)
+        
+        # Кнопка обновления шапки существующих файлов
+        self.update_headers_btn = ttk.Button(
+            buttons_frame,
+            text="Обновить шапки",
+            command=self.update_headers,
+            state=tk.DISABLED
+        )
+        self.update_headers_btn.grid(row=0, column=2, padx=(10, 0))
     
     def show(self):
         """Показывает окно"""
@@ -381,19 +375,13 @@ class CreateFilesWindow:
                     clean_dept = self._clean_directory_name(emp['Подразделение 1'])
                     expected_departments.add((emp['Подразделение 1'], clean_dept))
             
-            # --- Формируем список сотрудников для создания файлов ---
-            employees_to_create = []
-            for emp in self._employees:
-                dept = emp['Подразделение 1']
-                if not dept:
-                    continue
-                clean_dept = self._clean_directory_name(dept)
-                dept_path = base_path / clean_dept
-                filename = self.processor.excel_handler.generate_output_filename(emp)
-                file_path = dept_path / filename
-                if not file_path.exists():
-                    employees_to_create.append(emp)
-            self._employees_to_create = employees_to_create
+            # Один снимок целевой папки вместо проверки каждого файла по отдельности
+            snapshot = self.processor.directory_manager.snapshot(dir_path)
+            
+            # --- Сравнение со штатным расписанием предыдущего запуска по табельному номеру ---
+            staff_diff = self.processor.diff_staff(self._employees, dir_path)
+            self._employees_to_create = staff_diff.employees_to_create
+            relocation_count = len(staff_diff.relocations)
             
             existing_departments = []
             new_departments = []
@@ -401,34 +389,26 @@ class CreateFilesWindow:
             existing_employees_by_dept = {}
             departments_with_files = 0
             
-            # Сканируем папки
-            for item in base_path.iterdir():
-                if item.is_dir():
-                    # Проверяем, является ли папка ожидаемым отделом
-                    for orig_dept, clean_dept in expected_departments:
-                        if item.name == clean_dept:
-                            existing_departments.append(orig_dept)
-                            
-                            # Подсчитываем файлы в этой папке
-                            dept_files = 0
-                            for file_item in item.iterdir():
-                                if file_item.is_file() and file_item.suffix.lower() == '.xlsx':
-                                    # Исключаем отчеты
-                                    if not file_item.name.startswith('!'):
-                                        dept_files += 1
-                            
-                            existing_employees_by_dept[orig_dept] = dept_files
-                            total_existing_employees += dept_files
-                            if dept_files > 0:
-                                departments_with_files += 1
-                            break
+            # Сопоставляем папки снимка с ожидаемыми отделами
+            for orig_dept, clean_dept in expected_departments:
+                dept_snapshot = snapshot.departments.get(clean_dept)
+                if dept_snapshot is None:
+                    continue
+                existing_departments.append(orig_dept)
+                
+                # Подсчитываем файлы сотрудников (без отчетов и временных файлов)
+                dept_files = len(dept_snapshot.employee_files)
+                existing_employees_by_dept[orig_dept] = dept_files
+                total_existing_employees += dept_files
+                if dept_files > 0:
+                    departments_with_files += 1
             
             # Определяем новые отделы
             all_departments_from_file = set(emp['Подразделение 1'] for emp in self._employees if emp['Подразделение 1'])
             new_departments = list(all_departments_from_file - set(existing_departments))
             
             # Подсчитываем новых сотрудников
-            self.new_employees_count = len(self._employees_to_create)
+            self.new_employees_count = len(self._employees_to_create) + relocation_count
             self.skip_employees_count = len(self._employees) - self.new_employees_count
             
             # Выводим информацию в новом формате
@@ -444,15 +424,23 @@ class CreateFilesWindow:
                     new_list = ", ".join(new_departments)
                     self.add_info(f"Новые отделы: {new_list}")
                 
+                self.add_info("")
+                self.add_info("ИЗМЕНЕНИЯ ШТАТНОГО РАСПИСАНИЯ:", "success")
+                for line in staff_diff.summary_lines():
+                    self.add_info(f"  • {line}")
+                self.add_info("")
+                
                 if self.new_employees_count > 0:
-                    self.add_info(f"Будет добавлено {self.new_employees_count} новых сотр., остальные {self.skip_employees_count} сотр. уже есть")
+                    self.add_info(f"Будет обработано {self.new_employees_count} сотр. (новые и переведенные), остальные {self.skip_employees_count} сотр. уже на месте")
                     if self.skip_employees_count > 0:
-                        self.add_info("Если требуется их переписать - удалите старые файлы вручную")
+                        self.add_info("Чтобы перенести изменения штатного расписания в их файлы, нажмите 'Обновить шапки'")
                     
                     # Статистика
                     self.add_info("")
                     self.add_info("ПЛАН ОБРАБОТКИ:", "success")
-                    self.add_info(f"  • Будет создано: {self.new_employees_count} сотр.")
+                    self.add_info(f"  • Будет создано: {len(self._employees_to_create)} сотр.")
+                    if relocation_count:
+                        self.add_info(f"  • Будет перенесено с сохранением данных: {relocation_count} сотр.")
                     self.add_info(f"  • Будет пропущено: {self.skip_employees_count} сотр.")
                     self.add_info(f"  • Всего сотрудников: {len(self._employees)}")
                     
@@ -468,6 +456,7 @@ class CreateFilesWindow:
                     self.add_info("Для продолжения нажмите кнопку 'Создать файлы'", "success")
                 else:
                     self.add_info("Все записи уже есть в папке - новых файлов создаваться не будет")
+                    self.add_info("Чтобы перенести изменения штатного расписания в файлы, нажмите 'Обновить шапки'")
                     self.new_employees_count = 0
             else:
                 # Новая структура
@@ -662,6 +651,80 @@ class CreateFilesWindow:
         else:
             if self.create_btn is not None:
                 self.create_btn.config(state=tk.DISABLED)
+        
+        # Обновление шапки доступно, если в папке уже есть файлы сотрудников из списка
+        if self.update_headers_btn is not None:
+            can_update = (self.validation_result and
+                          self.validation_result.is_valid and
+                          self.output_dir_path and
+                          self.skip_employees_count > 0 and
+                          not self.is_processing)
+            self.update_headers_btn.config(state=tk.NORMAL if can_update else tk.DISABLED)
+    
+    def update_headers(self):
+        """Обновление шапки существующих файлов сотрудников по штатному расписанию"""
+        if not self.validation_result or not self.validation_result.is_valid or not self.output_dir_path:
+            messagebox.showwarning("Предупреждение", "Выберите файл с сотрудниками и целевую папку")
+            return
+        
+        self.is_processing = True
+        if self.create_btn is not None:
+            self.create_btn.config(state=tk.DISABLED)
+        self.update_headers_btn.config(state=tk.DISABLED)
+        
+        self.add_info("")
+        self.add_info("Обновление шапки существующих файлов...")
+        self.show_progress_view()
+        
+        employees = list(self._employees)
+        
+        def update_thread():
+            try:
+                operation_log = self.processor.update_employee_headers(
+                    employees,
+                    self.output_dir_path,
+                    self.on_progress_update
+                )
+                if self.window is not None:
+                    self.window.after(0, self.on_headers_update_complete, operation_log)
+            except Exception as e:
+                self.logger.error(f"Ошибка в потоке обновления шапки: {e}")
+                if self.window is not None:
+                    self.window.after(0, self.on_processing_error, str(e))
+        
+        threading.Thread(target=update_thread, daemon=True).start()
+    
+    def on_headers_update_complete(self, operation_log):
+        """Обработчик завершения обновления шапки"""
+        try:
+            if self.window is None or not self.window.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        
+        self.is_processing = False
+        succeeded = operation_log.status == ProcessingStatus.SUCCESS
+        self.add_info_to_existing("=" * 50)
+        if succeeded:
+            self.add_info_to_existing("ОБНОВЛЕНИЕ ШАПКИ ЗАВЕРШЕНО", "success")
+        else:
+            self.add_info_to_existing("ОБНОВЛЕНИЕ ШАПКИ ЗАВЕРШЕНО С ОШИБКАМИ", "error")
+        self.add_info_to_existing("=" * 50)
+        self._add_dropped_entries_note(operation_log)
+        for entry in operation_log.entries:
+            if entry['level'] == "ERROR":
+                self.add_info_to_existing(f"ОШИБКА: {entry['message']}", "error")
+            else:
+                self.add_info_to_existing(entry['message'])
+        
+        self.check_create_button_state()
+    
+    def _add_dropped_entries_note(self, operation_log):
+        """Сообщает о записях лога, не сохраненных в памяти"""
+        if operation_log.dropped_entries:
+            self.add_info_to_existing(
+                f"... {operation_log.dropped_entries} записей не показаны, полный лог: {operation_log.sink_path}"
+            )
     
 
     def create_files(self):
@@ -697,6 +760,7 @@ class CreateFilesWindow:
             self.show_progress_view()
             
             self.add_info("Начало создания файлов...")
+            self.cancel_token = CancellationToken()
             
             def processing_thread():
                 try:
@@ -708,11 +772,14 @@ class CreateFilesWindow:
                         self.on_progress_update,
                         self.on_department_progress_update,
                         self.on_file_progress_update,
-                        employees_to_create=employees_to_create
+                        employees_to_create=employees_to_create,
+                        cancel_token=self.cancel_token
                     )
                     
                     # Завершение в главном потоке
                     def after_processing():
+                        # Доставляем события, накопленные в очереди шины (список созданных файлов для отката)
+                        event_bus.dispatch_pending()
                         if self.stop_processing:
                             self.rollback_created_files()
                         if self.window is not None:
@@ -741,85 +808,89 @@ class CreateFilesWindow:
         self.info_frame.grid(row=1, column=0, columnspan=3, pady=(0, 10), sticky="nsew")
 
     def on_progress_update(self, progress):
-            """ИСПРАВЛЕНО: Обработчик обновления общего прогресса"""
-            def update_ui():
-                try:
-                    # Проверяем что окно еще существует
-                    if self.window is None or not self.window.winfo_exists():
-                        return
-                        
-                    # Общий процент
-                    if progress.total_files > 0:
-                        overall_percent = (progress.processed_files / progress.total_files) * 100
-                        self.overall_progress_label.config(text=f"Общий прогресс: {overall_percent:.1f}%")
-                    
-                    # Время
-                    if hasattr(progress, 'start_time') and progress.start_time:
-                        elapsed = (datetime.now() - progress.start_time).total_seconds()
-                        if progress.processed_files > 0 and progress.total_files > 0:
-                            speed = progress.processed_files / elapsed  # файлов в секунду
-                            remaining_files = progress.total_files - progress.processed_files
-                            remaining_time = remaining_files / speed if speed > 0 else 0
-                            self.time_label.config(
-                                text=f"Прошло: {elapsed:.0f} сек, Осталось: {remaining_time:.0f} сек"
-                            )
-                        else:
-                            self.time_label.config(text=f"Прошло: {elapsed:.0f} сек")
-                            
-                except tk.TclError:
-                    # Окно уже закрыто, игнорируем
-                    pass
-            
-            # ИСПРАВЛЕНО: Используем правильный метод для обновления в главном потоке
-            try:
-                if self.window is not None and self.window.winfo_exists():
-                    self.window.after(0, update_ui)
-            except tk.TclError:
-                pass
+        """Обработчик обновления общего прогресса (из рабочего потока: только событие в очередь шины)"""
+        event_bus.emit_simple(EventType.PROGRESS_UPDATE, {"progress": progress}, self.EVENT_SOURCE)
 
     def on_department_progress_update(self, current_dept, total_depts, dept_name):
-            """ИСПРАВЛЕНО: Обработчик обновления прогресса по отделам"""
-            def update_ui():
-                try:
-                    if self.window is None or not self.window.winfo_exists():
-                        return
-                        
-                    if total_depts > 0:
-                        dept_percent = (current_dept / total_depts) * 100
-                        self.departments_progress_bar['value'] = dept_percent
-                        self.departments_detail_label.config(
-                            text=f"Отдел {current_dept}/{total_depts}: {dept_name}"
-                        )
-                except tk.TclError:
-                    pass
-            
-            try:
-                if self.window is not None and self.window.winfo_exists():
-                    self.window.after(0, update_ui)
-            except tk.TclError:
-                pass
+        """Обработчик обновления прогресса по отделам (из рабочего потока)"""
+        event_bus.emit_simple(
+            EventType.DEPARTMENT_PROGRESS,
+            {"current": current_dept, "total": total_depts, "name": dept_name},
+            self.EVENT_SOURCE
+        )
 
     def on_file_progress_update(self, current_file, total_files, file_info):
-            """ИСПРАВЛЕНО: Обработчик обновления прогресса по файлам в текущем отделе"""
-            def update_ui():
-                try:
-                    if self.window is None or not self.window.winfo_exists():
-                        return
-                        
-                    if total_files > 0:
-                        file_percent = (current_file / total_files) * 100
-                        self.employees_progress_bar['value'] = file_percent
-                        self.employees_detail_label.config(
-                            text=f"Файл {current_file}/{total_files}: {file_info}"
-                        )
-                except tk.TclError:
-                    pass
+        """Обработчик обновления прогресса по файлам в текущем отделе (из рабочего потока)"""
+        event_bus.emit_simple(
+            EventType.FILE_PROGRESS,
+            {"current": current_file, "total": total_files, "info": file_info},
+            self.EVENT_SOURCE
+        )
+
+    def _on_progress_event(self, event):
+        """Отрисовка общего прогресса (последнее значение за интервал доставки событий)"""
+        if event.source != self.EVENT_SOURCE:
+            return
+        progress = event.data["progress"]
+        try:
+            # Проверяем что окно еще существует
+            if self.window is None or not self.window.winfo_exists():
+                return
+                
+            # Общий процент
+            if progress.total_files > 0:
+                overall_percent = (progress.processed_files / progress.total_files) * 100
+                self.overall_progress_label.config(text=f"Общий прогресс: {overall_percent:.1f}%")
             
-            try:
-                if self.window is not None and self.window.winfo_exists():
-                    self.window.after(0, update_ui)
-            except tk.TclError:
-                pass
+            # Время: скорость и оценка остатка считаются агрегатором прогресса
+            elapsed = progress.elapsed_seconds
+            if progress.eta_seconds is not None and not progress.finished:
+                self.time_label.config(
+                    text=f"Прошло: {elapsed:.0f} сек, Осталось: {progress.eta_seconds:.0f} сек "
+                         f"({progress.files_per_second:.1f} файл/с)"
+                )
+            else:
+                self.time_label.config(text=f"Прошло: {elapsed:.0f} сек")
+                    
+        except tk.TclError:
+            # Окно уже закрыто, игнорируем
+            pass
+
+    def _on_department_progress_event(self, event):
+        """Отрисовка прогресса по отделам"""
+        if event.source != self.EVENT_SOURCE:
+            return
+        current_dept, total_depts = event.data["current"], event.data["total"]
+        try:
+            if self.window is None or not self.window.winfo_exists():
+                return
+                
+            if total_depts > 0:
+                dept_percent = (current_dept / total_depts) * 100
+                self.departments_progress_bar['value'] = dept_percent
+                self.departments_detail_label.config(
+                    text=f"Отдел {current_dept}/{total_depts}: {event.data['name']}"
+                )
+        except tk.TclError:
+            pass
+
+    def _on_file_progress_event(self, event):
+        """Отрисовка прогресса по файлам в текущем отделе"""
+        if event.source != self.EVENT_SOURCE:
+            return
+        current_file, total_files = event.data["current"], event.data["total"]
+        try:
+            if self.window is None or not self.window.winfo_exists():
+                return
+                
+            if total_files > 0:
+                file_percent = (current_file / total_files) * 100
+                self.employees_progress_bar['value'] = file_percent
+                self.employees_detail_label.config(
+                    text=f"Файл {current_file}/{total_files}: {event.data['info']}"
+                )
+        except tk.TclError:
+            pass
 
     def on_processing_complete(self, result):
         """Обработчик завершения создания файлов"""
@@ -831,57 +902,13 @@ class CreateFilesWindow:
             # Останавливаем прогресс бар
             self.progress_var.set(100)
             
-            # Извлекаем данные из OperationLog
-            if hasattr(result, 'entries'):
-                # Это OperationLog объект
-                log_entries = result.entries
-                processing_time = result.duration or 0.0
-                
-                # Подсчитываем статистику из записей лога
-                created_count = 0
-                skipped_count = 0
-                error_count = 0
-                average_time_per_file = 0.0
-                
-                for entry in log_entries:
-                    message = entry.get('message', '')
-                    level = entry.get('level', 'INFO')
-                    
-                    if 'создано' in message.lower() and 'файлов' in message.lower():
-                        # Ищем количество созданных файлов
-                        import re
-                        match = re.search(r'(\d+)', message)
-                        if match:
-                            created_count = int(match.group(1))
-                    elif 'пропущено' in message.lower():
-                        # Ищем количество пропущенных файлов
-                        import re
-                        match = re.search(r'(\d+)', message)
-                        if match:
-                            skipped_count = int(match.group(1))
-                    elif 'среднее время на файл' in message.lower():
-                        # Ищем среднее время на файл
-                        import re
-                        match = re.search(r'(\d+\.?\d*)с', message)
-                        if match:
-                            average_time_per_file = float(match.group(1))
-                    elif level == 'ERROR':
-                        error_count += 1
-                
-            else:
-                # Старый формат (словарь или объект с атрибутами)
-                if isinstance(result, dict):
-                    created_count = result.get('created', 0)
-                    skipped_count = result.get('skipped', 0)
-                    error_count = result.get('errors', 0)
-                    processing_time = result.get('processing_time', 0)
-                    log_entries = result.get('log_entries', [])
-                else:
-                    created_count = getattr(result, 'created', 0)
-                    skipped_count = getattr(result, 'skipped', 0)
-                    error_count = getattr(result, 'errors', 0)
-                    processing_time = getattr(result, 'processing_time', 0)
-                    log_entries = getattr(result, 'log_entries', [])
+            # Итоги операции - структурированные счетчики OperationLog
+            log_entries = result.entries
+            processing_time = result.duration or 0.0
+            created_count = result.counter('created')
+            skipped_count = result.counter('skipped')
+            error_count = result.counter('errors')
+            average_time_per_file = result.metrics.get('average_file_seconds', 0.0)
             
             # Обновляем счетчики (если элементы существуют)
             if self.created_count_label is not None:
@@ -909,29 +936,17 @@ class CreateFilesWindow:
                     self.add_info_to_existing(f"Среднее время на файл: {average_time_per_file:.2f} сек")
                 self.add_info_to_existing("=" * 50)
             
-            # Обрабатываем лог записи
-            if log_entries:
-                for entry in log_entries:
-                    if isinstance(entry, dict):
-                        # Если entry - словарь
-                        level = entry.get('level', 'INFO')
-                        message = entry.get('message', '')
-                        if level == "ERROR":
-                            self.add_info_to_existing(f"ОШИБКА: {message}")
-                        elif level == "WARNING":
-                            self.add_info_to_existing(f"ПРЕДУПРЕЖДЕНИЕ: {message}")
-                        else:
-                            self.add_info_to_existing(message)
-                    else:
-                        # Если entry - объект с атрибутами
-                        level = getattr(entry, 'level', 'INFO')
-                        message = getattr(entry, 'message', str(entry))
-                        if level == "ERROR":
-                            self.add_info_to_existing(f"ОШИБКА: {message}")
-                        elif level == "WARNING":
-                            self.add_info_to_existing(f"ПРЕДУПРЕЖДЕНИЕ: {message}")
-                        else:
-                            self.add_info_to_existing(message)
+            # Обрабатываем лог записи (в памяти только последние записи)
+            self._add_dropped_entries_note(result)
+            for entry in log_entries:
+                level = entry['level']
+                message = entry['message']
+                if level == "ERROR":
+                    self.add_info_to_existing(f"ОШИБКА: {message}")
+                elif level == "WARNING":
+                    self.add_info_to_existing(f"ПРЕДУПРЕЖДЕНИЕ: {message}")
+                else:
+                    self.add_info_to_existing(message)
             
             # Обновляем статус (если элемент существует)
             if self.status_label is not None:
@@ -994,58 +1009,9 @@ class CreateFilesWindow:
         messagebox.showerror("Ошибка", f"Критическая ошибка при создании файлов:\n{error_message}")
 
 
-    def copy_selected_text(self):
-        """Копирует выделенный текст в буфер обмена"""
-        try:
-            selected_text = self.info_text.selection_get()
-            self.info_text.clipboard_clear()
-            self.info_text.clipboard_append(selected_text)
-        except tk.TclError:
-            # Если ничего не выделено, копируем весь текст
-            all_text = self.info_text.get("1.0", "end-1c")
-            self.info_text.clipboard_clear()
-            self.info_text.clipboard_append(all_text)
-    
     def add_info(self, message: str, level: str = "info"):
-        """Добавляет информационное сообщение"""
-        from datetime import datetime
-        
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Определяем цвет и стиль для разных уровней
-        # Красный или зеленый цвет и всегда жирный шрифт для важных сообщений
-        if level in ["success", "error", "warning"]:
-            colors = {
-                "warning": "#FF8C00",
-                "error": "red",
-                "success": "green"
-            }
-            color = colors[level]
-            font_style = ("TkDefaultFont", 9, "bold")
-        else:
-            color = "black"
-            font_style = ("TkDefaultFont", 9)
-        
-        # Вставляем текст
-        if message.strip():  # Только если сообщение не пустое
-            self.info_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        else:
-            self.info_text.insert(tk.END, "\n")
-        
-        # Применяем цвет и стиль к последней строке
-        if level in ["success", "error", "warning"]:
-            start_line = self.info_text.index(tk.END + "-2l linestart")
-            end_line = self.info_text.index(tk.END + "-1l lineend")
-            
-            tag_name = f"color_{level}_{timestamp}"
-            self.info_text.tag_add(tag_name, start_line, end_line)
-            self.info_text.tag_config(tag_name, foreground=color, font=font_style)
-        
-        # Прокручиваем в конец
-        self.info_text.see(tk.END)
-        
-        # Обновляем интерфейс
-        self.parent.update_idletasks()
+        """Добавляет информационное сообщение (выводится при следующем обновлении области)"""
+        self.log_view.append(message, level)
     
     def add_info_to_existing(self, message: str, level: str = "info"):
         """ИСПРАВЛЕНО: Добавляет информацию к существующему тексту"""
@@ -1056,49 +1022,13 @@ class CreateFilesWindow:
             return
             
         # Переключаемся обратно на info view если мы в progress view
-        current_frame = None
         try:
-            if self.info_frame.winfo_viewable():
-                current_frame = "info"
-            elif self.progress_frame.winfo_viewable():
-                current_frame = "progress"
-                self.show_info_view()  # Переключаемся на info
+            if not self.info_frame.winfo_viewable() and self.progress_frame.winfo_viewable():
+                self.show_info_view()
         except tk.TclError:
             pass
         
-        # Добавляем сообщение
-        if level in ["success", "error", "warning"]:
-            colors = {
-                "warning": "#FF8C00",
-                "error": "red", 
-                "success": "green"
-            }
-            color = colors[level]
-            font_style = ("TkDefaultFont", 9, "bold")
-        else:
-            color = "black"
-            font_style = ("TkDefaultFont", 9)
-        
-        # Вставляем текст
-        if message.strip():  # Только если сообщение не пустое
-            self.info_text.insert(tk.END, f"{message}\n")
-        else:
-            self.info_text.insert(tk.END, "\n")
-        
-        # Применяем цвет и стиль к последней строке
-        if level in ["success", "error", "warning"]:
-            start_line = self.info_text.index(tk.END + "-2l linestart")
-            end_line = self.info_text.index(tk.END + "-1l lineend")
-            
-            tag_name = f"color_{level}_no_time"
-            self.info_text.tag_add(tag_name, start_line, end_line)
-            self.info_text.tag_config(tag_name, foreground=color, font=font_style)
-        
-        # Прокручиваем в конец
-        self.info_text.see(tk.END)
-        
-        # Обновляем интерфейс
-        self.parent.update_idletasks()
+        self.log_view.append(message, level, timestamp=False)
     
     def add_log(self, message: str, level: str = "info"):
         """Добавляет сообщение в лог (совместимость со старым кодом)"""
@@ -1116,7 +1046,7 @@ class CreateFilesWindow:
         self.is_processing = False
         
         # Очищаем информацию
-        self.info_text.delete(1.0, tk.END)
+        self.log_view.clear()
         self.add_info("Готов к повторному запуску")
         
         # Если есть валидные данные - проверяем возможность создания
@@ -1144,7 +1074,11 @@ class CreateFilesWindow:
             if not result:
                 return
             self.stop_processing = True
+            # Процессор останавливается перед следующим файлом и откатывает транзакцию
+            self.cancel_token.cancel()
             # Не вызываем rollback здесь! Откат будет вызван после завершения потока
+        for event_type, handler in self._event_handlers():
+            event_bus.unsubscribe(event_type, handler)
         if self.window is not None:
             self.window.destroy()
         if self.main_window:
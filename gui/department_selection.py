@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Диалог выбора подразделений с виртуальным списком
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+
+class VirtualCheckList(ttk.Frame):
+    """
+    Список подразделений с флажками, который рисует только видимые строки
+
+    Строки - элементы Canvas с постоянной высотой ROW_HEIGHT. Элементы
+    создаются на число строк, помещающихся в окно, и при прокрутке или
+    фильтрации только получают новый текст, поэтому построение и
+    прокрутка не зависят от количества подразделений.
+    """
+
+    ROW_HEIGHT = 22
+    # Строк за один шаг колесика мыши
+    WHEEL_ROWS = 3
+
+    def __init__(self, parent, on_change: Optional[Callable[[], None]] = None):
+        super().__init__(parent)
+        self._on_change = on_change
+        # Элементы списка: {'name', 'path', 'files_count' (None - еще считается), 'error'}
+        self._items: List[Dict] = []
+        self._items_by_name: Dict[str, Dict] = {}
+        self._visible: List[Dict] = []
+        self._selected: Set[str] = set()
+        self._filter = ""
+        self._first_row = 0
+        # Элементы Canvas каждой отображаемой строки: (флажок, отметка, название, файлы)
+        self._row_items: List[tuple] = []
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, background="white")
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.canvas.bind("<Button-1>", self._on_click)
+        # Колесико мыши - только пока указатель над списком
+        self.canvas.bind("<Enter>", lambda event: self._bind_mousewheel(True))
+        self.canvas.bind("<Leave>", lambda event: self._bind_mousewheel(False))
+
+    def set_items(self, items: List[Dict], selected: bool = True) -> None:
+        """Задает элементы списка (по умолчанию все выбраны)"""
+        self._items = list(items)
+        self._items_by_name = {item['name']: item for item in self._items}
+        self._selected = {item['name'] for item in self._items} if selected else set()
+        self._apply_filter()
+
+    def set_filter(self, text: str) -> None:
+        """Показывает только подразделения, в названии которых есть text (без учета регистра)"""
+        self._filter = text.strip().lower()
+        self._first_row = 0
+        self._apply_filter()
+
+    def update_items(self, updates: Dict[str, Dict]) -> None:
+        """
+        Обновляет поля элементов (количество файлов, ошибку) одной перерисовкой
+
+        Args:
+            updates: название подразделения -> новые значения полей
+        """
+        for name, values in updates.items():
+            item = self._items_by_name[name]
+            item.update(values)
+            if item.get('error'):
+                self._selected.discard(name)
+        self.render()
+        self._changed()
+
+    @property
+    def items(self) -> List[Dict]:
+        return self._items
+
+    @property
+    def visible_items(self) -> List[Dict]:
+        """Элементы, прошедшие фильтр"""
+        return self._visible
+
+    def selected_items(self) -> List[Dict]:
+        """Выбранные элементы в исходном порядке (без учета фильтра)"""
+        return [item for item in self._items if item['name'] in self._selected]
+
+    def set_selected(self, items: List[Dict], selected: bool) -> None:
+        """Выбирает или снимает выбор с элементов (с ошибкой не выбираются)"""
+        for item in items:
+            if selected and not item.get('error'):
+                self._selected.add(item['name'])
+            else:
+                self._selected.discard(item['name'])
+        self.render()
+        self._changed()
+
+    def scroll(self, rows: int) -> None:
+        self._first_row += rows
+        self.render()
+
+    def render(self) -> None:
+        """Перерисовывает видимые строки"""
+        width = self.canvas.winfo_width()
+        visible_rows = max(1, self.canvas.winfo_height() // self.ROW_HEIGHT + 1)
+        self._first_row = max(0, min(self._first_row, len(self._visible) - visible_rows + 1))
+
+        while len(self._row_items) < visible_rows:
+            top = len(self._row_items) * self.ROW_HEIGHT
+            middle = top + self.ROW_HEIGHT // 2
+            self._row_items.append((
+                self.canvas.create_rectangle(8, middle - 6, 20, middle + 6, outline="gray40"),
+                self.canvas.create_text(14, middle, text="", font=("TkDefaultFont", 9, "bold")),
+                self.canvas.create_text(28, middle, text="", anchor=tk.W, font=("TkDefaultFont", 9)),
+                self.canvas.create_text(0, middle, text="", anchor=tk.E, font=("TkDefaultFont", 8))
+            ))
+
+        for slot, (box, mark, name, count) in enumerate(self._row_items):
+            row = self._first_row + slot
+            if slot >= visible_rows or row >= len(self._visible):
+                for element in (box, mark, name, count):
+                    self.canvas.itemconfigure(element, state=tk.HIDDEN)
+                continue
+            item = self._visible[row]
+            if item.get('error'):
+                count_text, count_color = "(ошибка чтения)", "red"
+            elif item['files_count'] is None:
+                count_text, count_color = "(подсчет...)", "gray"
+            else:
+                count_text, count_color = f"({item['files_count']} файлов)", "gray"
+            for element in (box, mark, name, count):
+                self.canvas.itemconfigure(element, state=tk.NORMAL)
+            self.canvas.itemconfigure(mark, text="✓" if item['name'] in self._selected else "")
+            self.canvas.itemconfigure(name, text=item['name'])
+            self.canvas.itemconfigure(count, text=count_text, fill=count_color)
+            self.canvas.coords(count, width - 8, slot * self.ROW_HEIGHT + self.ROW_HEIGHT // 2)
+
+        if self._visible:
+            total = len(self._visible)
+            self.scrollbar.set(self._first_row / total, min(1.0, (self._first_row + visible_rows - 1) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _apply_filter(self) -> None:
+        if self._filter:
+            self._visible = [item for item in self._items if self._filter in item['name'].lower()]
+        else:
+            self._visible = list(self._items)
+        self.render()
+        self._changed()
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+    def _on_click(self, event) -> None:
+        row = self._first_row + event.y // self.ROW_HEIGHT
+        if row < len(self._visible):
+            item = self._visible[row]
+            self.set_selected([item], item['name'] not in self._selected)
+
+    def _on_scrollbar(self, action, *args) -> None:
+        if action == tk.MOVETO:
+            self._first_row = int(float(args[0]) * len(self._visible))
+            self.render()
+        elif action == tk.SCROLL:
+            amount, unit = int(args[0]), args[1]
+            page = max(1, self.canvas.winfo_height() // self.ROW_HEIGHT - 1)
+            self.scroll(amount * (page if unit == tk.PAGES else 1))
+
+    def _bind_mousewheel(self, bind: bool) -> None:
+        if bind:
+            self.canvas.bind_all("<MouseWheel>", lambda event: self.scroll(-self.WHEEL_ROWS if event.delta > 0
+                                                                           else self.WHEEL_ROWS))
+            self.canvas.bind_all("<Button-4>", lambda event: self.scroll(-self.WHEEL_ROWS))
+            self.canvas.bind_all("<Button-5>", lambda event: self.scroll(self.WHEEL_ROWS))
+        else:
+            for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+                self.canvas.unbind_all(sequence)
+
+
+class DepartmentSelectionDialog:
+    """
+    Модальный диалог выбора подразделений для отчетов
+
+    Строится в потоке интерфейса сразу по списку папок подразделений.
+    Количество файлов каждого подразделения считается в фоновом потоке
+    (count_files) и появляется в списке по мере готовности. Результат
+    передается в on_done: выбранные подразделения {'name', 'path',
+    'files_count'} или пустой список при отмене.
+    """
+
+    # Интервал переноса посчитанных количеств файлов в список (мс)
+    POLL_INTERVAL_MS = 100
+
+    def __init__(self, parent_window, departments: Dict[str, str], count_files: Callable[[str], int],
+                 on_done: Callable[[List[Dict]], None]):
+        self.logger = logging.getLogger(__name__)
+        self.parent_window = parent_window
+        self.on_done = on_done
+        self._count_files = count_files
+        self._counts: "queue.Queue[tuple]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._counted = 0
+        self._waiting_for_counts = False
+        self._closed = False
+
+        self.dialog = tk.Toplevel(parent_window)
+        self.dialog.title("Выбор подразделений")
+        self.dialog.geometry("650x550")
+        self.dialog.resizable(True, True)
+        self.dialog.transient(parent_window)
+        self.dialog.geometry("+%d+%d" % (parent_window.winfo_rootx() + 50, parent_window.winfo_rooty() + 50))
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+
+        departments_list = sorted(departments.items())
+        self._setup_ui(len(departments_list))
+        self.check_list.set_items([
+            {'name': name, 'path': path, 'files_count': None, 'error': None}
+            for name, path in departments_list
+        ])
+        self.dialog.grab_set()
+        self.filter_entry.focus_set()
+
+        threading.Thread(target=self._count_in_background, args=(departments_list,),
+                         name="department-counts", daemon=True).start()
+        self.dialog.after(self.POLL_INTERVAL_MS, self._poll_counts)
+
+    def _setup_ui(self, departments_count: int) -> None:
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        # Заголовок
+        header_frame = ttk.Frame(main_frame)
+        header_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(
+            header_frame,
+            text="Выберите подразделения для создания отчетов:",
+            font=("TkDefaultFont", 11, "bold")
+        ).pack(anchor=tk.W)
+        ttk.Label(
+            header_frame,
+            text=f"Найдено подразделений: {departments_count}",
+            font=("TkDefaultFont", 9)
+        ).pack(anchor=tk.W, pady=(5, 0))
+
+        # Поиск по мере ввода
+        filter_frame = ttk.Frame(main_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Label(filter_frame, text="Поиск:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var)
+        self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.filter_var.trace_add('write', lambda *args: self.check_list.set_filter(self.filter_var.get()))
+
+        list_frame = ttk.LabelFrame(main_frame, text="Подразделения", padding="10")
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
+        self.check_list = VirtualCheckList(list_frame, on_change=self._update_selection_info)
+        self.check_list.pack(fill=tk.BOTH, expand=True)
+
+        # Выбор: все / ничего / по количеству файлов (действуют на найденные поиском)
+        selection_frame = ttk.Frame(main_frame)
+        selection_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(selection_frame, text="Выбрать все",
+                   command=lambda: self.check_list.set_selected(self.check_list.visible_items, True)
+                   ).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(selection_frame, text="Снять выбор",
+                   command=lambda: self.check_list.set_selected(self.check_list.visible_items, False)
+                   ).pack(side=tk.LEFT, padx=5)
+        ttk.Label(selection_frame, text="Файлов не меньше:").pack(side=tk.LEFT, padx=(15, 5))
+        self.min_files_var = tk.StringVar(value="1")
+        ttk.Spinbox(selection_frame, from_=0, to=1000000, width=7,
+                    textvariable=self.min_files_var).pack(side=tk.LEFT)
+        ttk.Button(selection_frame, text="Выбрать", command=self.select_by_files_count).pack(side=tk.LEFT, padx=5)
+
+        self.selection_info = ttk.Label(main_frame, text="", font=("TkDefaultFont", 9, "bold"))
+        self.selection_info.pack(fill=tk.X, pady=(0, 10))
+
+        # Кнопки диалога
+        buttons_frame = ttk.Frame(main_frame)
+        buttons_frame.pack(fill=tk.X)
+        button_right_frame = ttk.Frame(buttons_frame)
+        button_right_frame.pack(side=tk.RIGHT)
+        self.ok_button = ttk.Button(button_right_frame, text="OK", command=self.confirm)
+        self.ok_button.pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(button_right_frame, text="Отмена", command=self.cancel).pack(side=tk.LEFT)
+
+        self.dialog.bind('<Return>', lambda event: self.confirm())
+        self.dialog.bind('<Escape>', lambda event: self.cancel())
+
+    def select_by_files_count(self) -> None:
+        """Выбирает найденные подразделения с количеством файлов не меньше заданного"""
+        try:
+            min_files = int(self.min_files_var.get())
+        except ValueError:
+            messagebox.showwarning("Предупреждение", "Введите целое количество файлов", parent=self.dialog)
+            return
+        # Подразделения, для которых количество еще считается, не меняются
+        counted = [item for item in self.check_list.visible_items if item['files_count'] is not None]
+        self.check_list.set_selected([item for item in counted if item['files_count'] >= min_files], True)
+        self.check_list.set_selected([item for item in counted if item['files_count'] < min_files], False)
+
+    def confirm(self) -> None:
+        selected = self.check_list.selected_items()
+        if not selected:
+            messagebox.showwarning("Предупреждение", "Выберите хотя бы одно подразделение", parent=self.dialog)
+            return
+        if any(item['files_count'] is None for item in selected):
+            # Количество файлов нужно для прогресса: ждем подсчета выбранных
+            self._waiting_for_counts = True
+            self.ok_button.config(state=tk.DISABLED)
+            self._update_selection_info()
+            return
+        self._close([
+            {'name': item['name'], 'path': item['path'], 'files_count': item['files_count']}
+            for item in selected
+        ])
+
+    def cancel(self) -> None:
+        self._close([])
+
+    def _close(self, result: List[Dict]) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_event.set()
+        self.check_list._bind_mousewheel(False)
+        self.dialog.destroy()
+        # Возвращаем фокус на окно отчетов
+        self.parent_window.lift()
+        self.parent_window.focus_force()
+        self.on_done(result)
+
+    def _count_in_background(self, departments: List[tuple]) -> None:
+        """Поток подсчета файлов сотрудников по подразделениям"""
+        for name, path in departments:
+            if self._stop_event.is_set():
+                return
+            try:
+                self._counts.put((name, self._count_files(path), None))
+            except Exception as e:
+                self.logger.error(f"Ошибка подсчета файлов {path}: {e}")
+                self._counts.put((name, None, str(e)))
+
+    def _poll_counts(self) -> None:
+        """Переносит посчитанные количества файлов в список (поток интерфейса)"""
+        if self._closed:
+            return
+        updates = {}
+        while True:
+            try:
+                name, files_count, error = self._counts.get_nowait()
+            except queue.Empty:
+                break
+            updates[name] = {'files_count': files_count, 'error': error}
+        if updates:
+            self._counted += len(updates)
+            self.check_list.update_items(updates)
+            if self._waiting_for_counts and all(item['files_count'] is not None
+                                                for item in self.check_list.selected_items()):
+                self._waiting_for_counts = False
+                self.ok_button.config(state=tk.NORMAL)
+                self.confirm()
+                return
+        if self._counted < len(self.check_list.items):
+            self.dialog.after(self.POLL_INTERVAL_MS, self._poll_counts)
+
+    def _update_selection_info(self) -> None:
+        selected = self.check_list.selected_items()
+        total_files = sum(item['files_count'] or 0 for item in selected)
+        text = f"Выбрано: {len(selected)} подразделений, {total_files} файлов"
+        total = len(self.check_list.items)
+        if self._counted < total:
+            text += f" (подсчет файлов: {self._counted} из {total})"
+        if self._waiting_for_counts:
+            text += " - ожидание подсчета выбранных"
+        self.selection_info.config(text=text)
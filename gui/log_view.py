@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Область информационных сообщений окна с пакетной отрисовкой
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Optional, TextIO, Tuple
+
+from config import Config
+
+
+class LogView(ttk.Frame):
+    """
+    Текстовая область сообщений с буфером, пакетным выводом и ограничением строк
+
+    append только кладет строку в буфер и дописывает ее в файл полного
+    лога, поэтому его можно вызывать из любого потока и сколь угодно часто.
+    Раз в flush_interval_ms буфер выводится в Text одной вставкой, после
+    чего в виджете остаются последние max_lines строк. Если при выводе
+    пользователь прокрутил область вверх, прокрутка не сбрасывается.
+    """
+
+    # Оформление уровней сообщений (теги Text создаются один раз)
+    LEVEL_STYLES = {
+        "warning": "#FF8C00",
+        "error": "red",
+        "success": "green"
+    }
+
+    def __init__(self, parent, config: Config, log_name: str, height: int = 12):
+        """
+        Args:
+            parent: родительский виджет
+            config: конфигурация (ограничение строк, интервал вывода, папка логов)
+            log_name: имя файла полного лога в папке логов операций
+            height: высота области в строках
+        """
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.max_lines = config.info_log_max_lines
+        self.flush_interval_ms = config.info_log_flush_interval_ms
+        self.log_path = str(Path(config.operation_log_directory) / f"{datetime.now():%Y%m%d_%H%M%S}_{log_name}.log")
+
+        self._lock = threading.Lock()
+        # Строки, ожидающие вывода: (текст, тег уровня); старше max_lines не выводятся
+        self._pending: Deque[Tuple[str, str]] = deque(maxlen=self.max_lines)
+        self._log_file: Optional[TextIO] = None
+        self._lines = 0
+        self._flush_id = None
+        self._closed = False
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.text = tk.Text(self, height=height, wrap=tk.WORD, font=("TkDefaultFont", 9),
+                            state=tk.NORMAL, cursor="arrow")
+        for level, color in self.LEVEL_STYLES.items():
+            self.text.tag_config(level, foreground=color, font=("TkDefaultFont", 9, "bold"))
+        self._setup_copy_behavior()
+
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.text.yview)
+        self.text.configure(yscrollcommand=scrollbar.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.bind("<Destroy>", self._on_destroy)
+        self._flush_id = self.after(self.flush_interval_ms, self._flush)
+
+    def append(self, message: str, level: str = "info", timestamp: bool = True) -> None:
+        """
+        Добавляет сообщение (из любого потока); на экране появится при следующем выводе
+
+        Args:
+            message: текст сообщения (пустой - пустая строка)
+            level: info, success, warning или error
+            timestamp: добавлять время сообщения
+        """
+        now = datetime.now()
+        if not message.strip():
+            line = ""
+        elif timestamp:
+            line = f"[{now:%H:%M:%S}] {message}"
+        else:
+            line = message
+        tag = level if level in self.LEVEL_STYLES else ""
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.append((line + "\n", tag))
+            self._write_to_file(f"{now:%Y-%m-%d %H:%M:%S} {level.upper():<7} {message}\n")
+
+    def clear(self) -> None:
+        """Очищает область и отбрасывает невыведенные сообщения (файл полного лога не меняется)"""
+        with self._lock:
+            self._pending.clear()
+        self.text.delete("1.0", tk.END)
+        self._lines = 0
+
+    def flush(self) -> None:
+        """Выводит накопленные сообщения одной вставкой (поток интерфейса)"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            if self._log_file is not None:
+                self._log_file.flush()
+        if not pending:
+            return
+
+        # Прокрутка следует за выводом, только если область была прокручена до конца
+        follow = self.text.yview()[1] >= 1.0
+        chunks = []
+        for line, tag in pending:
+            chunks.extend((line, tag))
+        self.text.insert(tk.END, *chunks)
+        self._lines += sum(line.count("\n") for line, _ in pending)
+
+        excess = self._lines - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self._lines = self.max_lines
+        if follow:
+            self.text.see(tk.END)
+
+    def copy_selected_text(self) -> None:
+        """Копирует выделенный текст в буфер обмена (без выделения - весь текст)"""
+        try:
+            selected_text = self.text.selection_get()
+        except tk.TclError:
+            selected_text = self.text.get("1.0", "end-1c")
+        self.text.clipboard_clear()
+        self.text.clipboard_append(selected_text)
+
+    def _flush(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            self.logger.error(f"Ошибка вывода сообщений: {e}", exc_info=True)
+        self._flush_id = self.after(self.flush_interval_ms, self._flush)
+
+    def _write_to_file(self, line: str) -> None:
+        """Дописывает строку в файл полного лога (под self._lock)"""
+        if self._log_file is None:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            self._log_file = open(self.log_path, 'a', encoding='utf-8')
+        self._log_file.write(line)
+
+    def _on_destroy(self, event) -> None:
+        if event.widget is not self:
+            return
+        if self._flush_id is not None:
+            self.after_cancel(self._flush_id)
+            self._flush_id = None
+        with self._lock:
+            self._closed = True
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+    def _setup_copy_behavior(self) -> None:
+        """Текст доступен только для выделения и копирования"""
+        def on_key(event):
+            # Разрешаем только Ctrl+C и Ctrl+A
+            if event.state & 0x4 and event.keysym.lower() in ['c', 'a']:
+                return
+            return "break"
+
+        self.text.bind('<Key>', on_key)
+        self.text.bind('<Control-a>', lambda e: self.text.tag_add("sel", "1.0", "end"))
+
+        def show_context_menu(event):
+            context_menu = tk.Menu(self.text, tearoff=0)
+            context_menu.add_command(label="Выделить всё", command=lambda: self.text.tag_add("sel", "1.0", "end"))
+            context_menu.add_command(label="Копировать", command=self.copy_selected_text)
+            context_menu.tk_popup(event.x_root, event.y_root)
+
+        self.text.bind('<Button-3>', show_context_menu)
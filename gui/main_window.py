@@ -7,40 +7,76 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 from config import Config
-from core.processor import VacationProcessor
-from core.events import EventBus, EventType
-from gui.create_files_window import CreateFilesWindow
-from gui.reports_window import ReportsWindow
+from core.events import EventBus, EventType, event_bus as global_event_bus
+from core.template_watcher import TemplateWatcher
+
+if TYPE_CHECKING:
+    from gui.create_files_window import CreateFilesWindow
+    from gui.reports_window import ReportsWindow
 
 
 class MainWindow:
-    """Главное окно приложения Vacation Tool"""
+    """
+    Главное окно приложения Vacation Tool
+    
+    Окно строится без openpyxl и модулей обработки: они импортируются при
+    открытии дочернего окна, а до этого - в фоновом потоке прогрева вместе
+    с разбором rules шаблонов в общий кэш (core.template_cache).
+    
+    Наличие шаблонов проверяет TemplateWatcher в фоновом потоке при
+    активации окна и раз в template_check_interval_ms; окно обновляет
+    статус по событию TEMPLATE_CHANGED.
+    """
+    
+    # Не чаще одной проверки шаблонов при активации окна за этот интервал (секунды)
+    FOCUS_CHECK_MIN_INTERVAL_SECONDS = 2.0
     
     def __init__(self, root: tk.Tk, config: Config):
         self.root = root
         self.config = config
         self.logger = logging.getLogger(__name__)
-        self.processor = VacationProcessor(config)
         
         # Дочерние окна
-        self.create_files_window: Optional[CreateFilesWindow] = None
-        self.reports_window: Optional[ReportsWindow] = None
+        self.create_files_window: Optional['CreateFilesWindow'] = None
+        self.reports_window: Optional['ReportsWindow'] = None
         
         # Переменная для отслеживания состояния шаблонов
         self.templates_ok = False
+        self.template_watcher = TemplateWatcher(config)
         
         # Подписываемся на события
         self.setup_event_listeners()
+        self.start_event_dispatch()
         
         self.setup_ui()
         self.check_templates()
         
-        # Настраиваем периодическую проверку шаблонов
+        # Проверка шаблонов: сразу, при активации окна и с длинным интервалом
+        global_event_bus.subscribe(EventType.TEMPLATE_CHANGED, self._on_template_changed)
+        self.root.bind("<FocusIn>", self._on_focus_in, add="+")
         self.schedule_template_check()
+        
+        self.warm_up_thread = threading.Thread(target=self._warm_up, name="warm-up", daemon=True)
+        self.warm_up_thread.start()
+    
+    def _warm_up(self):
+        """Фоновый прогрев: модули дочерних окон и rules шаблонов"""
+        start = time.perf_counter()
+        try:
+            import gui.create_files_window  # noqa: F401
+            import gui.reports_window  # noqa: F401
+            from core.excel_handler import ExcelHandler
+            warmed = ExcelHandler(self.config).warm_up_templates()
+            self.logger.info("Прогрев завершен за %.2f сек, шаблонов: %d", time.perf_counter() - start, warmed)
+        except Exception as e:
+            # Ошибка повторится и будет показана при открытии окна или запуске операции
+            self.logger.error(f"Ошибка фонового прогрева: {e}", exc_info=True)
     
     def setup_ui(self):
         """Настройка пользовательского интерфейса"""
@@ -175,6 +211,29 @@ class MainWindow:
         event_bus.subscribe(EventType.ERROR_OCCURRED, self._on_error_occurred)
         event_bus.subscribe(EventType.PROGRESS_UPDATE, self._on_progress_updated)
     
+    def start_event_dispatch(self):
+        """
+        Включает доставку событий шины в потоке интерфейса по таймеру
+        
+        Рабочие потоки только ставят события в очередь и не ждут отрисовки;
+        прогресс за интервал доставляется одним (последним) значением.
+        """
+        global_event_bus.start_queue(self.config.event_queue_size)
+        self._dispatch_events()
+    
+    def _dispatch_events(self):
+        """Доставляет накопленные события и планирует следующую доставку"""
+        global_event_bus.dispatch_pending()
+        try:
+            self.root.after(self.config.event_dispatch_interval_ms, self._dispatch_events)
+        except tk.TclError:
+            # Главное окно закрыто
+            pass
+    
+    def stop_event_dispatch(self):
+        """Доставляет оставшиеся события и возвращает синхронную доставку"""
+        global_event_bus.stop_queue()
+    
     def _on_file_created(self, event):
         """Обработчик события создания файла"""
         file_path = event.data.get("file_path")
@@ -182,14 +241,14 @@ class MainWindow:
         skipped = event.data.get("skipped", False)
         
         if skipped:
-            self.logger.info(f"Файл пропущен (уже существует): {file_path}")
+            self.logger.debug("Файл пропущен (уже существует): %s", file_path)
         else:
-            self.logger.info(f"Файл создан: {file_path}")
+            self.logger.debug("Файл создан: %s", file_path)
     
     def _on_directory_created(self, event):
         """Обработчик события создания папки"""
         directory_path = event.data.get("directory_path")
-        self.logger.info(f"Папка создана: {directory_path}")
+        self.logger.debug("Папка создана: %s", directory_path)
     
     def _on_error_occurred(self, event):
         """Обработчик события ошибки"""
@@ -208,7 +267,7 @@ class MainWindow:
         progress = event.data.get("progress")
         if progress:
             # Здесь можно обновить прогресс-бар или статус
-            self.logger.debug(f"Прогресс: {progress.current_operation}")
+            self.logger.debug("Прогресс: %s", progress.current_operation)
     
     def copy_selected_text(self):
         """Копирует выделенный текст в буфер обмена"""
@@ -223,33 +282,39 @@ class MainWindow:
             self.instructions_text.clipboard_append(all_text)
     
     def check_templates(self):
-        """Проверяет наличие шаблонов и обновляет состояние кнопок"""
-        validation_result = self.processor.validator.validate_templates()
-        
+        """Обновляет статус шаблонов и кнопок по последней проверке TemplateWatcher"""
         all_found = True
         missing_templates = []
         
         for template_path, status_label in self.template_status.items():
-            if Path(template_path).exists():
+            state = self.template_watcher.state(template_path)
+            if state is None:
+                status_label.config(text="Проверка...", foreground="gray")
+                all_found = False
+            elif state.exists:
                 status_label.config(text="Найден", foreground="green")
             else:
                 status_label.config(text="Отсутствует", foreground="red")
                 all_found = False
                 missing_templates.append(Path(template_path).name)
         
-        # Обновляем состояние только если изменилось
-        if all_found != self.templates_ok:
-            self.templates_ok = all_found
-            
-            if all_found:
-                self.templates_frame.config(text="Статус шаблонов: все найдены, функции доступны")
-                self.create_files_btn.config(state=tk.NORMAL)
-                self.reports_btn.config(state=tk.NORMAL)
-            else:
-                missing_list = ", ".join(missing_templates)
-                self.templates_frame.config(text=f"Статус шаблонов: отсутствуют {missing_list}")
-                self.create_files_btn.config(state=tk.DISABLED)
-                self.reports_btn.config(state=tk.DISABLED)
+        if not self.template_watcher.checked:
+            # До первой проверки функции недоступны
+            self.create_files_btn.config(state=tk.DISABLED)
+            self.reports_btn.config(state=tk.DISABLED)
+            return
+        
+        # Вызывается только по событию изменения шаблона - состояние применяется всегда
+        self.templates_ok = all_found
+        if all_found:
+            self.templates_frame.config(text="Статус шаблонов: все найдены, функции доступны")
+            self.create_files_btn.config(state=tk.NORMAL)
+            self.reports_btn.config(state=tk.NORMAL)
+        else:
+            missing_list = ", ".join(missing_templates)
+            self.templates_frame.config(text=f"Статус шаблонов: отсутствуют {missing_list}")
+            self.create_files_btn.config(state=tk.DISABLED)
+            self.reports_btn.config(state=tk.DISABLED)
     
     def insert_instructions(self):
         """Вставляет базовые инструкции"""
@@ -282,7 +347,8 @@ class MainWindow:
                 self.create_files_window.show()
                 return
             
-            # Создаем новое окно
+            # Создаем новое окно (модули обработки загружаются при первом открытии)
+            from gui.create_files_window import CreateFilesWindow
             self.create_files_window = CreateFilesWindow(self.root, self.config, self)
             self.create_files_window.show()
             
@@ -299,7 +365,8 @@ class MainWindow:
                 self.reports_window.show()
                 return
             
-            # Создаем новое окно
+            # Создаем новое окно (модули обработки загружаются при первом открытии)
+            from gui.reports_window import ReportsWindow
             self.reports_window = ReportsWindow(self.root, self.config, self)
             self.reports_window.show()
             
@@ -308,17 +375,28 @@ class MainWindow:
             messagebox.showerror("Ошибка", f"Не удалось открыть окно отчетов: {e}")
     
     def schedule_template_check(self):
-        """Планирует периодическую проверку шаблонов"""
-        self.check_templates()
-        # Проверяем каждые 5 секунд
-        self.root.after(5000, self.schedule_template_check)
+        """Запускает фоновую проверку шаблонов и планирует следующую"""
+        self.template_watcher.check_async()
+        self.root.after(self.config.template_check_interval_ms, self.schedule_template_check)
+    
+    def _on_focus_in(self, event):
+        """Активация окна: проверка шаблонов, если последняя была не только что"""
+        self.template_watcher.check_async(self.FOCUS_CHECK_MIN_INTERVAL_SECONDS)
+    
+    def _on_template_changed(self, event):
+        """Обработчик изменения шаблона (доставляется в потоке интерфейса)"""
+        try:
+            self.check_templates()
+        except tk.TclError:
+            # Главное окно закрыто
+            pass
     
     def on_window_closed(self, window_type: str):
         """Обработчик закрытия дочерних окон"""
         if window_type == "create_files":
             self.create_files_window = None
             # Обновляем статус шаблонов при возврате
-            self.check_templates()
+            self.template_watcher.check_async(self.FOCUS_CHECK_MIN_INTERVAL_SECONDS)
         elif window_type == "reports":
             self.reports_window = None
 
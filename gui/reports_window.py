@@ -11,11 +11,11 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
-import time
-import random
 
 from config import Config
+from gui.log_view import LogView
 from core.processor import VacationProcessor
+from core.cancellation import CancellationToken
 from core.events import event_bus, EventType
 from models import ProcessingProgress, ProcessingStatus
 
@@ -36,6 +36,8 @@ class ReportTab:
         self.scan_data = {}
         self.is_processing = False
         self.selected_departments = []
+        # Токен отмены текущей обработки (передается в процессор)
+        self.cancel_token = None
         
         # НОВЫЕ ПЕРЕМЕННЫЕ для отслеживания повторных выборов
         self.path_reselected = False
@@ -43,14 +45,6 @@ class ReportTab:
         # Инициализация таймингов для блоков (для вкладки reports)
         self._block_timings = {} 
         
-        # Инициализация состояния эмуляции для общего отчета (для вкладки general)
-        self._general_emulation_state = {
-            'last_operation': '',
-            'animation_start_time': 0.0,
-            'animation_duration': 0.0,
-            'animation_id': None
-        }
-        
         # Подписка на события
         self._setup_event_listeners()
         
@@ -64,10 +58,10 @@ class ReportTab:
         event_bus.subscribe(EventType.PROGRESS_UPDATE, self._on_progress_updated)
     
     def _on_file_created(self, event):
-        """Обработчик события создания файла"""
-        file_path = event.data.get("file_path")
-        if file_path:
-            self.add_info(f"Файл создан: {file_path}", "success")
+        """Обработчик события создания файла (из очереди шины приходит пакет файлов)"""
+        for data in event.items:
+            if data.get("file_path"):
+                self.add_info(f"Файл создан: {data['file_path']}", "success")
     
     def _on_directory_created(self, event):
         """Обработчик события создания папки"""
@@ -83,42 +77,16 @@ class ReportTab:
     
     def _on_progress_updated(self, event):
         """Обработчик события обновления прогресса"""
+        # Прогресс окна создания файлов отрисовывает само окно
+        if event.source == "CreateFilesWindow":
+            return
         progress = event.data.get("progress")
         if progress:
             self.add_info(f"Прогресс: {progress.current_operation}")
     
     def add_info(self, message: str, level: str = "info"):
-        """Добавляет информационное сообщение"""
-        # ИСПРАВЛЕНИЕ: Проверяем что виджет еще существует
-        try:
-            if not self.info_text.winfo_exists():
-                return
-        except tk.TclError:
-            return
-        
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        if level in ["success", "error", "warning"]:
-            colors = {"warning": "#FF8C00", "error": "red", "success": "green"}
-            color = colors[level]
-            font_style = ("TkDefaultFont", 9, "bold")
-        else:
-            color = "black"
-            font_style = ("TkDefaultFont", 9)
-        
-        if message.strip():
-            self.info_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        else:
-            self.info_text.insert(tk.END, "\n")
-        
-        if level in ["success", "error", "warning"]:
-            start_line = self.info_text.index(tk.END + "-2l linestart")
-            end_line = self.info_text.index(tk.END + "-1l lineend")
-            tag_name = f"color_{level}_{timestamp}"
-            self.info_text.tag_add(tag_name, start_line, end_line)
-            self.info_text.tag_config(tag_name, foreground=color, font=font_style)
-        
-        self.info_text.see(tk.END)
+        """Добавляет информационное сообщение (выводится при следующем обновлении области)"""
+        self.log_view.append(message, level)
 
     def restart_process(self):
         """Перезапуск процесса создания отчетов"""
@@ -126,7 +94,7 @@ class ReportTab:
         self.is_processing = False
         
         # Очищаем информацию
-        self.info_text.delete(1.0, tk.END)
+        self.log_view.clear()
         initial_msg = "Готов к повторному созданию отчетов по подразделениям" if self.tab_type == "departments" else "Готов к повторному созданию общего отчета"
         self.add_info(initial_msg)
         
@@ -197,17 +165,9 @@ class ReportTab:
         self.info_frame.columnconfigure(0, weight=1)
         self.info_frame.rowconfigure(0, weight=1)
         
-        self.info_text = tk.Text(self.info_frame, height=12, wrap=tk.WORD, font=("TkDefaultFont", 9), 
-                                state=tk.NORMAL, cursor="arrow")
-        
-        # Настройка копирования
-        self.setup_text_copy_behavior(self.info_text)
-        
-        info_scrollbar = ttk.Scrollbar(self.info_frame, orient=tk.VERTICAL, command=self.info_text.yview)
-        self.info_text.configure(yscrollcommand=info_scrollbar.set)
-        
-        self.info_text.grid(row=0, column=0, sticky="nsew")
-        info_scrollbar.grid(row=0, column=1, sticky="ns")
+        # Сообщения выводятся пакетами по таймеру, полный текст - в файле лога
+        self.log_view = LogView(self.info_frame, self.config, f"reports_{self.tab_type}")
+        self.log_view.grid(row=0, column=0, sticky="nsew")
         
         # Прогресс (скрыт)
         self.progress_frame = ttk.LabelFrame(self.frame, text="Прогресс обработки", padding="10")
@@ -252,38 +212,6 @@ class ReportTab:
         self.action_btn = ttk.Button(buttons_frame, text=btn_text, command=self.start_processing, state=tk.DISABLED)
         self.action_btn.grid(row=0, column=1)
     
-    def setup_text_copy_behavior(self, text_widget):
-        """Настройка поведения копирования для текстового виджета"""
-        def on_key(event):
-            if event.state & 0x4 and event.keysym.lower() in ['c', 'a']:
-                return
-            return "break"
-        
-        text_widget.bind('<Key>', on_key)
-        text_widget.bind('<Control-a>', lambda e: text_widget.tag_add("sel", "1.0", "end"))
-        
-        def show_context_menu(event):
-            try:
-                context_menu = tk.Menu(text_widget, tearoff=0)
-                context_menu.add_command(label="Выделить всё", command=lambda: text_widget.tag_add("sel", "1.0", "end"))
-                context_menu.add_command(label="Копировать", command=lambda: self.copy_selected_text(text_widget))
-                context_menu.tk_popup(event.x_root, event.y_root)
-            except:
-                pass
-        
-        text_widget.bind('<Button-3>', show_context_menu)
-    
-    def copy_selected_text(self, text_widget):
-        """Копирует выделенный текст"""
-        try:
-            selected_text = text_widget.selection_get()
-            text_widget.clipboard_clear()
-            text_widget.clipboard_append(selected_text)
-        except tk.TclError:
-            all_text = text_widget.get("1.0", "end-1c")
-            text_widget.clipboard_clear()
-            text_widget.clipboard_append(all_text)
-    
     def select_path(self):
         """Выбор пути"""
         dir_path = filedialog.askdirectory(title="Выберите папку с подразделениями")
@@ -311,28 +239,9 @@ class ReportTab:
         
         def scan_thread():
             try:
-                time.sleep(0.5)
-                departments_info = self.processor.scan_target_directory(dir_path)
-                
-                if departments_info:
-                    potential_departments = []
-                    for dept_name, files_count in departments_info.items():
-                        potential_departments.append({
-                            'name': dept_name,
-                            'path': str(Path(dir_path) / dept_name),
-                            'files_count': files_count
-                        })
-                    
-                    selected_departments = self.show_departments_selection_dialog(potential_departments)
-                    
-                    if selected_departments:
-                        self.selected_departments = selected_departments
-                        scan_data = {dept['name']: dept['files_count'] for dept in selected_departments}
-                        self.frame.after(0, self.on_scan_complete, scan_data)
-                    else:
-                        return
-                else:
-                    self.frame.after(0, self.on_scan_complete, {})
+                # Только список папок: файлы считает диалог по мере построения списка
+                departments = self.processor.directory_manager.list_departments(dir_path)
+                self.frame.after(0, self.on_departments_listed, departments)
             except Exception as e:
                 self.frame.after(0, self.on_scan_error, str(e))
         
@@ -340,213 +249,26 @@ class ReportTab:
         self.frame.winfo_toplevel().lift()
         self.frame.winfo_toplevel().focus_force()
 
-    def show_departments_selection_dialog(self, departments):
-        """Показывает диалог для выбора подразделений"""
-        # Находим родительское окно
-        parent_window = self.frame.winfo_toplevel()
-        
-        # Создаем модальное окно
-        dialog = tk.Toplevel(parent_window)
-        dialog.title("Выбор подразделений")
-        dialog.geometry("650x550")
-        dialog.resizable(True, True)
-        dialog.transient(parent_window)
-        dialog.grab_set()
-        
-        # Центрируем относительно родительского окна
-        dialog.geometry("+%d+%d" % (
-            parent_window.winfo_rootx() + 50,
-            parent_window.winfo_rooty() + 50
-        ))
-        
-        result = []
-        
-        # Основной фрейм с отступами
-        main_frame = ttk.Frame(dialog, padding="20")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Заголовок
-        header_frame = ttk.Frame(main_frame)
-        header_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        ttk.Label(
-            header_frame,
-            text="Выберите подразделения для создания отчетов:",
-            font=("TkDefaultFont", 11, "bold")
-        ).pack(anchor=tk.W)
-        
-        ttk.Label(
-            header_frame,
-            text=f"Найдено подразделений: {len(departments)}",
-            font=("TkDefaultFont", 9)
-        ).pack(anchor=tk.W, pady=(5, 0))
-        
-        # ИСПРАВЛЕНИЕ: Область с чекбоксами с правильной структурой
-        list_frame = ttk.LabelFrame(main_frame, text="Подразделения", padding="15")
-        list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
-        
-        # Контейнер для Canvas и Scrollbar
-        canvas_container = ttk.Frame(list_frame)
-        canvas_container.pack(fill=tk.BOTH, expand=True)
-        
-        # Canvas для скроллинга
-        canvas = tk.Canvas(canvas_container, highlightthickness=0)
-        scrollbar = ttk.Scrollbar(canvas_container, orient="vertical", command=canvas.yview)
-        
-        # ИСПРАВЛЕНИЕ: Создаем scrollable_frame внутри canvas с отступами
-        scrollable_frame = ttk.Frame(canvas)
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        # ИСПРАВЛЕНИЕ: Правильное размещение элементов
-        canvas.pack(side="left", fill="both", expand=True, padx=(0, 5))
-        scrollbar.pack(side="right", fill="y")
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # Переменные для чекбоксов
-        dept_vars = {}
-        
-        # Создаем чекбоксы с правильными отступами
-        checkboxes = []
-        for i, dept in enumerate(departments):
-            var = tk.BooleanVar()
-            var.set(True)  # По умолчанию все выбраны
-            dept_vars[i] = var
-            
-            # ИСПРАВЛЕНИЕ: Фрейм для чекбокса с отступами
-            cb_frame = ttk.Frame(scrollable_frame)
-            cb_frame.pack(fill=tk.X, pady=3, padx=10)
-            
-            checkbox = ttk.Checkbutton(
-                cb_frame,
-                text=f"{dept['name']}",
-                variable=var,
-                width=50
-            )
-            checkbox.pack(side=tk.LEFT, anchor=tk.W)
-            checkboxes.append(checkbox)
-            
-            # Информация о файлах
-            info_label = ttk.Label(
-                cb_frame,
-                text=f"({dept['files_count']} файлов)",
-                font=("TkDefaultFont", 8),
-                foreground="gray"
-            )
-            info_label.pack(side=tk.RIGHT, anchor=tk.E, padx=(10, 0))
-        
-        # ИСПРАВЛЕНИЕ: Обработка прокрутки колесиком мыши
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        
-        def _bind_to_mousewheel(event):
-            canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        
-        def _unbind_from_mousewheel(event):
-            canvas.unbind_all("<MouseWheel>")
-        
-        canvas.bind('<Enter>', _bind_to_mousewheel)
-        canvas.bind('<Leave>', _unbind_from_mousewheel)
-        
-        # Кнопки управления выбором
-        selection_frame = ttk.Frame(main_frame)
-        selection_frame.pack(fill=tk.X, pady=(0, 15))
-        
-        def select_all():
-            for var in dept_vars.values():
-                var.set(True)
-        
-        def deselect_all():
-            for var in dept_vars.values():
-                var.set(False)
-        
-        def get_selected_count():
-            return sum(1 for var in dept_vars.values() if var.get())
-        
-        def update_selection_info():
-            selected_count = get_selected_count()
-            total_files = sum(departments[i]['files_count'] for i, var in dept_vars.items() if var.get())
-            selection_info.config(text=f"Выбрано: {selected_count} подразделений, {total_files} файлов")
-        
-        # Кнопки выбора
-        selection_buttons_frame = ttk.Frame(selection_frame)
-        selection_buttons_frame.pack(side=tk.LEFT)
-        
-        ttk.Button(selection_buttons_frame, text="Выбрать все", command=lambda: [select_all(), update_selection_info()]).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(selection_buttons_frame, text="Снять выбор", command=lambda: [deselect_all(), update_selection_info()]).pack(side=tk.LEFT, padx=5)
-        
-        # Информация о выборе
-        selection_info = ttk.Label(selection_frame, text="", font=("TkDefaultFont", 9, "bold"))
-        selection_info.pack(side=tk.RIGHT)
-        
-        # Обновляем информацию при изменении чекбоксов
-        for var in dept_vars.values():
-            var.trace('w', lambda *args: update_selection_info())
-        
-        # Изначально обновляем информацию
-        update_selection_info()
-        
-        # Кнопки диалога
-        buttons_frame = ttk.Frame(main_frame)
-        buttons_frame.pack(fill=tk.X)
-        
-        def on_ok():
-            nonlocal result
-            selected_indices = [i for i, var in dept_vars.items() if var.get()]
-            if not selected_indices:
-                messagebox.showwarning("Предупреждение", "Выберите хотя бы одно подразделение")
-                return
-            result = [departments[i] for i in selected_indices]
-            dialog.destroy()
-        
-        def on_cancel():
-            dialog.destroy()
-        
-        def on_dialog_close():
-            """Обработчик закрытия диалога - возвращаем фокус на окно отчетов"""
-            dialog.destroy()
-            # ИСПРАВЛЕНИЕ: Возвращаем фокус на окно отчетов
-            parent_window.lift()
-            parent_window.focus_force()
-        
-        # Привязываем обработчик закрытия
-        dialog.protocol("WM_DELETE_WINDOW", on_dialog_close)
-        
-        # Кнопки справа
-        button_right_frame = ttk.Frame(buttons_frame)
-        button_right_frame.pack(side=tk.RIGHT)
-        
-        def ok_and_focus():
-            on_ok()
-            # ИСПРАВЛЕНИЕ: Возвращаем фокус на окно отчетов после OK
-            parent_window.lift()
-            parent_window.focus_force()
-        
-        def cancel_and_focus():
-            on_cancel()
-            # ИСПРАВЛЕНИЕ: Возвращаем фокус на окно отчетов после Cancel
-            parent_window.lift()
-            parent_window.focus_force()
-        
-        ttk.Button(button_right_frame, text="OK", command=ok_and_focus).pack(side=tk.LEFT, padx=(0, 5))
-        ttk.Button(button_right_frame, text="Отмена", command=cancel_and_focus).pack(side=tk.LEFT)
-        
-        # Привязываем Enter и Escape
-        dialog.bind('<Return>', lambda e: ok_and_focus())
-        dialog.bind('<Escape>', lambda e: cancel_and_focus())
-        
-        # Фокус на первый чекбокс
-        if checkboxes:
-            checkboxes[0].focus_set()
-        
-        # Ждем закрытия диалога
-        dialog.wait_window()
+    def on_departments_listed(self, departments: Dict[str, str]):
+        """Показывает диалог выбора подразделений (поток интерфейса)"""
+        if not departments:
+            self.on_scan_complete({})
+            return
         
-        return result
+        from gui.department_selection import DepartmentSelectionDialog
+        DepartmentSelectionDialog(
+            self.frame.winfo_toplevel(),
+            departments,
+            count_files=self.processor.directory_manager.count_employee_files,
+            on_done=self.on_departments_selected
+        )
+
+    def on_departments_selected(self, selected_departments: List[Dict]):
+        """Обработчик закрытия диалога выбора подразделений"""
+        if not selected_departments:
+            return
+        self.selected_departments = selected_departments
+        self.on_scan_complete({dept['name']: dept['files_count'] for dept in selected_departments})
 
     def on_scan_complete(self, departments_info):
         """Обработчик завершения сканирования"""
@@ -621,7 +343,9 @@ class ReportTab:
             return
         
         self.is_processing = True
-        self.action_btn.config(state=tk.DISABLED)
+        self.cancel_token = CancellationToken()
+        # Во время обработки кнопка останавливает ее
+        self.action_btn.config(text="Остановить", command=self.cancel_processing, state=tk.NORMAL)
         self.show_progress_view()
         
         def processing_thread():
@@ -630,14 +354,16 @@ class ReportTab:
                     # Обновление отчетов по подразделениям
                     operation_log = self.processor.update_block_reports(
                         self.selected_departments,
-                        self.on_progress_update
+                        self.on_progress_update,
+                        cancel_token=self.cancel_token
                     )
                 else:
                     # Создание общего отчета
                     operation_log = self.processor.create_general_report(
                         self.selected_departments,
                         self.target_path,
-                        self.on_progress_update
+                        self.on_progress_update,
+                        cancel_token=self.cancel_token
                     )
                 
                 self.frame.after(0, self.on_processing_complete, operation_log)
@@ -646,6 +372,13 @@ class ReportTab:
         
         threading.Thread(target=processing_thread, daemon=True).start()
 
+    def cancel_processing(self):
+        """Останавливает обработку: текущий файл дочитывается, готовые отчеты остаются"""
+        if not self.is_processing or self.cancel_token is None:
+            return
+        self.cancel_token.cancel()
+        self.action_btn.config(text="Остановка...", state=tk.DISABLED)
+
     def on_progress_update(self, progress):
         """Обработчик обновления прогресса"""
         def update_ui():
@@ -659,63 +392,40 @@ class ReportTab:
             elapsed = (datetime.now() - progress.start_time).total_seconds() if progress.start_time else 0
             
             if self.tab_type == "departments":
+                # Снимок агрегатора прогресса: блоки строятся параллельно, прогресс ведется по каждому
                 if progress.total_files > 0:
                     overall_percent = (progress.processed_files / progress.total_files) * 100
                     self.overall_progress_label.config(text=f"Общий прогресс: {overall_percent:.1f}%")
                 else:
                     self.overall_progress_label.config(text=f"Общий прогресс: 0.0%")
 
-                if progress.processed_files > 0 and progress.total_files > 0:
-                    speed = progress.processed_files / elapsed if elapsed > 0 else 0
-                    remaining_files = progress.total_files - progress.processed_files
-                    remaining_time = remaining_files / speed if speed > 0 else 0
-                    self.time_label.config(text=f"Прошло: {elapsed:.0f} сек, Осталось: {remaining_time:.0f} сек")
+                if progress.eta_seconds is not None and not progress.finished:
+                    self.time_label.config(
+                        text=f"Прошло: {elapsed:.0f} сек, Осталось: {progress.eta_seconds:.0f} сек "
+                             f"({progress.files_per_second:.1f} файл/с)"
+                    )
                 else:
                     self.time_label.config(text=f"Прошло: {elapsed:.0f} сек")
                 
-                # Верхний прогресс-бар (отделы)
+                # Верхний прогресс-бар (готовые отделы)
                 if progress.total_blocks > 0:
-                    dept_percent = (progress.processed_blocks / progress.total_blocks) * 100
-                    current_dept_display = progress.processed_blocks + 1 if progress.processed_blocks < progress.total_blocks else progress.total_blocks
-                    self.dept_progress_bar['value'] = dept_percent
+                    self.dept_progress_bar['value'] = (progress.processed_blocks / progress.total_blocks) * 100
                     self.dept_detail_label.config(
-                        text=f"Отдел {current_dept_display}/{progress.total_blocks}: {progress.current_block or 'Готовится...'}"
+                        text=f"Готово отделов {progress.processed_blocks}/{progress.total_blocks}: "
+                             f"{progress.current_block or 'Готовится...'}"
                     )
                 else:
                     self.dept_progress_bar['value'] = 0
                     self.dept_detail_label.config(text="Нет отделов для обработки")
 
-                # Нижний прогресс-бар (файлы в текущем отделе)
-                if hasattr(self, 'selected_departments') and self.selected_departments:
-                    current_dept_index = progress.processed_blocks
-                    
-                    if 0 <= current_dept_index < len(self.selected_departments):
-                        current_dept = self.selected_departments[current_dept_index]
-                        files_in_dept = current_dept['files_count']
-                        
-                        if files_in_dept > 0:
-                            files_before_current = sum(
-                                self.selected_departments[i]['files_count'] 
-                                for i in range(current_dept_index)
-                            )
-                            
-                            files_in_current = max(0, progress.processed_files - files_before_current)
-                            files_in_current = min(files_in_current, files_in_dept)
-                            
-                            files_percent = (files_in_current / files_in_dept) * 100
-                            self.files_progress_bar['value'] = files_percent
-                            self.files_detail_label.config(
-                                text=f"Файл {files_in_current}/{files_in_dept} в отделе"
-                            )
-                        else:
-                            self.files_progress_bar['value'] = 0
-                            self.files_detail_label.config(text="Нет файлов в отделе")
-                    else:
-                        self.files_progress_bar['value'] = 0
-                        self.files_detail_label.config(text="Инициализация...")
+                # Нижний прогресс-бар (файлы последнего обработанного отдела)
+                processed, total = progress.department_progress(progress.current_block)
+                if total > 0:
+                    self.files_progress_bar['value'] = (processed / total) * 100
+                    self.files_detail_label.config(text=f"Файл {processed}/{total} в отделе")
                 else:
                     self.files_progress_bar['value'] = 0
-                    self.files_detail_label.config(text="Подготовка...")
+                    self.files_detail_label.config(text=progress.current_operation or "Подготовка...")
             else: # General Report Tab
                 # Общий процент и время
                 if progress.total_blocks > 0:
@@ -741,30 +451,15 @@ class ReportTab:
                 else:
                     self.time_label.config(text=f"Прошло: {elapsed:.0f} сек")
                 
-                # Нижний прогресс-бар (эмуляция):
-                current_active_operation_text = progress.current_operation
-
-                if current_active_operation_text != self._general_emulation_state['last_operation']:
-                    # Новая операция, отменяем предыдущую анимацию, если есть
-                    if self._general_emulation_state['animation_id']:
-                        self.frame.after_cancel(self._general_emulation_state['animation_id'])
-                    
-                    # Сбрасываем состояние и запускаем новую анимацию
-                    self._general_emulation_state['animation_id'] = None # Убедимся, что None для запуска новой анимации
-                    self._general_emulation_state['last_operation'] = current_active_operation_text
-                    self._general_emulation_state['animation_start_time'] = time.time()
-                    self._general_emulation_state['animation_duration'] = random.uniform(0.3, 0.7)
-                    
-                    # Запускаем цикл анимации
-                    self._general_emulation_state['animation_id'] = self.frame.after(50, self._animate_general_emulation)
-                
-                # Если весь отчет создан, завершаем анимацию и устанавливаем 100%
-                if progress.current_operation == "Создание файла общего отчета" and progress.processed_blocks == progress.total_blocks:
-                    if self._general_emulation_state['animation_id']:
-                        self.frame.after_cancel(self._general_emulation_state['animation_id'])
-                    self._general_emulation_state['animation_id'] = None
-                    self.files_progress_bar['value'] = 100
-                    self.files_detail_label.config(text=f"Обработка: {progress.current_operation} (100%) - Завершено")
+                # Нижний прогресс-бар: шаги поиска и чтения отчетов, сведения и записи файла
+                if progress.total_files > 0:
+                    self.files_progress_bar['value'] = (progress.processed_files / progress.total_files) * 100
+                details = f"Шаг {progress.processed_files}/{progress.total_files}: {progress.current_operation}"
+                if progress.processed_bytes:
+                    details += f" | {progress.processed_bytes / 1024:.1f} КБ"
+                if progress.processed_rows:
+                    details += f", строк: {progress.processed_rows}"
+                self.files_detail_label.config(text=details)
         
         # ИСПРАВЛЕНИЕ: Проверяем что фрейм еще существует перед обновлением
         try:
@@ -773,27 +468,6 @@ class ReportTab:
         except tk.TclError:
             pass
 
-    def _animate_general_emulation(self):
-        """Обновляет значение нижнего прогресс-бара для общего отчета, создавая эффект эмуляции."""
-        if not self.frame.winfo_exists():
-            return
-
-        state = self._general_emulation_state
-        if state['animation_id'] is None: # Анимация была отменена или завершена
-            return
-
-        elapsed_time = time.time() - state['animation_start_time']
-        progress_val = (elapsed_time / state['animation_duration']) * 100
-
-        if progress_val >= 99.9: # Почти 100%
-            self.files_progress_bar['value'] = 100
-            self.files_detail_label.config(text=f"Обработка: {state['last_operation']} (100%)")
-            state['animation_id'] = None # Отмечаем как завершенную
-        else:
-            self.files_progress_bar['value'] = min(99, progress_val) # Ограничиваем до 99%, чтобы 100% ставилось явно
-            self.files_detail_label.config(text=f"Обработка: {state['last_operation']} ({progress_val:.0f}%)")
-            state['animation_id'] = self.frame.after(50, self._animate_general_emulation) # Планируем следующий кадр
-
     def show_progress_view(self):
         """Показать прогресс"""
         self.info_frame.grid_remove()
@@ -815,6 +489,11 @@ class ReportTab:
         
         self.is_processing = False
         
+        if operation_log.dropped_entries:
+            self.add_info_to_existing(
+                f"... {operation_log.dropped_entries} записей не показаны, полный лог: {operation_log.sink_path}"
+            )
+        
         if operation_log.status == ProcessingStatus.SUCCESS:
             self.add_info_to_existing("")
             self.add_info_to_existing("=" * 50)
@@ -826,12 +505,20 @@ class ReportTab:
                 if entry.get('level') == "INFO":
                     # ИСПРАВЛЕНИЕ: Убираем зеленое выделение для всех ИТОГ сообщений по отделам
                     if ("Создан отчет:" in entry.get('message', '') or 
+                        "Отчет без изменений:" in entry.get('message', '') or
                         "Данные собраны из отчета для" in entry.get('message', '') or
                         "Скрипт скопирован в" in entry.get('message', '') or
                         "найдено" in entry.get('message', '').lower() and "отчет" in entry.get('message', '').lower()):
                         self.add_info_to_existing(f"ИТОГ: {entry.get('message', '')}")  # Обычный текст
                     else:
                         self.add_info_to_existing(f"ИТОГ: {entry.get('message', '')}", "success")  # Зеленое только для итоговых сводок
+        elif operation_log.status == ProcessingStatus.CANCELLED:
+            self.add_info_to_existing("")
+            self.add_info_to_existing("ОБРАБОТКА ОСТАНОВЛЕНА", "warning")
+            # Готовые до остановки отчеты остаются - выводим весь лог
+            for entry in operation_log.entries:
+                level = {"WARNING": "warning", "ERROR": "error"}.get(entry.get('level'), "info")
+                self.add_info_to_existing(f"ИТОГ: {entry.get('message', '')}", level)
         else:
             self.add_info_to_existing("")
             self.add_info_to_existing("ОШИБКА СОЗДАНИЯ ОТЧЕТОВ!", "error")
@@ -862,36 +549,7 @@ class ReportTab:
     
     def add_info_to_existing(self, message: str, level: str = "info"):
         """Добавляет информацию без временной метки"""
-        # ИСПРАВЛЕНИЕ: Проверяем что виджет еще существует
-        try:
-            if not self.info_text.winfo_exists():
-                return
-        except tk.TclError:
-            return
-        
-        if level in ["success", "error", "warning"]:
-            colors = {"warning": "#FF8C00", "error": "red", "success": "green"}
-            color = colors[level]
-            font_style = ("TkDefaultFont", 9, "bold")
-        else:
-            color = "black"
-            font_style = ("TkDefaultFont", 9)
-        
-        if message.strip():
-            self.info_text.insert(tk.END, f"{message}\n")
-        else:
-            self.info_text.insert(tk.END, "\n")
-        
-        if level in ["success", "error", "warning"]:
-            start_line = self.info_text.index(tk.END + "-2l linestart")
-            end_line = self.info_text.index(tk.END + "-1l lineend")
-            tag_name = f"color_{level}_no_time"
-            self.info_text.tag_add(tag_name, start_line, end_line)
-            self.info_text.tag_config(tag_name, foreground=color, font=font_style)
-        
-        self.info_text.see(tk.END)
-
-
+        self.log_view.append(message, level, timestamp=False)
 
 
 class ReportsWindow:
@@ -960,6 +618,9 @@ class ReportsWindow:
             result = messagebox.askyesno("Подтверждение", "Идет процесс обработки. Действительно закрыть окно?")
             if not result:
                 return
+            for tab in (self.dept_tab, self.general_tab):
+                if tab and tab.is_processing:
+                    tab.cancel_processing()
         
         if self.window:
             self.window.destroy()
@@ -7,7 +7,9 @@ Vacation Tool - Главный модуль
 
 import sys
 import os
+import argparse
 import logging
+import multiprocessing
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
@@ -36,20 +38,63 @@ if __name__ == "__main__":
     sys.path.insert(0, str(current_dir))
 
 from config import Config
+from models import ProcessingStatus
+from core.logging_setup import LOG_PROFILES, setup_logging
 from gui.main_window import MainWindow
 
-def setup_logging():
-    """Настройка логирования только в консоль"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
 
+def show_staff_diff(staff_file: str, target_directory: str) -> int:
+    """Выводит в консоль отличия штатного расписания от файлов целевой папки (без запуска GUI)"""
+    from core.processor import VacationProcessor
 
-def main():
+    config = Config()
+    config.load_or_create_default()
+    processor = VacationProcessor(config)
+
+    validation_result, employees = processor.validator.validate_staff_file(staff_file)
+    if not validation_result.is_valid:
+        print(f"Валидация не пройдена: {validation_result.errors}")
+        return 1
+
+    staff_diff = processor.diff_staff(employees, target_directory)
+    print(f"Сотрудников в штатном расписании: {len(employees)}")
+    for line in staff_diff.summary_lines():
+        print(f"  {line}")
+    for move in staff_diff.moved:
+        print(f"  Перевод: {move.employee['ФИО работника']} ({move.existing.department} -> "
+              f"{move.employee['Подразделение 1']})")
+    for change in staff_diff.changed:
+        fields = "; ".join(f"{field}: '{old}' -> '{new}'" for field, old, new in change.fields)
+        print(f"  Изменен: {change.employee['ФИО работника']} ({fields})")
+    return 0
+
+
+def print_progress(progress) -> None:
+    """Подписчик прогресса консольных команд: строка состояния с оценкой остатка"""
+    line = f"{progress.current_operation}: {progress.processed_files}/{progress.total_files}"
+    if progress.total_files:
+        line += f" ({progress.file_progress_percent:.1f}%)"
+    line += f", {progress.files_per_second:.1f} файл/с"
+    if progress.eta_seconds is not None and not progress.finished:
+        line += f", осталось {progress.eta_seconds:.0f} сек"
+    print(f"\r{line:<100}", end="\n" if progress.finished else "", flush=True)
+
+
+def migrate_templates(target_directory: str) -> int:
+    """Переносит файлы сотрудников папки на текущую версию шаблона (без запуска GUI)"""
+    from core.processor import VacationProcessor
+
+    config = Config()
+    config.load_or_create_default()
+    operation_log = VacationProcessor(config).migrate_employee_templates(target_directory, print_progress)
+    if operation_log.dropped_entries:
+        print(f"... {operation_log.dropped_entries} записей не показаны, полный лог: {operation_log.sink_path}")
+    for entry in operation_log.entries:
+        print(f"[{entry['level']}] {entry['message']}")
+    return 0 if operation_log.status == ProcessingStatus.SUCCESS else 1
+
+
+def main(log_profile: str):
     """Главная функция приложения"""
     try:
         # В exe показываем прогресс
@@ -57,7 +102,7 @@ def main():
             print("Настройка логирования...")
         
         # Настройка логирования
-        setup_logging()
+        setup_logging(log_profile)
         logger = logging.getLogger(__name__)
         logger.info("Запуск Vacation Tool...")
         
@@ -83,6 +128,7 @@ def main():
         # Обработка закрытия окна
         def on_closing():
             logger.info("Завершение работы приложения")
+            app.stop_event_dispatch()
             root.destroy()
         
         root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -110,4 +156,20 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Нужно для пула процессов отчетов в собранном exe
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Vacation Tool - управление отпусками сотрудников")
+    parser.add_argument("--diff", nargs=2, metavar=("STAFF_FILE", "TARGET_DIR"),
+                        help="показать изменения штатного расписания относительно папки и выйти")
+    parser.add_argument("--migrate", metavar="TARGET_DIR",
+                        help="перенести файлы сотрудников папки на текущую версию шаблона и выйти")
+    parser.add_argument("--log-profile", choices=list(LOG_PROFILES), default=Config().log_profile,
+                        help="подробность консольного лога на этот запуск (verbose - по каждому файлу)")
+    args = parser.parse_args()
+    if args.diff:
+        setup_logging(args.log_profile)
+        sys.exit(show_staff_diff(*args.diff))
+    if args.migrate:
+        setup_logging(args.log_profile)
+        sys.exit(migrate_templates(args.migrate))
+    main(args.log_profile)
\ No newline at end of file
@@ -4,10 +4,14 @@
 Модели данных для приложения
 """
 
+import json
+import re
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional, Dict
+from pathlib import Path
+from typing import Any, Deque, List, Optional, Dict, Tuple, TextIO
 
 
 class VacationStatus(Enum):
@@ -109,6 +113,9 @@ class ProcessingProgress:
     total_blocks: int = 0
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
+    # Прочитано и записано байт и строк отчетов (общий отчет)
+    processed_bytes: int = 0
+    processed_rows: int = 0
     
     @property
     def file_progress_percent(self) -> float:
@@ -125,15 +132,73 @@ class ProcessingProgress:
         return (self.processed_blocks / self.total_blocks) * 100
 
 
+@dataclass
+class ProgressSnapshot(ProcessingProgress):
+    """Снимок прогресса, опубликованный ProgressAggregator (не изменяется после публикации)"""
+    # Скорость по последним секундам работы (файлов в секунду)
+    files_per_second: float = 0.0
+    # Оценка оставшегося времени (None - скорость еще неизвестна)
+    eta_seconds: Optional[float] = None
+    # Подразделение -> (обработано файлов, всего файлов)
+    departments: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # Последний снимок операции
+    finished: bool = False
+
+    @property
+    def elapsed_seconds(self) -> float:
+        """Время с начала операции"""
+        if self.start_time is None:
+            return 0.0
+        return ((self.end_time or datetime.now()) - self.start_time).total_seconds()
+
+    def department_progress(self, name: str) -> Tuple[int, int]:
+        """(обработано, всего) файлов подразделения"""
+        return self.departments.get(name, (0, 0))
+
+
 @dataclass
 class OperationLog:
-    """Лог выполнения операции"""
+    """
+    Лог выполнения операции
+
+    В памяти хранятся последние max_entries записей (для окна), полный лог
+    дописывается в файл JSON Lines (sink_path), если он задан. Итоги операции
+    ведутся счетчиками (count), а не разбором текста записей.
+    """
     operation_name: str
     start_time: datetime = field(default_factory=datetime.now)
     end_time: Optional[datetime] = None
     status: ProcessingStatus = ProcessingStatus.RUNNING
-    entries: List[dict] = field(default_factory=list)
-    
+    # Записей в памяти (0 - без ограничения)
+    max_entries: int = 0
+    # Файл полного лога (None - только память)
+    sink_path: Optional[str] = None
+    entries: Deque[dict] = field(init=False)
+    # Записей, вытесненных из памяти (остаются в файле полного лога)
+    dropped_entries: int = 0
+    # Счетчики итогов: всего и по подразделениям
+    counters: Dict[str, int] = field(default_factory=dict)
+    department_counters: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    # Числовые показатели операции (время на файл и т.п.)
+    metrics: Dict[str, float] = field(default_factory=dict)
+    _sink: Optional[TextIO] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.entries = deque(maxlen=self.max_entries or None)
+
+    @classmethod
+    def open(cls, operation_name: str, config) -> 'OperationLog':
+        """Лог операции с ограничением записей и файлом полного лога из конфигурации"""
+        start_time = datetime.now()
+        slug = re.sub(r'[^\w]+', '_', operation_name)
+        file_name = f"{start_time:%Y%m%d_%H%M%S_%f}_{slug}.jsonl"
+        return cls(
+            operation_name,
+            start_time=start_time,
+            max_entries=config.operation_log_max_entries,
+            sink_path=str(Path(config.operation_log_directory) / file_name)
+        )
+
     def add_entry(self, level: str, message: str) -> None:
         """Добавляет запись в лог"""
         entry = {
@@ -141,12 +206,47 @@ class OperationLog:
             "level": level,
             "message": message
         }
+        if len(self.entries) == self.entries.maxlen:
+            self.dropped_entries += 1
         self.entries.append(entry)
-    
+        self._write({"timestamp": entry["timestamp"].isoformat(), "level": level, "message": message})
+
+    def count(self, name: str, department: Optional[str] = None, amount: int = 1) -> None:
+        """Увеличивает счетчик итогов (и счетчик подразделения, если оно указано)"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if department is not None:
+            department_counts = self.department_counters.setdefault(department, {})
+            department_counts[name] = department_counts.get(name, 0) + amount
+
+    def counter(self, name: str) -> int:
+        return self.counters.get(name, 0)
+
     def finish(self, status: ProcessingStatus) -> None:
-        """Завершает операцию"""
+        """Завершает операцию: итоговая запись и закрытие файла полного лога"""
         self.status = status
         self.end_time = datetime.now()
+        self._write({
+            "timestamp": self.end_time.isoformat(),
+            "level": "SUMMARY",
+            "operation": self.operation_name,
+            "status": status.value,
+            "duration": self.duration,
+            "counters": self.counters,
+            "department_counters": self.department_counters,
+            "metrics": self.metrics
+        })
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Дописывает запись в файл полного лога"""
+        if self.sink_path is None:
+            return
+        if self._sink is None:
+            Path(self.sink_path).parent.mkdir(parents=True, exist_ok=True)
+            self._sink = open(self.sink_path, 'a', encoding='utf-8')
+        self._sink.write(json.dumps(record, ensure_ascii=False) + "\n")
     
     @property
     def duration(self) -> Optional[float]:
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Сверка расчета формул формы сотрудника с результатами Excel
+
+FormStatusCalculator и EmployeeFormulaCache повторяют формулы шаблона
+(B12, столбцы E/H, H8, лист «Расчёт»), а рассчитанные значения записываются
+в файлы как кэш формул с отключенным пересчетом при открытии. Тест берет
+файлы форм, сохраненные в Excel (кэш формул посчитан самим Excel), и
+сравнивает с ним статус и все значения, которые пишет кэш.
+
+Пустая форма - сам шаблон сотрудника. Остальные случаи лежат в
+tests/data/employee_forms: заполните шаблон в Excel и сохраните файл под
+именем случая.
+
+Запуск из корня проекта:
+    python -m pytest -q tests
+"""
+
+import math
+import sys
+import warnings
+from datetime import date, datetime
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config import Config
+from core.form_status import ADVANCE_LIMIT_ERROR, FormStatusCalculator
+from core.formula_cache import EmployeeFormulaCache
+from models import VacationStatus
+
+
+FORMS_DIR = PROJECT_ROOT / "tests" / "data" / "employee_forms"
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Случай: (файл формы, ожидаемый статус, текст в проверках периодов столбца H)
+CASES = {
+    "not_filled": (PROJECT_ROOT / Config().employee_template, VacationStatus.NOT_FILLED, None),
+    "correct": (FORMS_DIR / "correct.xlsx", VacationStatus.FILLED_CORRECT, None),
+    "incorrect": (FORMS_DIR / "incorrect.xlsx", VacationStatus.FILLED_INCORRECT, None),
+    "advance_limit": (FORMS_DIR / "advance_limit.xlsx", VacationStatus.FILLED_INCORRECT, ADVANCE_LIMIT_ERROR),
+}
+
+
+def excel_value(value):
+    """Значение в виде, в котором его хранит кэш Excel (даты - серийные номера, "" - пустая ячейка)"""
+    if value == "":
+        return None
+    if isinstance(value, datetime):
+        return (value - EXCEL_EPOCH).total_seconds() / 86400
+    if isinstance(value, date):
+        return float((value - EXCEL_EPOCH.date()).days)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def same_value(computed, stored) -> bool:
+    """Совпадение рассчитанного значения с сохраненным Excel"""
+    computed, stored = excel_value(computed), excel_value(stored)
+    if isinstance(computed, float) and isinstance(stored, float):
+        return math.isclose(computed, stored, rel_tol=1e-9, abs_tol=1e-9)
+    return computed == stored
+
+
+def load_case(name: str):
+    """Книга формы с формулами, книга с кэшем Excel и конфигурация с этой формой как шаблоном"""
+    path, _, _ = CASES[name]
+    if not path.exists():
+        pytest.skip(f"Нет формы, сохраненной в Excel: {path}")
+    config = Config()
+    config.set("employee_template", str(path))
+    with warnings.catch_warnings():
+        # openpyxl предупреждает о проверке данных шаблона
+        warnings.simplefilter("ignore")
+        workbook = openpyxl.load_workbook(path)
+        stored = openpyxl.load_workbook(path, data_only=True)
+    return config, workbook, stored
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_form_status_matches_excel(name):
+    config, workbook, stored = load_case(name)
+    _, expected_status, expected_check = CASES[name]
+    calculator = FormStatusCalculator(config)
+
+    calculation = calculator.calculate(calculator.read_inputs(workbook))
+
+    form = stored.worksheets[config.employee_file_structure["active_sheet_index"]]
+    status_cell = config.employee_file_structure["status_cell"]
+    assert calculation.status.status == expected_status
+    assert calculation.status.text == form[status_cell].value
+    if expected_check is not None:
+        assert any(row.check and expected_check in row.check for row in calculation.rows)
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_formula_cache_matches_excel(name):
+    config, workbook, stored = load_case(name)
+    formula_cache = EmployeeFormulaCache(config, FormStatusCalculator(config))
+
+    values = formula_cache.prepare(workbook)
+
+    mismatches = [
+        f"{sheet_name}!{address}: {computed!r} != {stored[sheet_name][address].value!r}"
+        for sheet_name, sheet_values in values.items()
+        for address, computed in sheet_values.items()
+        if not same_value(computed, stored[sheet_name][address].value)
+    ]
+    assert sum(len(sheet_values) for sheet_values in values.values()) > 0
+    assert not mismatches, "\n".join(mismatches[:20])